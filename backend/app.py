@@ -1,34 +1,74 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, url_for
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from config import Config
+from routes.admin_routes import admin_bp
 from routes.auth_routes import auth_bp
+from routes.metrics_routes import metrics_bp
 from routes.submit_routes import submit_bp
+from routes.upload_routes import upload_bp
 from routes.verify_routes import verify_bp
-from utils.db_utils import init_database
+from utils.admission import AdmissionRejected
+from utils.anchor_sequencer import AnchorTimeoutError
+from utils.db_pool import PoolTimeoutError
+from utils.db_routing import install_read_routing
+from utils.metrics import install_request_metrics
+from utils.migrations import check_schema_version, migrate
+from utils.password_hasher import HasherBusyError
+from utils.profiling import install_profiling
+from utils.storage import get_anchor_worker
+from utils.upload_stream import HashVaultRequest
 
 
 def create_app():
     """Create and configure the Flask application."""
     app = Flask(__name__)
+    app.request_class = HashVaultRequest
 
     # Load configuration
     app.config.from_object(Config)
     app.config['ALLOWED_EXTENSIONS'] = Config.ALLOWED_EXTENSIONS
 
-    # Enable CORS for configured origins
-    CORS(app, origins=Config.CORS_ORIGINS)
+    # Take the client address from X-Forwarded-For set by our own proxies only.
+    if app.config.get('TRUSTED_PROXIES'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
 
-    # Initialize MySQL schema.
-    init_database(app.config)
+    # Enable CORS for configured origins; credentialed, so the frontend's
+    # requests carry the read-your-writes cookie.
+    CORS(app, origins=Config.CORS_ORIGINS, supports_credentials=True)
+
+    # Schema changes are applied by `python manage.py migrate`; startup only
+    # checks the recorded version (or migrates itself with AUTO_MIGRATE).
+    if app.config.get('AUTO_MIGRATE'):
+        migrate(app.config)
+    check_schema_version(app.config)
+
+    # Anchor submissions left pending by a previous run without waiting for a submit.
+    if app.config.get('ANCHOR_ASYNC'):
+        with app.app_context():
+            get_anchor_worker().start()
 
     # Register route blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(submit_bp)
+    app.register_blueprint(upload_bp)
     app.register_blueprint(verify_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(metrics_bp)
+
+    # Request latency histograms for /api/metrics
+    if app.config.get('METRICS_ENABLED'):
+        install_request_metrics(app)
+
+    # Reads after a client's own write go to the primary (DB_REPLICAS)
+    install_read_routing(app)
+
+    # Sampled / X-Profile requests get a phase breakdown; slow ones dump a cProfile
+    install_profiling(app)
 
     # --- Centralized error handlers ---
 
@@ -52,6 +92,44 @@ def create_app():
             'message': f'Maximum file size is {max_mb} MB',
         }), 413
 
+    @app.errorhandler(PoolTimeoutError)
+    def database_busy(e):
+        app.logger.warning('Database pool exhausted: %s', e)
+        return jsonify({
+            'error': 'Service busy',
+            'message': 'Database is busy, please retry shortly',
+        }), 503, {'Retry-After': '1'}
+
+    @app.errorhandler(AnchorTimeoutError)
+    def anchoring_busy(e):
+        app.logger.warning('Anchoring timed out: %s', e)
+        if e.submission_id is None:
+            return jsonify({
+                'error': 'Service busy',
+                'message': 'Anchoring is backed up; the file was not submitted, please retry',
+            }), 503, {'Retry-After': '1'}
+        return jsonify({
+            'error': 'Service busy',
+            'message': 'Anchoring is backed up; check the submission status before retrying',
+            'submission_id': e.submission_id,
+            'status_url': url_for('submit.submission_status', submission_id=e.submission_id),
+        }), 503, {'Retry-After': '1'}
+
+    @app.errorhandler(HasherBusyError)
+    def auth_busy(e):
+        app.logger.warning('Password hashing queue full: %s', e)
+        return jsonify({
+            'error': 'Service busy',
+            'message': 'Too many sign-in attempts right now, please retry shortly',
+        }), 503, {'Retry-After': '1'}
+
+    @app.errorhandler(AdmissionRejected)
+    def upload_overloaded(e):
+        return jsonify({
+            'error': 'Too many requests' if e.status_code == 429 else 'Service busy',
+            'message': f'{e}, please retry in {e.retry_after}s',
+        }), e.status_code, {'Retry-After': str(e.retry_after)}
+
     @app.errorhandler(500)
     def internal_error(e):
         return jsonify({'error': 'Internal server error'}), 500
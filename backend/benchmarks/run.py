@@ -0,0 +1,346 @@
+"""Load and micro-benchmarks for the HashVault backend.
+
+Drives ``create_app()`` in-process through Flask's test client, so results
+cover the full request path (routing, multipart spooling, hashing, blob
+store, anchoring) without network noise.
+
+Usage (from ``backend/``):
+    python -m benchmarks.run [--db memory|mysql|sqlite] [--sizes 1,64,1024]
+                             [--concurrency 1,4,16] [--requests 200]
+                             [--only submit,verify,list,login,micro]
+                             [--output FILE] [--compare BASELINE.json]
+
+``--db memory`` (the default) swaps db_utils for an in-memory stand-in;
+``--db mysql`` uses the database configured in ``.env`` and writes real
+rows into it; ``--db sqlite`` migrates a throwaway SQLite file. Results are written as JSON to ``benchmarks/results/`` so
+runs can be compared with ``--compare``.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+BENCH_PASSWORD = 'bench-password'
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _summarize(latencies: list[float], elapsed: float, errors: int) -> dict:
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(_percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(_percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(_percentile(latencies, 0.99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+def run_load(app, make_request, concurrency: int, total: int) -> dict:
+    """Issue ``total`` requests from ``concurrency`` threads and time each.
+
+    ``make_request(client, n)`` sends request number ``n`` and returns the
+    response; any status >= 400 counts as an error.
+    """
+    per_worker = [total // concurrency + (1 if i < total % concurrency else 0)
+                  for i in range(concurrency)]
+
+    def worker(index: int) -> tuple[list[float], int]:
+        client = app.test_client()
+        first = sum(per_worker[:index])
+        latencies = []
+        errors = 0
+        for n in range(first, first + per_worker[index]):
+            started = time.perf_counter()
+            response = make_request(client, n)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return _summarize(
+        [latency for latencies, _errors in outcomes for latency in latencies],
+        elapsed,
+        sum(errors for _latencies, errors in outcomes),
+    )
+
+
+def run_micro(func, min_time: float = 0.5) -> dict:
+    """Call ``func`` repeatedly for at least ``min_time`` seconds."""
+    iterations = 0
+    batch = 1
+    started = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            func()
+        iterations += batch
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        batch *= 2
+    return {
+        'iterations': iterations,
+        'ops_per_sec': round(iterations / elapsed, 2),
+        'ns_per_op': round(elapsed / iterations * 1e9, 1),
+    }
+
+
+# --------------- Scenarios ---------------
+
+def _payloads(size: int, count: int) -> list[bytes]:
+    # Distinct random contents, so the blob store never deduplicates.
+    return [os.urandom(size) for _ in range(count)]
+
+
+def bench_submit(app, size: int, concurrency: int, total: int) -> dict:
+    payloads = _payloads(size, total)
+
+    def request(client, n):
+        return client.post('/api/submit', data={
+            'file': (io.BytesIO(payloads[n]), 'bench.zip'),
+        }, content_type='multipart/form-data')
+
+    return run_load(app, request, concurrency, total)
+
+
+def bench_verify(app, size: int, concurrency: int, total: int) -> dict:
+    payload = _payloads(size, 1)[0]
+    response = app.test_client().post('/api/submit', data={
+        'file': (io.BytesIO(payload), 'bench.zip'),
+    }, content_type='multipart/form-data')
+    submission_id = response.get_json()['submission_id']
+
+    def request(client, n):
+        return client.post('/api/verify', data={
+            'file': (io.BytesIO(payload), 'bench.zip'),
+            'submission_id': submission_id,
+        }, content_type='multipart/form-data')
+
+    return run_load(app, request, concurrency, total)
+
+
+def bench_list(app, concurrency: int, total: int, page_size: int = 50) -> dict:
+    def request(client, n):
+        return client.get(f'/api/submissions?limit={page_size}')
+
+    return run_load(app, request, concurrency, total)
+
+
+def bench_login(app, concurrency: int, total: int) -> dict:
+    username = f'bench{os.urandom(4).hex()}'
+    app.test_client().post('/api/auth/signup', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': BENCH_PASSWORD,
+    })
+
+    def request(client, n):
+        return client.post('/api/auth/login', json={
+            'username': username,
+            'password': BENCH_PASSWORD,
+        })
+
+    return run_load(app, request, concurrency, total)
+
+
+def micro_benchmarks(sizes: list[int]) -> list[dict]:
+    from utils.db_utils import _build_anchor_hash, _to_api_timestamp
+    from utils.hash_utils import generate_hash_from_stream
+
+    results = []
+    for size in sizes:
+        stream = io.BytesIO(os.urandom(size))
+        stats = run_micro(lambda: generate_hash_from_stream(stream))
+        stats['mb_per_sec'] = round(stats['ops_per_sec'] * size / (1024 * 1024), 2)
+        results.append({'name': 'generate_hash_from_stream', 'params': {'size': size}, **stats})
+
+    anchored_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    results.append({
+        'name': '_build_anchor_hash',
+        'params': {},
+        **run_micro(lambda: _build_anchor_hash(
+            1234567, 'HV-0123456789AB', 'ab' * 32, anchored_at, 'cd' * 32,
+        )),
+    })
+    timestamp = datetime.now(timezone.utc) - timedelta(days=1)
+    results.append({
+        'name': '_to_api_timestamp',
+        'params': {},
+        **run_micro(lambda: _to_api_timestamp(timestamp)),
+    })
+    return results
+
+
+# --------------- Setup, output, comparison ---------------
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_app(db: str, blob_dir: str, bcrypt_rounds: int | None):
+    os.environ['BLOB_STORAGE_DIR'] = blob_dir
+    if db == 'sqlite':
+        os.environ['DB_ENGINE'] = 'sqlite'
+        os.environ['SQLITE_PATH'] = os.path.join(blob_dir, 'bench.db')
+        os.environ['AUTO_MIGRATE'] = 'True'
+    from app import create_app
+
+    if db == 'memory':
+        from benchmarks.memory_db import MemoryDatabase, install
+
+        install(MemoryDatabase())
+
+    app = create_app()
+    if db == 'memory':
+        app.config['ANCHOR_MODE'] = 'chain'  # the stand-in has no Merkle batches
+    if bcrypt_rounds is not None:
+        app.config['BCRYPT_ROUNDS'] = bcrypt_rounds
+    # Every request comes from one client; measure the endpoints, not the admission limits.
+    for key in app.config:
+        if key.startswith('ADMISSION_'):
+            app.config[key] = 0
+    return app
+
+
+def _key(result: dict) -> str:
+    params = ','.join(f'{k}={v}' for k, v in sorted(result.get('params', {}).items()))
+    return f"{result['name']}[{params}]"
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """Print the change of each benchmark against a previous run."""
+    before = {_key(result): result for result in baseline.get('results', [])}
+    print(f"\nCompared with {baseline.get('meta', {}).get('git_commit') or 'baseline'}:")
+    for result in current['results']:
+        old = before.get(_key(result))
+        if not old:
+            continue
+        metric = 'throughput_rps' if 'throughput_rps' in result else 'ops_per_sec'
+        if not old.get(metric):
+            continue
+        change = (result[metric] / old[metric] - 1) * 100
+        line = f"  {_key(result):60s} {metric} {old[metric]:>12} -> {result[metric]:>12} ({change:+.1f}%)"
+        if 'latency_ms' in result and 'latency_ms' in old:
+            line += f"  p99 {old['latency_ms']['p99']} -> {result['latency_ms']['p99']} ms"
+        print(line)
+
+
+def _parse_ints(value: str) -> list[int]:
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='HashVault benchmarks')
+    parser.add_argument('--db', choices=('memory', 'mysql', 'sqlite'), default='memory')
+    parser.add_argument('--sizes', default='1,64,1024', help='file sizes in KiB')
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario and level')
+    parser.add_argument('--only', default='submit,verify,list,login,micro')
+    parser.add_argument('--bcrypt-rounds', type=int, default=None,
+                        help='override BCRYPT_ROUNDS for the login scenario')
+    parser.add_argument('--output', help='result file (default: benchmarks/results/<time>.json)')
+    parser.add_argument('--compare', help='previous result file to compare against')
+    args = parser.parse_args(argv)
+
+    sizes = [size * 1024 for size in _parse_ints(args.sizes)]
+    levels = _parse_ints(args.concurrency)
+    only = set(args.only.split(','))
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    blob_dir = tempfile.mkdtemp(prefix='hashvault-bench-')
+    results = []
+    try:
+        app = build_app(args.db, blob_dir, args.bcrypt_rounds)
+
+        def record(name: str, params: dict, stats: dict) -> None:
+            results.append({'name': name, 'params': params, **stats})
+            line = f"{name:28s} {json.dumps(params):40s} "
+            if 'latency_ms' in stats:
+                line += (f"{stats['throughput_rps']:>10} req/s  p99 {stats['latency_ms']['p99']} ms"
+                         f"  errors {stats['errors']}")
+            else:
+                line += f"{stats['ops_per_sec']:>10} op/s"
+            print(line, flush=True)
+
+        for concurrency in levels:
+            for size in sizes:
+                if 'submit' in only:
+                    record('submit', {'size': size, 'concurrency': concurrency},
+                           bench_submit(app, size, concurrency, args.requests))
+                if 'verify' in only:
+                    record('verify', {'size': size, 'concurrency': concurrency},
+                           bench_verify(app, size, concurrency, args.requests))
+            if 'list' in only:
+                record('list', {'concurrency': concurrency},
+                       bench_list(app, concurrency, args.requests))
+            if 'login' in only:
+                record('login', {'concurrency': concurrency},
+                       bench_login(app, concurrency, args.requests))
+        if 'micro' in only:
+            for result in micro_benchmarks(sizes):
+                record(result.pop('name'), result.pop('params'), result)
+    finally:
+        shutil.rmtree(blob_dir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'started_at': started_at,
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'db': args.db,
+            'requests_per_level': args.requests,
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json'
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as fileobj:
+        json.dump(report, fileobj, indent=2)
+    print(f'\nResults written to {output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fileobj:
+            compare(json.load(fileobj), report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,12 +16,25 @@ CREATE TABLE IF NOT EXISTS submissions (
     filename VARCHAR(255) NULL,
     content_type VARCHAR(255) NULL,
     file_size BIGINT NULL,
-    file_blob LONGBLOB NULL,
-    file_hash CHAR(64) NOT NULL,
+    file_blob LONGBLOB NULL,           -- legacy rows only; new blobs live in the blob store
+    blob_ref VARCHAR(255) NULL,
+    file_hash CHAR(64) NOT NULL,       -- SHA-256, or Merkle root for tree-hash submissions
+    hash_algorithm VARCHAR(32) NOT NULL DEFAULT 'sha256',  -- sha256 | sha256-tree:<leaf bytes>
+    leaf_hashes MEDIUMTEXT NULL,       -- JSON leaf digests (tree-hash only)
+    file_sha256 CHAR(64) NULL,         -- flat SHA-256 of the file whatever hash_algorithm is
     timestamp DATETIME(6) NOT NULL,
-    anchored_at DATETIME(6) NOT NULL,
-    anchor_hash CHAR(64) NOT NULL UNIQUE,
-    prev_anchor_hash CHAR(64) NULL
+    status VARCHAR(16) NOT NULL DEFAULT 'anchored',  -- pending until the anchor worker runs (ANCHOR_ASYNC)
+    anchored_at DATETIME(6) NULL,
+    anchor_hash CHAR(64) NULL,
+    prev_anchor_hash CHAR(64) NULL,
+    merkle_root CHAR(64) NULL,
+    merkle_leaf_index INT NULL,
+    merkle_proof TEXT NULL,
+    INDEX idx_submissions_anchor_hash (anchor_hash),
+    INDEX idx_submissions_timestamp_id (timestamp, id),
+    INDEX idx_submissions_file_hash (file_hash),
+    INDEX idx_submissions_status_id (status, id),
+    INDEX idx_submissions_file_sha256 (file_sha256)
 );
 
 CREATE TABLE IF NOT EXISTS anchors (
@@ -31,5 +44,43 @@ CREATE TABLE IF NOT EXISTS anchors (
     file_hash CHAR(64) NOT NULL,
     anchored_at DATETIME(6) NOT NULL,
     prev_anchor_hash CHAR(64) NULL,
-    anchor_hash CHAR(64) NOT NULL UNIQUE
+    anchor_hash CHAR(64) NOT NULL UNIQUE,
+    batch_size INT NULL
+);
+
+CREATE TABLE IF NOT EXISTS audit_checkpoints (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    block_index BIGINT NOT NULL,
+    anchor_hash CHAR(64) NOT NULL,
+    blocks_verified BIGINT NOT NULL,
+    verified_at DATETIME(6) NOT NULL,
+    signature CHAR(64) NOT NULL
+);
+
+-- One row per distinct stored blob; ref_count is maintained when submissions are anchored.
+CREATE TABLE IF NOT EXISTS blobs (
+    blob_ref VARCHAR(255) PRIMARY KEY,
+    file_size BIGINT NULL,
+    ref_count INT NOT NULL DEFAULT 0,
+    created_at DATETIME(6) NOT NULL,
+    last_referenced_at DATETIME(6) NOT NULL
 );
+
+-- Applied migrations (see utils/migrations.py). A database created from this
+-- file is already at the latest version.
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at DATETIME(6) NOT NULL
+);
+
+INSERT IGNORE INTO schema_version (version, name, applied_at) VALUES
+    (1, 'create core tables', CURRENT_TIMESTAMP(6)),
+    (2, 'add submissions.blob_ref', CURRENT_TIMESTAMP(6)),
+    (3, 'add merkle anchoring columns', CURRENT_TIMESTAMP(6)),
+    (4, 'add submission lookup indexes', CURRENT_TIMESTAMP(6)),
+    (5, 'create audit_checkpoints', CURRENT_TIMESTAMP(6)),
+    (6, 'add submissions.hash_algorithm', CURRENT_TIMESTAMP(6)),
+    (7, 'create blobs', CURRENT_TIMESTAMP(6)),
+    (8, 'add submissions.status', CURRENT_TIMESTAMP(6)),
+    (9, 'add submissions.file_sha256', CURRENT_TIMESTAMP(6));
@@ -0,0 +1,67 @@
+-- SQLite schema (DB_ENGINE=sqlite), equivalent to schema.sql at the latest
+-- migration. Applied by `python manage.py migrate`, which also records the
+-- migration versions; see utils/migrations.py.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username VARCHAR(100) NOT NULL UNIQUE,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    password_hash VARCHAR(255) NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    submission_id VARCHAR(100) NOT NULL UNIQUE,
+    filename VARCHAR(255) NULL,
+    content_type VARCHAR(255) NULL,
+    file_size BIGINT NULL,
+    file_blob BLOB NULL,               -- legacy rows only; never written
+    blob_ref VARCHAR(255) NULL,
+    file_hash CHAR(64) NOT NULL,
+    hash_algorithm VARCHAR(32) NOT NULL DEFAULT 'sha256',
+    leaf_hashes TEXT NULL,
+    file_sha256 CHAR(64) NULL,
+    timestamp DATETIME NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'anchored',
+    anchored_at DATETIME NULL,
+    anchor_hash CHAR(64) NULL,
+    prev_anchor_hash CHAR(64) NULL,
+    merkle_root CHAR(64) NULL,
+    merkle_leaf_index INT NULL,
+    merkle_proof TEXT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_submissions_anchor_hash ON submissions (anchor_hash);
+CREATE INDEX IF NOT EXISTS idx_submissions_timestamp_id ON submissions (timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_submissions_file_hash ON submissions (file_hash);
+CREATE INDEX IF NOT EXISTS idx_submissions_status_id ON submissions (status, id);
+CREATE INDEX IF NOT EXISTS idx_submissions_file_sha256 ON submissions (file_sha256);
+
+CREATE TABLE IF NOT EXISTS anchors (
+    id INTEGER PRIMARY KEY,
+    block_index BIGINT NOT NULL UNIQUE,
+    submission_id VARCHAR(100) NOT NULL UNIQUE,
+    file_hash CHAR(64) NOT NULL,
+    anchored_at DATETIME NOT NULL,
+    prev_anchor_hash CHAR(64) NULL,
+    anchor_hash CHAR(64) NOT NULL UNIQUE,
+    batch_size INT NULL
+);
+
+CREATE TABLE IF NOT EXISTS audit_checkpoints (
+    id INTEGER PRIMARY KEY,
+    block_index BIGINT NOT NULL,
+    anchor_hash CHAR(64) NOT NULL,
+    blocks_verified BIGINT NOT NULL,
+    verified_at DATETIME NOT NULL,
+    signature CHAR(64) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS blobs (
+    blob_ref VARCHAR(255) PRIMARY KEY,
+    file_size BIGINT NULL,
+    ref_count INT NOT NULL DEFAULT 0,
+    created_at DATETIME NOT NULL,
+    last_referenced_at DATETIME NOT NULL
+);
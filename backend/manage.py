@@ -0,0 +1,119 @@
+"""Operational commands for the HashVault backend.
+
+Usage:
+    python manage.py migrate [--target VERSION] [--status]
+    python manage.py audit [--full] [--workers N] [--segment-size N]
+    python manage.py gc-uploads
+    python manage.py reclaim-blobs [--dry-run] [--grace-hours H]
+"""
+
+import argparse
+import json
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import Config
+from utils.blob_reclaimer import reclaim_unreferenced_blobs
+from utils.blob_store import create_blob_store
+from utils.chain_audit import AuditProgress, run_audit
+from utils.migrations import LATEST_VERSION, MIGRATIONS, get_schema_version, migrate
+from utils.upload_sessions import create_upload_session_store
+
+
+def load_config() -> dict:
+    """Collect the upper-case settings of ``Config`` into a plain dict."""
+    return {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+
+
+def _print_audit_progress(state: dict) -> None:
+    if state.get('status') != 'running':
+        return
+    print(
+        f"\r  checked {state.get('blocks_checked', 0)} blocks "
+        f"(through #{state.get('verified_through', state.get('start_block', 1) - 1)}"
+        f" of #{state.get('tip_block', 0)})",
+        end='', file=sys.stderr, flush=True,
+    )
+
+
+def cmd_migrate(args, config: dict) -> int:
+    """Apply pending schema migrations, or report the current version."""
+    if args.status:
+        version = get_schema_version(config)
+        print(f"Schema version {version} (latest {LATEST_VERSION})")
+        for number, name, _func in MIGRATIONS:
+            print(f"  [{'x' if number <= version else ' '}] {number:3d}  {name}")
+        return 0 if version >= LATEST_VERSION else 1
+
+    applied = migrate(config, target=args.target)
+    for number, name in applied:
+        print(f"Applied {number}: {name}")
+    if not applied:
+        print('Schema is up to date')
+    return 0
+
+
+def cmd_audit(args, config: dict) -> int:
+    """Verify the anchor chain from the last signed checkpoint (or genesis)."""
+    result = run_audit(
+        config,
+        full=args.full,
+        progress=AuditProgress(on_update=_print_audit_progress),
+        workers=args.workers,
+        segment_size=args.segment_size,
+    )
+    print(file=sys.stderr)
+    print(json.dumps(result, indent=2, default=str))
+    return 0 if result.get('status') == 'ok' else 1
+
+
+def cmd_gc_uploads(args, config: dict) -> int:
+    """Delete resumable upload sessions idle for longer than UPLOAD_SESSION_TTL."""
+    removed = create_upload_session_store(config).collect_garbage()
+    print(f"Removed {removed} abandoned upload session(s)")
+    return 0
+
+
+def cmd_reclaim_blobs(args, config: dict) -> int:
+    """Delete blobs that no submission references once past the grace period."""
+    grace = args.grace_hours * 3600 if args.grace_hours is not None else config['BLOB_RECLAIM_GRACE']
+    result = reclaim_unreferenced_blobs(
+        config, create_blob_store(config), grace_seconds=grace, dry_run=args.dry_run
+    )
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='HashVault backend management commands')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate_cmd = subparsers.add_parser('migrate', help='apply pending schema migrations')
+    migrate_cmd.add_argument('--target', type=int, default=None, help='stop after this version')
+    migrate_cmd.add_argument('--status', action='store_true', help='show applied migrations and exit')
+    migrate_cmd.set_defaults(handler=cmd_migrate)
+
+    audit = subparsers.add_parser('audit', help='verify the anchor chain')
+    audit.add_argument('--full', action='store_true', help='ignore checkpoints and verify every block')
+    audit.add_argument('--workers', type=int, default=None, help='worker processes (default: AUDIT_WORKERS)')
+    audit.add_argument('--segment-size', type=int, default=None, help='blocks per worker task')
+    audit.set_defaults(handler=cmd_audit)
+
+    gc_uploads = subparsers.add_parser('gc-uploads', help='delete abandoned resumable uploads')
+    gc_uploads.set_defaults(handler=cmd_gc_uploads)
+
+    reclaim = subparsers.add_parser('reclaim-blobs', help='delete unreferenced blobs')
+    reclaim.add_argument('--dry-run', action='store_true', help='report without deleting')
+    reclaim.add_argument('--grace-hours', type=float, default=None,
+                         help='minimum age of deleted blobs (default: BLOB_RECLAIM_GRACE_HOURS)')
+    reclaim.set_defaults(handler=cmd_reclaim_blobs)
+
+    args = parser.parse_args(argv)
+    return args.handler(args, load_config())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
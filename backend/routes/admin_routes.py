@@ -0,0 +1,57 @@
+"""Admin routes — chain audit and runtime stats."""
+
+from flask import Blueprint, current_app, jsonify, request
+
+from utils.admission import get_admission_stats
+from utils.auth_middleware import admin_required, get_auth_cache_stats
+from utils.chain_audit import get_audit_progress, start_background_audit
+from utils.db_utils import get_blob_stats_mysql, get_pool_stats, get_replica_stats
+from utils.password_hasher import get_password_hasher
+from utils.storage import (
+    get_anchor_sequencer,
+    get_anchor_worker,
+    get_submission_cache_stats,
+    get_upload_sessions,
+)
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.route('/api/admin/audit', methods=['POST'])
+@admin_required
+def start_audit():
+    """Start a background audit of the anchor chain.
+
+    Expects optional JSON: { full: bool }  (ignore checkpoints)
+    Returns: current audit progress
+    """
+    data = request.get_json(silent=True) or {}
+    started = start_background_audit(current_app.config, full=bool(data.get('full')))
+    if not started:
+        return jsonify({'error': 'An audit is already running', 'audit': get_audit_progress()}), 409
+    return jsonify({'message': 'Audit started', 'audit': get_audit_progress()}), 202
+
+
+@admin_bp.route('/api/admin/audit', methods=['GET'])
+@admin_required
+def audit_status():
+    """Return progress of the current or last audit, including the first broken block."""
+    return jsonify({'audit': get_audit_progress()}), 200
+
+
+@admin_bp.route('/api/admin/stats', methods=['GET'])
+@admin_required
+def runtime_stats():
+    """Return per-process pool, anchoring, hashing, cache and upload statistics."""
+    return jsonify({
+        'admission': get_admission_stats(),
+        'db_pool': get_pool_stats(current_app.config),
+        'db_replicas': get_replica_stats(current_app.config),
+        'anchor_sequencer': get_anchor_sequencer().stats(),
+        'anchor_worker': get_anchor_worker().stats() if current_app.config.get('ANCHOR_ASYNC') else None,
+        'auth_cache': get_auth_cache_stats(),
+        'submission_cache': get_submission_cache_stats(),
+        'upload_sessions': get_upload_sessions().stats(),
+        'blob_storage': get_blob_stats_mysql(current_app.config),
+        'password_hasher': get_password_hasher().stats(),
+    }), 200
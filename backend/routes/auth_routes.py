@@ -2,16 +2,17 @@
 
 from datetime import datetime, timezone, timedelta
 
-import bcrypt
 import jwt
 from flask import Blueprint, current_app, g, jsonify, request
 
-from utils.auth_middleware import auth_required
+from utils.auth_middleware import auth_required, invalidate_user
 from utils.db_utils import (
     create_user_mysql,
     get_user_by_email_mysql,
     get_user_by_username_mysql,
 )
+from utils.db_routing import note_write
+from utils.password_hasher import get_password_hasher
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -61,8 +62,10 @@ def signup():
         return jsonify({'error': 'Email already registered'}), 409
 
     # --- Hash password & create user ---
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    password_hash = get_password_hasher().hash_password(password)
     user = create_user_mysql(config, username=username, email=email, password_hash=password_hash)
+    note_write()
+    invalidate_user(user['id'])
 
     token = _generate_token(user['id'])
 
@@ -104,7 +107,7 @@ def login():
         return jsonify({'error': 'Invalid credentials'}), 401
 
     # Verify password
-    if not bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
+    if not get_password_hasher().check_password(password, user['password_hash']):
         return jsonify({'error': 'Invalid credentials'}), 401
 
     token = _generate_token(user['id'])
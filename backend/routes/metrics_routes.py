@@ -0,0 +1,29 @@
+"""Metrics route — Prometheus scrape endpoint."""
+
+import hmac
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from utils.metrics import REGISTRY
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Return this process's metrics in the Prometheus text format.
+
+    Disabled (404) unless ``METRICS_ENABLED``. With ``METRICS_TOKEN`` set,
+    scrapers must send ``Authorization: Bearer <token>``.
+    """
+    config = current_app.config
+    if not config.get('METRICS_ENABLED', True):
+        return jsonify({'error': 'Metrics are disabled'}), 404
+
+    expected = config.get('METRICS_TOKEN') or ''
+    if expected:
+        provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(provided.encode('utf-8'), expected.encode('utf-8')):
+            return jsonify({'error': 'Invalid metrics token'}), 401
+
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -1,13 +1,40 @@
+import base64
 from datetime import datetime, timezone
 
-from flask import Blueprint, current_app, jsonify, request
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    send_file,
+    stream_with_context,
+    url_for,
+)
 from werkzeug.utils import secure_filename
 
-from utils.hash_utils import generate_hash_from_stream, generate_submission_id
-from utils.storage import get_all_submissions, save_submission
+from utils.admission import admission_controlled
+from utils.auth_middleware import auth_required
+from utils.hash_utils import generate_submission_id, is_sha256_hex
+from utils.metrics import UPLOAD_SIZE
+from utils.profiling import phase
+from utils.storage import (
+    fingerprint_blob,
+    get_submission,
+    get_submission_proof,
+    get_submission_status,
+    get_submissions_by_hash,
+    get_submissions_page,
+    iter_all_submissions,
+    resolve_submission_blob,
+    save_submission,
+)
+from utils.upload_stream import spooled_tree_fingerprint, store_uploaded_file
 
 submit_bp = Blueprint('submit', __name__)
 
+LIST_FILTERS = ('file_hash', 'content_type', 'filename', 'since', 'until')
+
 
 def _allowed_file(filename: str) -> bool:
     """Check if a filename has an allowed extension."""
@@ -16,13 +43,67 @@ def _allowed_file(filename: str) -> bool:
     )
 
 
+def _encode_cursor(position: tuple) -> str:
+    """Encode a ``(timestamp, id)`` keyset position as an opaque token."""
+    timestamp, row_id = position
+    raw = f"{timestamp.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(token: str) -> tuple:
+    """Decode a token from ``_encode_cursor``; raises ValueError if malformed."""
+    padded = token + '=' * (-len(token) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+    except (UnicodeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+    timestamp, _, row_id = raw.partition('|')
+    return datetime.fromisoformat(timestamp), int(row_id)
+
+
+def _submission_receipt(submission: dict) -> dict:
+    """Response body returned once a submission has been stored (and anchored)."""
+    pending = submission.get('status') == 'pending'
+    return {
+        'message': 'File stored; anchoring is pending' if pending else 'File submitted successfully',
+        'submission_id': submission['submission_id'],
+        'status': submission.get('status', 'anchored'),
+        'filename': submission.get('filename'),
+        'content_type': submission.get('content_type'),
+        'file_size': submission.get('file_size'),
+        'file_hash': submission['file_hash'],
+        'hash_algorithm': submission.get('hash_algorithm', 'sha256'),
+        'file_sha256': submission.get('file_sha256'),
+        'timestamp': submission['timestamp'],
+        'blockchain_anchor': {
+            'anchored_at': submission.get('anchored_at'),
+            'anchor_hash': submission.get('anchor_hash'),
+            'previous_anchor_hash': submission.get('prev_anchor_hash'),
+            'merkle_root': submission.get('merkle_root'),
+        },
+    }
+
+
+def _receipt_response(submission: dict):
+    """``201`` with the receipt, or ``202`` plus a status URL while anchoring is pending."""
+    body = _submission_receipt(submission)
+    if submission.get('status') != 'pending':
+        return jsonify(body), 201
+    body['status_url'] = url_for('submit.submission_status',
+                                 submission_id=submission['submission_id'])
+    return jsonify(body), 202
+
+
 @submit_bp.route('/api/submit', methods=['POST'])
+@admission_controlled('submit')
 def submit_file():
-    """Submit a file and store its blob + hash + anchor metadata in DB."""
-    if 'file' not in request.files:
+    """Submit a file, store its blob and save hash + anchor metadata in DB."""
+    with phase('parse'):  # Werkzeug parses and spools the multipart body on first access
+        files = request.files
+    if 'file' not in files:
         return jsonify({'error': 'No file provided'}), 400
 
-    file = request.files['file']
+    file = files['file']
     if file.filename == '' or file.filename is None:
         return jsonify({'error': 'No file selected'}), 400
 
@@ -31,13 +112,17 @@ def submit_file():
 
     safe_name = secure_filename(file.filename) or 'uploaded_file'
 
-    # Pure in-memory handling: no local file persistence.
-    file_hash = generate_hash_from_stream(file.stream)
-    file.stream.seek(0)
-    file_bytes = file.stream.read()
+    # The upload was hashed while it was spooled; storing it is a rename.
+    with phase('store'):
+        blob_ref, file_sha256, file_size = store_uploaded_file(
+            file, chunk_size=current_app.config['UPLOAD_CHUNK_SIZE']
+        )
+    UPLOAD_SIZE.observe(file_size, 'submit')
 
-    if not isinstance(file_bytes, (bytes, bytearray)):
-        return jsonify({'error': 'Failed to read uploaded file'}), 400
+    with phase('fingerprint'):
+        hash_algorithm, file_hash, leaf_hashes = fingerprint_blob(
+            blob_ref, file_sha256, spooled_tree_fingerprint(file)
+        )
     submission_id = generate_submission_id()
     timestamp = datetime.now(timezone.utc).isoformat()
 
@@ -47,27 +132,148 @@ def submit_file():
         timestamp=timestamp,
         filename=safe_name,
         content_type=(file.mimetype or 'application/octet-stream'),
-        file_bytes=file_bytes,
+        file_size=file_size,
+        blob_ref=blob_ref,
+        hash_algorithm=hash_algorithm,
+        leaf_hashes=leaf_hashes,
+        file_sha256=file_sha256,
     )
 
-    return jsonify({
-        'message': 'File submitted successfully',
-        'submission_id': submission['submission_id'],
-        'filename': submission.get('filename'),
-        'content_type': submission.get('content_type'),
-        'file_size': submission.get('file_size'),
-        'file_hash': submission['file_hash'],
-        'timestamp': submission['timestamp'],
-        'blockchain_anchor': {
-            'anchored_at': submission.get('anchored_at'),
-            'anchor_hash': submission.get('anchor_hash'),
-            'previous_anchor_hash': submission.get('prev_anchor_hash'),
-        },
-    }), 201
+    with phase('serialize'):
+        return _receipt_response(submission)
 
 
 @submit_bp.route('/api/submissions', methods=['GET'])
 def list_submissions():
-    """List all submission hash records (newest first)."""
-    submissions = get_all_submissions()
-    return jsonify({'count': len(submissions), 'submissions': submissions}), 200
+    """List submission hash records, newest first.
+
+    Query params:
+        limit: page size (default SUBMISSIONS_PAGE_SIZE, max SUBMISSIONS_PAGE_MAX)
+        after: ``next_cursor`` from the previous page
+        file_hash, content_type, filename (prefix), since, until (ISO 8601)
+        format: ``ndjson`` streams every matching record, one JSON per line
+    """
+    config = current_app.config
+    filters = {key: request.args[key] for key in LIST_FILTERS if request.args.get(key)}
+
+    try:
+        after = _decode_cursor(request.args['after']) if request.args.get('after') else None
+        for key in ('since', 'until'):
+            if key in filters:
+                datetime.fromisoformat(filters[key].replace('Z', '+00:00'))
+        limit = int(request.args.get('limit', config['SUBMISSIONS_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit, cursor or timestamp filter'}), 400
+    limit = max(1, min(limit, config['SUBMISSIONS_PAGE_MAX']))
+
+    if request.args.get('format') == 'ndjson':
+        def generate():
+            for submission in iter_all_submissions(after=after, filters=filters):
+                yield current_app.json.dumps(submission) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    submissions, next_position = get_submissions_page(limit, after=after, filters=filters)
+    return jsonify({
+        'count': len(submissions),
+        'submissions': submissions,
+        'next_cursor': _encode_cursor(next_position) if next_position else None,
+    }), 200
+
+
+@submit_bp.route('/api/submissions/<submission_id>/proof', methods=['GET'])
+def submission_proof(submission_id):
+    """Return the inclusion proof linking a submission to its anchor block."""
+    proof = get_submission_proof(submission_id)
+    if not proof:
+        submission = get_submission(submission_id)
+        if submission and submission.get('status') == 'pending':
+            return jsonify({
+                'error': f'Submission is not anchored yet: {submission_id}',
+                'status': 'pending',
+            }), 409
+        return jsonify({'error': f'Submission not found: {submission_id}'}), 404
+    return jsonify(proof), 200
+
+
+@submit_bp.route('/api/submissions/<submission_id>/status', methods=['GET'])
+def submission_status(submission_id):
+    """Return a submission's anchoring status and anchor.
+
+    Query params:
+        wait: seconds to long-poll while the submission is pending
+              (capped at ANCHOR_STATUS_MAX_WAIT)
+    """
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    wait = max(0.0, min(wait, current_app.config['ANCHOR_STATUS_MAX_WAIT']))
+
+    submission = get_submission_status(submission_id, wait=wait)
+    if not submission:
+        return jsonify({'error': f'Submission not found: {submission_id}'}), 404
+    body = _submission_receipt(submission)
+    del body['message']
+    return jsonify(body), 200
+
+
+@submit_bp.route('/api/submissions/<submission_id>/file', methods=['GET'])
+@auth_required
+def download_submission_file(submission_id):
+    """Download the stored file of a submission.
+
+    Supports ``Range`` requests and conditional requests; the ETag is the
+    file's SHA-256. Blobs on local disk are handed to the WSGI server's
+    file wrapper (``sendfile`` where available, or ``X-Sendfile`` with
+    ``USE_X_SENDFILE``); other backends are streamed in bounded chunks.
+    """
+    submission = get_submission(submission_id)
+    if not submission:
+        return jsonify({'error': f'Submission not found: {submission_id}'}), 404
+
+    store, key = resolve_submission_blob(submission)
+    options = {
+        'mimetype': submission.get('content_type') or 'application/octet-stream',
+        'as_attachment': True,
+        'download_name': submission.get('filename') or submission_id,
+        'etag': submission.get('file_sha256') or submission['file_hash'],
+    }
+    try:
+        path = store.local_path(key)
+        if path:
+            return send_file(path, conditional=True, **options)
+
+        # The recorded size avoids decompressing a compressed blob just to size it.
+        size = submission.get('file_size')
+        if size is None:
+            size = store.size(key)
+        fileobj = store.open(key)
+    except FileNotFoundError:
+        return jsonify({'error': f'Stored file is missing for submission: {submission_id}'}), 404
+
+    # send_file cannot size an arbitrary stream, so add it before evaluating
+    # Range / If-None-Match; the range wrapper seeks instead of reading ahead.
+    response = send_file(fileobj, conditional=False, **options)
+    response.content_length = size
+    return response.make_conditional(request, accept_ranges=True, complete_length=size)
+
+
+@submit_bp.route('/api/submissions/by-hash/<file_hash>', methods=['GET'])
+def submissions_by_hash(file_hash):
+    """Reverse lookup: which submissions contain a file with this SHA-256 hash.
+
+    Matches the flat SHA-256 of the file whatever the submission's
+    ``hash_algorithm``.
+    """
+    if not is_sha256_hex(file_hash):
+        return jsonify({'error': 'file_hash must be a 64-character hex SHA-256 digest'}), 400
+
+    submissions = get_submissions_by_hash(
+        file_hash.lower(), limit=current_app.config['SUBMISSIONS_PAGE_MAX']
+    )
+    return jsonify({
+        'file_hash': file_hash.lower(),
+        'count': len(submissions),
+        'submissions': submissions,
+    }), 200
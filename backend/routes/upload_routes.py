@@ -0,0 +1,234 @@
+"""Resumable upload routes — create a session, send byte ranges, finalize.
+
+Protocol:
+    POST   /api/uploads                 { filename, size, content_type?, sha256? }
+    PUT    /api/uploads/<id>            raw bytes, Content-Range: bytes <start>-<end>/<size>
+    GET    /api/uploads/<id>            current offset (where to resume)
+    POST   /api/uploads/<id>/complete   anchor the file, same response as /api/submit;
+                                        safe to retry until it succeeds
+    DELETE /api/uploads/<id>            abandon the upload
+"""
+
+import re
+from datetime import datetime, timezone
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.utils import secure_filename
+
+from routes.submit_routes import _allowed_file, _receipt_response
+from utils.admission import admission_controlled
+from utils.hash_utils import generate_submission_id, is_sha256_hex
+from utils.metrics import UPLOAD_SIZE
+from utils.profiling import phase
+from utils.storage import (
+    fingerprint_blob,
+    get_blob_store,
+    get_submission_status,
+    get_upload_sessions,
+    save_submission,
+)
+from utils.upload_sessions import (
+    UploadHashMismatch,
+    UploadNotFound,
+    UploadOffsetMismatch,
+    UploadSessionError,
+)
+
+upload_bp = Blueprint('upload', __name__)
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+def _session_state(session: dict) -> dict:
+    return {
+        'upload_id': session['upload_id'],
+        'filename': session['filename'],
+        'size': session['size'],
+        'offset': session['offset'],
+        'complete': session['offset'] >= session['size'],
+    }
+
+
+def _not_found(upload_id: str):
+    return jsonify({'error': f'Upload not found: {upload_id}'}), 404
+
+
+def _offset_conflict(offset: int):
+    return jsonify({
+        'error': 'Chunk does not start at the current upload offset',
+        'offset': offset,
+    }), 409
+
+
+@upload_bp.route('/api/uploads', methods=['POST'])
+def create_upload():
+    """Start a resumable upload.
+
+    Expects JSON: { filename, size, content_type?, sha256? }
+    Returns: { upload_id, offset, size, chunk_size, ... }
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Request body must be JSON'}), 400
+
+    filename = data.get('filename') or ''
+    expected_hash = (data.get('sha256') or '').strip().lower() or None
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size must be an integer number of bytes'}), 400
+
+    config = current_app.config
+    if not filename:
+        return jsonify({'error': 'No filename provided'}), 400
+    if not _allowed_file(filename):
+        return jsonify({'error': 'File type not allowed'}), 400
+    if size < 0 or size > config['MAX_CONTENT_LENGTH']:
+        max_mb = config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+        return jsonify({'error': f'File size must be between 0 and {max_mb} MB'}), 400
+    if expected_hash and not is_sha256_hex(expected_hash):
+        return jsonify({'error': 'sha256 must be 64 hex characters'}), 400
+
+    sessions = get_upload_sessions()
+    sessions.maybe_collect_garbage()
+    session = sessions.create(
+        filename=secure_filename(filename) or 'uploaded_file',
+        content_type=data.get('content_type') or 'application/octet-stream',
+        size=size,
+        expected_hash=expected_hash,
+    )
+    return jsonify(dict(
+        _session_state(session),
+        chunk_size=config['UPLOAD_SESSION_CHUNK_SIZE'],
+        expires_after_seconds=int(sessions.ttl),
+    )), 201
+
+
+@upload_bp.route('/api/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Return how many bytes have been received, i.e. where to resume."""
+    try:
+        session = get_upload_sessions().get(upload_id)
+    except UploadNotFound:
+        return _not_found(upload_id)
+    return jsonify(_session_state(session)), 200
+
+
+@upload_bp.route('/api/uploads/<upload_id>', methods=['PUT'])
+@admission_controlled('upload')
+def upload_chunk(upload_id):
+    """Append one byte range to an upload.
+
+    Expects the raw chunk as the body and
+    ``Content-Range: bytes <start>-<end>/<size>`` (``end`` inclusive).
+    A chunk that does not start at the current offset gets a 409 carrying
+    the offset to resume from.
+    """
+    match = _CONTENT_RANGE.match(request.headers.get('Content-Range', ''))
+    if not match:
+        return jsonify({'error': 'Content-Range: bytes <start>-<end>/<size> is required'}), 400
+    start, end, total = int(match.group(1)), int(match.group(2)), match.group(3)
+
+    sessions = get_upload_sessions()
+    try:
+        session = sessions.get(upload_id)
+    except UploadNotFound:
+        return _not_found(upload_id)
+
+    if end < start or end >= session['size'] or (total != '*' and int(total) != session['size']):
+        return jsonify({'error': 'Content-Range is outside the declared upload size'}), 416
+    length = end - start + 1
+    if request.content_length is not None and request.content_length != length:
+        return jsonify({'error': 'Content-Length does not match Content-Range'}), 400
+
+    store = get_blob_store()
+    try:
+        offset = sessions.append(
+            upload_id, start, request.stream,
+            chunk_size=current_app.config['UPLOAD_CHUNK_SIZE'],
+            sync=getattr(store, 'sync_file', None),
+        )
+    except UploadNotFound:
+        return _not_found(upload_id)
+    except UploadOffsetMismatch as exc:
+        return _offset_conflict(exc.offset)
+    except UploadSessionError as exc:
+        return jsonify({'error': str(exc)}), 416
+
+    session['offset'] = offset
+    return jsonify(_session_state(session)), 200
+
+
+@upload_bp.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+@admission_controlled('submit')
+def complete_upload(upload_id):
+    """Finalize a fully received upload and anchor it like ``/api/submit``.
+
+    The session is kept until the submission is saved, and its submission
+    ID is fixed when the file is committed, so a retry after a failed
+    anchoring step neither needs a re-upload nor creates a duplicate.
+    """
+    store = get_blob_store()
+
+    def commit(path: str, file_hash: str, meta: dict) -> dict:
+        with phase('store'):
+            if hasattr(store, 'commit_temp_file'):
+                blob_ref = store.commit_temp_file(path, file_hash, meta['filename'])
+            else:
+                with open(path, 'rb') as fileobj:
+                    blob_ref = store.put_stream(
+                        fileobj, current_app.config['UPLOAD_CHUNK_SIZE'], filename=meta['filename']
+                    )[0]
+        UPLOAD_SIZE.observe(meta['size'], 'uploads')
+        return {'blob_ref': blob_ref, 'submission_id': generate_submission_id()}
+
+    def submit(meta: dict) -> dict:
+        # An earlier attempt may have been anchored after its client gave up.
+        existing = get_submission_status(meta['submission_id'])
+        if existing:
+            return existing
+        with phase('fingerprint'):
+            hash_algorithm, file_hash, leaf_hashes = fingerprint_blob(
+                meta['blob_ref'], meta['file_hash'], meta.get('tree')
+            )
+        return save_submission(
+            submission_id=meta['submission_id'],
+            file_hash=file_hash,
+            timestamp=datetime.now(timezone.utc).isoformat(),
+            filename=meta['filename'],
+            content_type=meta['content_type'],
+            file_size=meta['size'],
+            blob_ref=meta['blob_ref'],
+            hash_algorithm=hash_algorithm,
+            leaf_hashes=leaf_hashes,
+            file_sha256=meta['file_hash'],
+        )
+
+    try:
+        _meta, submission = get_upload_sessions().finish(upload_id, commit, submit)
+    except UploadNotFound:
+        return _not_found(upload_id)
+    except UploadOffsetMismatch as exc:
+        return jsonify({
+            'error': 'Upload is incomplete',
+            'offset': exc.offset,
+        }), 409
+    except UploadHashMismatch as exc:
+        return jsonify({
+            'error': str(exc),
+            'file_hash': exc.file_hash,
+        }), 422
+
+    return _receipt_response(submission)
+
+
+@upload_bp.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    """Abandon an upload and delete the bytes received so far."""
+    sessions = get_upload_sessions()
+    try:
+        sessions.get(upload_id)
+    except UploadNotFound:
+        return _not_found(upload_id)
+    sessions.delete(upload_id)
+    return jsonify({'message': 'Upload cancelled', 'upload_id': upload_id}), 200
@@ -1,18 +1,65 @@
-from flask import Blueprint, jsonify, request
 
-from utils.hash_utils import generate_hash_from_stream
-from utils.storage import get_submission
+from flask import Blueprint, current_app, jsonify, request
+
+from utils.admission import admission_controlled
+from utils.hash_utils import changed_regions, is_sha256_hex, tree_leaf_size
+from utils.profiling import phase
+from utils.storage import get_submission, get_submissions
+from utils.upload_stream import uploaded_file_fingerprint, uploaded_file_hashes
 
 verify_bp = Blueprint('verify', __name__)
 
 
+def _verification_status(matches: bool) -> str:
+    return 'Authentic - File is unmodified' if matches else 'Tampered - File has been modified'
+
+
+def _changed_regions(original: dict, uploaded_leaves: list[str] | None) -> list[dict] | None:
+    """Regions of a tampered file that differ, for tree-hash submissions."""
+    if not uploaded_leaves or not original.get('leaf_hashes'):
+        return None
+    leaf_size = tree_leaf_size(original.get('hash_algorithm'))
+    return changed_regions(original['leaf_hashes'], uploaded_leaves, leaf_size)
+
+
+def _verification_response(original: dict, uploaded_hash: str,
+                           uploaded_leaves: list[str] | None = None, flat: bool = False):
+    """Compare ``uploaded_hash`` with the submission's fingerprint, or with
+    its flat SHA-256 when ``flat`` is set."""
+    original_hash = original['file_sha256'] if flat else original['file_hash']
+    uploaded_matches_original = uploaded_hash == original_hash
+    body = {
+        'verified': uploaded_matches_original,
+        'status': _verification_status(uploaded_matches_original),
+        'submission_id': original['submission_id'],
+        'hash_algorithm': 'sha256' if flat else original.get('hash_algorithm', 'sha256'),
+        'original_hash': original_hash,
+        'uploaded_hash': uploaded_hash,
+        'timestamp': original['timestamp'],
+        'blockchain_anchor': {
+            'status': original.get('status', 'anchored'),
+            'anchored_at': original.get('anchored_at'),
+            'anchor_hash': original.get('anchor_hash'),
+            'previous_anchor_hash': original.get('prev_anchor_hash'),
+        },
+    }
+    if not uploaded_matches_original:
+        regions = _changed_regions(original, uploaded_leaves)
+        if regions is not None:
+            body['changed_regions'] = regions
+    return jsonify(body), 200
+
+
 @verify_bp.route('/api/verify', methods=['POST'])
+@admission_controlled('verify')
 def verify_file():
     """Verify an uploaded file against the anchored hash for a submission."""
-    if 'file' not in request.files:
+    with phase('parse'):
+        files = request.files
+    if 'file' not in files:
         return jsonify({'error': 'No file provided'}), 400
 
-    file = request.files['file']
+    file = files['file']
     if file.filename == '' or file.filename is None:
         return jsonify({'error': 'No file selected'}), 400
 
@@ -24,20 +71,129 @@ def verify_file():
     if not original:
         return jsonify({'error': f'Submission not found: {submission_id}'}), 404
 
-    uploaded_hash = generate_hash_from_stream(file.stream)
-    uploaded_matches_original = uploaded_hash == original['file_hash']
+    with phase('fingerprint'):
+        uploaded_hash, uploaded_leaves = uploaded_file_fingerprint(
+            file, original.get('hash_algorithm'), current_app.config['VERIFY_HASH_WORKERS']
+        )
+    with phase('serialize'):
+        return _verification_response(original, uploaded_hash, uploaded_leaves)
 
-    return jsonify({
-        'verified': uploaded_matches_original,
-        'status': 'Authentic - File is unmodified' if uploaded_matches_original
-                  else 'Tampered - File has been modified',
-        'submission_id': original['submission_id'],
-        'original_hash': original['file_hash'],
-        'uploaded_hash': uploaded_hash,
-        'timestamp': original['timestamp'],
-        'blockchain_anchor': {
-            'anchored_at': original.get('anchored_at'),
+
+@verify_bp.route('/api/verify/hash', methods=['POST'])
+def verify_hash():
+    """Verify a client-computed digest against a submission.
+
+    ``file_hash`` is the file's plain SHA-256, or for tree-hash submissions
+    also their Merkle root. Tree-hash submissions stored before the plain
+    digest was recorded only accept the root; other digests get a 400
+    naming the algorithm.
+
+    Expects JSON (or form): { submission_id, file_hash }
+    Returns: the same payload as /api/verify
+    """
+    data = request.get_json(silent=True) or request.form
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    submission_id = data.get('submission_id') or ''
+    file_hash = data.get('file_hash') or ''
+    if not isinstance(submission_id, str) or not isinstance(file_hash, str):
+        return jsonify({'error': 'submission_id and file_hash must be strings'}), 400
+    submission_id, file_hash = submission_id.strip(), file_hash.strip()
+
+    if not submission_id:
+        return jsonify({'error': 'No submission_id provided'}), 400
+    if not is_sha256_hex(file_hash):
+        return jsonify({'error': 'file_hash must be a 64-character hex SHA-256 digest'}), 400
+
+    original = get_submission(submission_id)
+    if not original:
+        return jsonify({'error': f'Submission not found: {submission_id}'}), 404
+
+    file_hash = file_hash.lower()
+    hash_algorithm = original.get('hash_algorithm', 'sha256')
+    if tree_leaf_size(hash_algorithm) and file_hash != original['file_hash']:
+        # Not the Merkle root, so compare it with the plain SHA-256 of the file.
+        if not original.get('file_sha256'):
+            return jsonify({
+                'error': f'This submission was fingerprinted with {hash_algorithm}; '
+                         'file_hash must be its Merkle root',
+                'hash_algorithm': hash_algorithm,
+            }), 400
+        return _verification_response(original, file_hash, flat=True)
+    return _verification_response(original, file_hash)
+
+
+@verify_bp.route('/api/verify/batch', methods=['POST'])
+@admission_controlled('verify')
+def verify_batch():
+    """Verify many uploaded files in one request.
+
+    Multipart fields:
+        files: repeated file field
+        submission_ids: repeated, paired with ``files`` by position; or
+        submission_id: a single ID every file is checked against
+    Returns: { count, verified, tampered, not_found, results: [...] }
+    """
+    files = [file for file in request.files.getlist('files') if file.filename]
+    if not files:
+        return jsonify({'error': 'No files provided'}), 400
+
+    max_items = current_app.config['VERIFY_BATCH_MAX']
+    if len(files) > max_items:
+        return jsonify({'error': f'At most {max_items} files can be verified per request'}), 400
+
+    submission_ids = [value.strip() for value in request.form.getlist('submission_ids')]
+    if not submission_ids and request.form.get('submission_id'):
+        submission_ids = [request.form['submission_id'].strip()] * len(files)
+    if len(submission_ids) != len(files) or not all(submission_ids):
+        return jsonify({
+            'error': 'Provide one submission_ids value per file, or a single submission_id',
+        }), 400
+
+    workers = current_app.config['VERIFY_HASH_WORKERS']
+    originals = get_submissions(submission_ids)
+    uploaded_hashes = uploaded_file_hashes(files, workers)
+
+    results = []
+    counts = {'verified': 0, 'tampered': 0, 'not_found': 0}
+    for index, (file, submission_id, uploaded_hash) in enumerate(
+        zip(files, submission_ids, uploaded_hashes)
+    ):
+        original = originals.get(submission_id)
+        uploaded_leaves = None
+        if original and tree_leaf_size(original.get('hash_algorithm')):
+            uploaded_hash, uploaded_leaves = uploaded_file_fingerprint(
+                file, original['hash_algorithm'], workers
+            )
+        if not original:
+            counts['not_found'] += 1
+            results.append({
+                'index': index,
+                'filename': file.filename,
+                'submission_id': submission_id,
+                'error': f'Submission not found: {submission_id}',
+                'uploaded_hash': uploaded_hash,
+            })
+            continue
+
+        matches = uploaded_hash == original['file_hash']
+        counts['verified' if matches else 'tampered'] += 1
+        result = {
+            'index': index,
+            'filename': file.filename,
+            'submission_id': submission_id,
+            'verified': matches,
+            'status': _verification_status(matches),
+            'hash_algorithm': original.get('hash_algorithm', 'sha256'),
+            'original_hash': original['file_hash'],
+            'uploaded_hash': uploaded_hash,
+            'timestamp': original['timestamp'],
             'anchor_hash': original.get('anchor_hash'),
-            'previous_anchor_hash': original.get('prev_anchor_hash'),
-        },
-    }), 200
+        }
+        if not matches:
+            regions = _changed_regions(original, uploaded_leaves)
+            if regions is not None:
+                result['changed_regions'] = regions
+        results.append(result)
+
+    return jsonify({'count': len(results), **counts, 'results': results}), 200
@@ -0,0 +1,20 @@
+import pytest
+
+from config import Config
+from utils.migrations import migrate
+
+
+@pytest.fixture
+def sqlite_config(tmp_path):
+    """App config on a fresh, migrated SQLite database under ``tmp_path``."""
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    config.update(
+        DB_ENGINE='sqlite',
+        SQLITE_PATH=str(tmp_path / 'hashvault.db'),
+        BLOB_STORAGE_DIR=str(tmp_path / 'blobs'),
+        UPLOAD_SESSION_DIR=str(tmp_path / 'sessions'),
+        DB_REPLICAS='',
+        ANCHOR_ASYNC=False,
+    )
+    migrate(config)
+    return config
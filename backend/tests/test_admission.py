@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from config import Config
+from utils.admission import AdmissionBusyError, AdmissionGate, TokenBuckets, _controllers
+
+
+def _acquire_in_thread(gate: AdmissionGate, size: int, admitted: list, name: str):
+    def run():
+        gate.acquire(size)
+        admitted.append(name)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for_waiters(gate: AdmissionGate, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while gate.stats()['waiting'] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_gate_admits_waiters_in_arrival_order():
+    gate = AdmissionGate(max_concurrent=1, queue_size=3, queue_timeout=5)
+    gate.acquire(0)
+    admitted = []
+    threads = []
+    for name in ('first', 'second', 'third'):
+        threads.append(_acquire_in_thread(gate, 0, admitted, name))
+        _wait_for_waiters(gate, len(threads))
+
+    for thread in threads:
+        gate.release(0)
+        thread.join(timeout=5)
+
+    assert admitted == ['first', 'second', 'third']
+
+
+def test_gate_rejects_when_the_queue_is_full():
+    gate = AdmissionGate(max_concurrent=1, queue_size=0, queue_timeout=5)
+    gate.acquire(0)
+
+    with pytest.raises(AdmissionBusyError) as excinfo:
+        gate.acquire(0)
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.retry_after == 5
+
+
+def test_gate_wait_times_out():
+    gate = AdmissionGate(max_concurrent=1, queue_size=1, queue_timeout=0.05)
+    gate.acquire(0)
+    started = time.monotonic()
+
+    with pytest.raises(AdmissionBusyError):
+        gate.acquire(0)
+
+    assert time.monotonic() - started >= 0.05
+    assert gate.stats()['waiting'] == 0
+
+
+def test_gate_bounds_bytes_but_admits_an_oversize_request_alone():
+    gate = AdmissionGate(max_bytes=100, queue_size=1, queue_timeout=0.05)
+    gate.acquire(60)
+    with pytest.raises(AdmissionBusyError):
+        gate.acquire(60)
+    gate.release(60)
+
+    assert gate.acquire(500) == 0.0
+    assert gate.stats()['bytes_in_flight'] == 500
+
+
+def test_token_bucket_allows_a_burst_then_reports_the_wait():
+    buckets = TokenBuckets(rate_per_minute=60, burst=2)
+
+    assert buckets.take('a') == 0.0
+    assert buckets.take('a') == 0.0
+    assert 0 < buckets.take('a') <= 1.0
+    assert buckets.take('b') == 0.0  # other clients have their own bucket
+
+
+@pytest.fixture
+def make_client(sqlite_config, monkeypatch):
+    def make(**overrides):
+        for key, value in dict(sqlite_config, **overrides).items():
+            monkeypatch.setattr(Config, key, value)
+        app = app_module.create_app()
+        return app, app.test_client()
+    return make
+
+
+def _start_upload(client, size: int = 10) -> str:
+    return client.post('/api/uploads', json={
+        'filename': 'report.txt', 'size': size,
+    }).get_json()['upload_id']
+
+
+def _put(client, upload_id: str, start: int, data: bytes, size: int = 10):
+    return client.put(f'/api/uploads/{upload_id}', data=data, headers={
+        'Content-Range': f'bytes {start}-{start + len(data) - 1}/{size}',
+    })
+
+
+def test_chunk_uploads_are_rate_limited_per_client(make_client):
+    _app, client = make_client(ADMISSION_UPLOAD_RATE=60, ADMISSION_UPLOAD_BURST=1)
+    upload_id = _start_upload(client)
+
+    assert _put(client, upload_id, 0, b'12345').status_code == 200
+    response = _put(client, upload_id, 5, b'67890')
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_chunk_uploads_count_against_the_upload_budget(make_client):
+    app, client = make_client(ADMISSION_UPLOAD_CONCURRENCY=1, ADMISSION_QUEUE_SIZE=0)
+    upload_id = _start_upload(client)
+    with app.app_context():
+        gate = _controllers()['upload'].gate
+    gate.acquire(0)  # another chunk in flight
+
+    response = _put(client, upload_id, 0, b'12345')
+
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    gate.release(0)
+    assert _put(client, upload_id, 0, b'12345').status_code == 200
+    assert gate.stats()['in_flight'] == 0
+
+
+def test_chunk_content_length_counts_against_the_byte_budget(make_client):
+    app, client = make_client(ADMISSION_UPLOAD_MAX_MB=1, ADMISSION_QUEUE_SIZE=0)
+    upload_id = _start_upload(client)
+    with app.app_context():
+        gate = _controllers()['upload'].gate
+    gate.acquire(1024 * 1024 - 4)
+
+    assert _put(client, upload_id, 0, b'12345').status_code == 503
+    assert _put(client, upload_id, 0, b'1234').status_code == 200
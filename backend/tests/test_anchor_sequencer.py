@@ -0,0 +1,184 @@
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask
+
+from routes.submit_routes import submit_bp
+from utils.anchor_sequencer import AnchorSequencer, AnchorTimeoutError
+from utils.chain_audit import verify_segment
+from utils.db_utils import append_submissions_mysql, get_submission_mysql, iter_anchors_mysql
+import utils.storage as storage
+from utils.storage import save_submission
+
+
+def _submission(n: int) -> dict:
+    return {
+        'submission_id': f'HV-TEST{n:08d}',
+        'file_hash': f'{n:064x}',
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'filename': f'file{n}.txt',
+        'content_type': 'text/plain',
+        'file_size': n,
+        'blob_ref': None,
+    }
+
+
+def _assert_chain_intact(config, blocks: int) -> None:
+    rows = list(iter_anchors_mysql(config))
+    assert [row[0] for row in rows] == list(range(1, blocks + 1))
+    assert verify_segment(rows)['broken'] is None
+
+
+def test_concurrent_submits_are_group_committed(sqlite_config):
+    sequencer = AnchorSequencer(sqlite_config, max_batch=50, max_wait=0.2)
+    futures = [sequencer.submit(_submission(n)) for n in range(1, 11)]
+
+    results = [future.result(timeout=10) for future in futures]
+
+    assert sequencer.batches == 1
+    assert sequencer.committed == 10
+    assert [result['submission_id'] for result in results] == [f'HV-TEST{n:08d}' for n in range(1, 11)]
+    assert results[1]['prev_anchor_hash'] == results[0]['anchor_hash']
+    _assert_chain_intact(sqlite_config, 10)
+
+
+def test_submits_from_many_threads_form_one_chain(sqlite_config):
+    sequencer = AnchorSequencer(sqlite_config, max_batch=8, max_wait=0.01)
+    results = []
+
+    def submit(n):
+        results.append(sequencer.submit(_submission(n)).result(timeout=10))
+
+    threads = [threading.Thread(target=submit, args=(n,)) for n in range(1, 41)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 40
+    assert sequencer.committed == 40
+    _assert_chain_intact(sqlite_config, 40)
+
+
+def test_merkle_mode_anchors_a_batch_as_one_block(sqlite_config):
+    sequencer = AnchorSequencer(sqlite_config, max_batch=50, max_wait=0.2, mode='merkle')
+    futures = [sequencer.submit(_submission(n)) for n in range(1, 6)]
+
+    results = [future.result(timeout=10) for future in futures]
+
+    assert len({result['anchor_hash'] for result in results}) == 1
+    assert [result['merkle_leaf_index'] for result in results] == list(range(5))
+    _assert_chain_intact(sqlite_config, 1)
+
+
+def test_status_reports_the_merkle_root(sqlite_config):
+    app = Flask(__name__)
+    app.config.update(sqlite_config, ANCHOR_MODE='merkle')
+    app.register_blueprint(submit_bp)
+    with app.app_context():
+        result = save_submission(**_submission(1))
+
+    body = app.test_client().get(f"/api/submissions/{result['submission_id']}/status").get_json()
+
+    assert body['status'] == 'anchored'
+    assert body['blockchain_anchor']['merkle_root'] is not None
+    assert body['blockchain_anchor']['merkle_root'] == result['merkle_root']
+
+
+def test_conflict_with_another_writer_is_retried_against_the_locked_tip(sqlite_config):
+    sequencer = AnchorSequencer(sqlite_config)
+    sequencer.submit(_submission(1)).result(timeout=10)
+
+    # Another process extends the chain behind the sequencer's cached tip.
+    append_submissions_mysql(sqlite_config, [_submission(2)])
+
+    result = sequencer.submit(_submission(3)).result(timeout=10)
+
+    assert sequencer.retries == 1
+    assert result['submission_id'] == 'HV-TEST00000003'
+    assert sequencer.stats()['chain_tip'] == 3
+    _assert_chain_intact(sqlite_config, 3)
+
+
+def test_failing_submission_does_not_sink_its_batch(sqlite_config):
+    sequencer = AnchorSequencer(sqlite_config, max_batch=50, max_wait=0.2)
+    append_submissions_mysql(sqlite_config, [_submission(1)])
+
+    duplicate = sequencer.submit(_submission(1))  # submission_id already exists
+    others = [sequencer.submit(_submission(n)) for n in (2, 3)]
+
+    assert duplicate.exception(timeout=10) is not None
+    assert [future.result(timeout=10)['submission_id'] for future in others] == [
+        'HV-TEST00000002', 'HV-TEST00000003',
+    ]
+    _assert_chain_intact(sqlite_config, 3)
+
+
+def test_cancelled_submission_is_never_anchored(sqlite_config):
+    sequencer = AnchorSequencer(sqlite_config)
+    future = Future()
+    future.cancel()
+
+    sequencer._commit([(_submission(1), future)])
+
+    assert get_submission_mysql(sqlite_config, 'HV-TEST00000001') is None
+    assert list(iter_anchors_mysql(sqlite_config)) == []
+
+
+def test_timed_out_submit_is_withdrawn_instead_of_anchored_later(sqlite_config):
+    app = Flask(__name__)
+    app.config.update(sqlite_config, ANCHOR_TIMEOUT=0.05, ANCHOR_BATCH_WAIT_MS=500)
+
+    with app.app_context():
+        with pytest.raises(AnchorTimeoutError):
+            save_submission(**_submission(1))
+        time.sleep(0.7)  # let the batch window close
+
+    assert get_submission_mysql(sqlite_config, 'HV-TEST00000001') is None
+
+
+def test_submit_stuck_in_a_committing_batch_times_out_with_its_id(sqlite_config, monkeypatch):
+    class StuckSequencer:
+        def submit(self, submission):
+            future = Future()
+            future.set_running_or_notify_cancel()  # its batch is committing
+            return future
+
+    monkeypatch.setattr(storage, 'get_anchor_sequencer', StuckSequencer)
+    app = Flask(__name__)
+    app.config.update(sqlite_config, ANCHOR_TIMEOUT=0.05)
+
+    with app.app_context(), pytest.raises(AnchorTimeoutError) as excinfo:
+        save_submission(**_submission(1))
+
+    assert excinfo.value.submission_id == 'HV-TEST00000001'
+
+
+def test_concurrent_first_requests_share_one_sequencer(sqlite_config, monkeypatch):
+    created = []
+
+    def slow_sequencer(*args, **kwargs):
+        time.sleep(0.05)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(storage, 'AnchorSequencer', slow_sequencer)
+    app = Flask(__name__)
+    app.config.update(sqlite_config)
+    seen = []
+
+    def first_request():
+        with app.app_context():
+            seen.append(storage.get_anchor_sequencer())
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert seen == created * 8
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from flask import Flask, g, jsonify
+
+from routes.auth_routes import auth_bp
+from utils.auth_middleware import _auth_caches, auth_required
+
+
+@pytest.fixture
+def app(sqlite_config):
+    app = Flask(__name__)
+    app.config.update(sqlite_config, BCRYPT_ROUNDS=4, JWT_SECRET='test-secret-' + 'x' * 32)
+    app.register_blueprint(auth_bp)
+
+    @app.route('/annotate')
+    @auth_required
+    def annotate():
+        seen = g.current_user.get('note')
+        g.current_user['note'] = 'request-local'
+        return jsonify({'seen': seen})
+
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _signup(client, username: str = 'alice') -> dict:
+    response = client.post('/api/auth/signup', json={
+        'username': username, 'email': f'{username}@example.com', 'password': 'secret123',
+    })
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def _bearer(token: str) -> dict:
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_annotations_on_current_user_do_not_leak_between_requests(client):
+    token = _signup(client)['token']
+
+    first = client.get('/annotate', headers=_bearer(token)).get_json()   # cache miss
+    second = client.get('/annotate', headers=_bearer(token)).get_json()  # cache hit
+
+    assert first == second == {'seen': None}
+
+
+def test_token_is_decoded_once_while_cached(client, monkeypatch):
+    token = _signup(client)['token']
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, 'decode', counting_decode)
+    for _ in range(3):
+        assert client.get('/api/auth/me', headers=_bearer(token)).status_code == 200
+
+    assert len(calls) == 1
+
+
+def test_expired_and_forged_tokens_are_rejected(app, client):
+    user_id = _signup(client)['user']['id']
+    expired = jwt.encode({
+        'user_id': user_id, 'exp': datetime.now(timezone.utc) - timedelta(seconds=5),
+    }, app.config['JWT_SECRET'], algorithm='HS256')
+    forged = jwt.encode({'user_id': user_id}, 'not-the-secret-' + 'y' * 32, algorithm='HS256')
+
+    response = client.get('/api/auth/me', headers=_bearer(expired))
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Token has expired'
+    assert client.get('/api/auth/me', headers=_bearer(forged)).status_code == 401
+
+
+def test_signup_drops_a_stale_cached_user(app, client):
+    with app.app_context():
+        _auth_caches()[1].set(1, {'id': 1, 'username': 'ghost', 'email': 'ghost@example.com'})
+
+    body = _signup(client)
+    me = client.get('/api/auth/me', headers=_bearer(body['token'])).get_json()
+
+    assert body['user']['id'] == 1
+    assert me['user']['username'] == 'alice'
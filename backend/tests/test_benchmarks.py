@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    # A separate process: the suite sets env vars and rebinds db_utils functions.
+    return subprocess.run(
+        [sys.executable, '-m', 'benchmarks.run', '--sizes', '1', '--concurrency', '1,2',
+         '--requests', '4', '--only', 'submit,verify,list,login', '--bcrypt-rounds', '4', *args],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300,
+    )
+
+
+@pytest.mark.parametrize('db', ['memory', 'sqlite'])
+def test_benchmark_suite_runs_without_errors(tmp_path, db):
+    output = tmp_path / 'result.json'
+
+    first = _run('--db', db, '--output', str(output))
+    second = _run('--db', db, '--output', str(tmp_path / 'again.json'), '--compare', str(output))
+
+    assert first.returncode == 0, first.stderr
+    assert second.returncode == 0, second.stderr
+    report = json.loads(output.read_text())
+    assert report['meta']['db'] == db
+    assert {result['name'] for result in report['results']} == {'submit', 'verify', 'list', 'login'}
+    assert len(report['results']) == 8
+    assert all(result['errors'] == 0 for result in report['results'])
+    assert 'Compared with' in second.stdout
@@ -0,0 +1,95 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from utils.blob_reclaimer import reclaim_unreferenced_blobs
+from utils.blob_store import FilesystemBlobStore
+from utils.db_utils import append_submissions_mysql, get_referenced_blob_refs_mysql
+
+OLD = time.time() - 7 * 86400
+
+
+@pytest.fixture
+def store(sqlite_config):
+    return FilesystemBlobStore(sqlite_config['BLOB_STORAGE_DIR'], fsync='never')
+
+
+def _put(store, data: bytes, age: float | None = OLD) -> tuple[str, str]:
+    """Store ``data`` and backdate it; returns (blob_ref, key)."""
+    blob_ref = store.put_bytes(hashlib.sha256(data).hexdigest(), data)
+    key = blob_ref.split(':', 1)[1]
+    if age is not None:
+        os.utime(store._path(key), (age, age))
+    return blob_ref, key
+
+
+def _submit(config, n: int, blob_ref: str, data: bytes) -> None:
+    append_submissions_mysql(config, [{
+        'submission_id': f'HV-BLOB{n:08d}',
+        'file_hash': hashlib.sha256(data).hexdigest(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'filename': f'file{n}.txt',
+        'content_type': 'text/plain',
+        'file_size': len(data),
+        'blob_ref': blob_ref,
+    }])
+
+
+def test_only_old_unreferenced_blobs_are_reclaimed(sqlite_config, store):
+    kept_ref, kept = _put(store, b'referenced')
+    _submit(sqlite_config, 1, kept_ref, b'referenced')
+    _orphan_ref, orphan = _put(store, b'orphan')
+    _recent_ref, recent = _put(store, b'recent', age=None)
+
+    dry = reclaim_unreferenced_blobs(sqlite_config, store, grace_seconds=86400, dry_run=True)
+    assert store.exists(orphan)
+    result = reclaim_unreferenced_blobs(sqlite_config, store, grace_seconds=86400)
+
+    assert dry['reclaimed'] == result['reclaimed'] == 1
+    assert (result['referenced'], result['skipped_recent']) == (1, 1)
+    assert result['reclaimed_bytes'] == len(b'orphan')
+    assert store.exists(kept) and store.exists(recent) and not store.exists(orphan)
+
+
+def test_blob_refs_are_counted_per_submission(sqlite_config, store):
+    blob_ref, _key = _put(store, b'shared')
+    _submit(sqlite_config, 1, blob_ref, b'shared')
+    _submit(sqlite_config, 2, blob_ref, b'shared')
+
+    assert get_referenced_blob_refs_mysql(sqlite_config, [blob_ref, 'fs:' + 'f' * 64]) == {blob_ref}
+
+
+def test_reclaim_keeps_a_blob_reused_after_it_was_scanned(store):
+    _ref, key = _put(store, b'reused')
+    scanned_mtime = store.mtime(key)
+    store.put_bytes(hashlib.sha256(b'reused').hexdigest(), b'reused')  # dedup touches it
+
+    assert store.reclaim(key, scanned_mtime) is False
+    assert store.exists(key)
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_dedup_write_racing_a_reclaim_stores_a_fresh_copy(store, monkeypatch):
+    data = b'racing'
+    _ref, key = _put(store, data)
+    scanned_mtime = store.mtime(key)
+    touch = store._touch
+
+    def reclaim_then_touch(path):
+        # The reclaimer renames the blob away between find() and the touch.
+        assert store.reclaim(key, scanned_mtime) is True
+        return touch(path)
+
+    monkeypatch.setattr(store, '_touch', reclaim_then_touch)
+    fileobj, temp_path = store.new_temp_file()
+    with fileobj:
+        fileobj.write(data)
+
+    blob_ref = store.commit_temp_file(temp_path, hashlib.sha256(data).hexdigest())
+
+    assert blob_ref == f'fs:{key}'
+    with store.open(key) as stored:
+        assert stored.read() == data
@@ -0,0 +1,71 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from utils.blob_store import FilesystemBlobStore, create_blob_store, split_blob_ref
+
+DATA = os.urandom(300_000)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FilesystemBlobStore(str(tmp_path / 'blobs'), fsync='never')
+
+
+def test_stream_is_hashed_and_stored_under_its_digest(store):
+    blob_ref, file_hash, size = store.put_stream(io.BytesIO(DATA), chunk_size=64 * 1024)
+
+    assert (blob_ref, file_hash, size) == (f'fs:{SHA256}', SHA256, len(DATA))
+    assert split_blob_ref(blob_ref) == ('fs', SHA256)
+    assert store.local_path(SHA256) == os.path.join(store.root, SHA256[:2], SHA256[2:4], SHA256)
+    with store.open(SHA256) as fileobj:
+        assert fileobj.read() == DATA
+    assert bytes(store.map(SHA256)) == DATA
+    assert store.size(SHA256) == len(DATA)
+
+
+def test_identical_content_is_stored_once(store):
+    first = store.put_stream(io.BytesIO(DATA))[0]
+    second = store.put_stream(io.BytesIO(DATA))[0]
+    third = store.put_bytes(SHA256, DATA)
+
+    assert first == second == third
+    assert [key for key, _size, _mtime in store.iter_blobs()] == [SHA256]
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_failed_write_leaves_no_blob_or_temp_file(store):
+    class _Broken(io.RawIOBase):
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            raise OSError('client went away')
+
+    with pytest.raises(OSError):
+        store.put_stream(_Broken())
+
+    assert list(store.iter_blobs()) == []
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_keys_are_validated(store):
+    for key in ('../etc/passwd', SHA256[:-1], SHA256 + '.zip', SHA256.upper()):
+        with pytest.raises(ValueError):
+            store.open(key)
+    with pytest.raises(ValueError):
+        split_blob_ref(SHA256)
+    store.delete(SHA256)  # deleting a missing blob is a no-op
+
+
+def test_factory_checks_its_settings(tmp_path):
+    config = {'BLOB_STORAGE_DIR': str(tmp_path), 'BLOB_FSYNC': 'Always'}
+
+    assert create_blob_store(config).fsync == 'always'
+    with pytest.raises(ValueError):
+        create_blob_store(dict(config, BLOB_FSYNC='sometimes'))
+    with pytest.raises(RuntimeError):
+        create_blob_store(dict(config, BLOB_STORAGE_BACKEND='s3'))
@@ -0,0 +1,91 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from utils.chain_audit import run_audit
+from utils.db_utils import append_submissions_mysql
+
+
+def _append(config, start: int, count: int) -> None:
+    append_submissions_mysql(config, [{
+        'submission_id': f'HV-AUDIT{n:07d}',
+        'file_hash': f'{n:064x}',
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'filename': f'file{n}.txt',
+        'content_type': 'text/plain',
+        'file_size': n,
+        'blob_ref': None,
+    } for n in range(start, start + count)])
+
+
+def _execute(config, sql: str, *params) -> None:
+    with sqlite3.connect(config['SQLITE_PATH']) as conn:
+        conn.execute(sql, params)
+
+
+@pytest.fixture
+def config(sqlite_config):
+    _append(sqlite_config, 1, 5)
+    return dict(sqlite_config, AUDIT_SIGNING_KEY='audit-key', AUDIT_WORKERS=1, AUDIT_SEGMENT_SIZE=2)
+
+
+def test_audit_checkpoints_and_then_checks_only_new_blocks(config):
+    first = run_audit(config)
+    _append(config, 6, 2)
+    second = run_audit(config)
+
+    assert (first['status'], first['mode'], first['blocks_checked']) == ('ok', 'full', 5)
+    assert first['checkpoint']['block_index'] == 5
+    assert (second['status'], second['mode'], second['start_block']) == ('ok', 'incremental', 6)
+    assert second['blocks_checked'] == 2
+    assert second['checkpoint_warning'] is None
+
+
+def test_forged_checkpoint_signature_forces_a_full_audit(config):
+    run_audit(config)
+    _execute(config, 'UPDATE audit_checkpoints SET block_index = 4')
+
+    result = run_audit(config)
+
+    assert result['checkpoint_warning'] == 'checkpoint signature is invalid'
+    assert (result['mode'], result['blocks_checked']) == ('full', 5)
+
+
+def test_checkpoint_signed_with_another_key_is_not_trusted(config):
+    run_audit(config)
+
+    result = run_audit(dict(config, AUDIT_SIGNING_KEY='rotated-key'))
+
+    assert result['checkpoint_warning'] == 'checkpoint signature is invalid'
+    assert result['blocks_checked'] == 5
+
+
+def test_rewritten_checkpointed_block_is_detected(config):
+    run_audit(config)
+    _execute(config, "UPDATE anchors SET anchor_hash = ? WHERE block_index = 5", 'f' * 64)
+
+    result = run_audit(config)
+
+    assert result['checkpoint_warning'] == 'checkpointed block no longer matches'
+    assert result['status'] == 'broken'
+    assert result['first_broken'] == {'block_index': 5, 'reason': 'anchor hash mismatch'}
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_tampered_block_breaks_the_chain(config, workers):
+    _execute(config, "UPDATE anchors SET file_hash = ? WHERE block_index = 3", 'e' * 64)
+
+    result = run_audit(config, workers=workers)
+
+    assert result['status'] == 'broken'
+    assert result['first_broken'] == {'block_index': 3, 'reason': 'anchor hash mismatch'}
+    assert result.get('checkpoint') is None
+
+
+def test_missing_block_breaks_the_chain(config):
+    _execute(config, 'DELETE FROM anchors WHERE block_index = 3')
+
+    result = run_audit(config)
+
+    assert result['first_broken'] == {'block_index': 3, 'reason': 'missing block'}
@@ -0,0 +1,59 @@
+import hashlib
+import os
+
+import pytest
+
+from utils.blob_store import FilesystemBlobStore
+from utils.compression import CODECS, parse_compression_rules, split_key
+
+TEXT = b'timestamp,value\n' + b''.join(b'2024-01-01T00:00:%02d,%d\n' % (i % 60, i) for i in range(5000))
+TEXT_HASH = hashlib.sha256(TEXT).hexdigest()
+
+
+def _store(tmp_path, spec: str) -> FilesystemBlobStore:
+    return FilesystemBlobStore(str(tmp_path / 'blobs'), fsync='never',
+                               compression=parse_compression_rules(spec))
+
+
+def test_rules_are_parsed_per_extension():
+    assert parse_compression_rules('txt, .MD=gzip:9; csv=xz') == {
+        'txt': ('gzip', 9), 'md': ('gzip', 9), 'csv': ('xz', 6),
+    }
+    assert parse_compression_rules('off') == {}
+    for spec in ('txt=zip', 'txt=gzip:10', 'txt=gzip:x', 'txt'):
+        with pytest.raises(ValueError):
+            parse_compression_rules(spec)
+
+
+@pytest.mark.parametrize('codec', sorted(CODECS))
+def test_compressed_blobs_read_back_as_the_original(tmp_path, codec):
+    store = _store(tmp_path, f'csv={codec}')
+
+    blob_ref = store.put_bytes(TEXT_HASH, TEXT, filename='data.csv')
+    key = blob_ref.split(':', 1)[1]
+
+    assert split_key(key) == (TEXT_HASH, codec)
+    assert os.path.getsize(store._path(key)) < len(TEXT) / 2
+    with store.open(key) as fileobj:
+        assert fileobj.read() == TEXT
+    assert store.map(key) == TEXT
+    assert store.size(key) == len(TEXT)
+    assert store.local_path(key) is None  # never served as raw bytes
+
+
+def test_other_and_incompressible_files_are_stored_raw(tmp_path):
+    store = _store(tmp_path, 'csv,txt=gzip')
+    noise = os.urandom(100_000)
+
+    assert store.put_bytes(TEXT_HASH, TEXT, filename='data.bin') == f'fs:{TEXT_HASH}'
+    noise_hash = hashlib.sha256(noise).hexdigest()
+    assert store.put_bytes(noise_hash, noise, filename='noise.txt') == f'fs:{noise_hash}'
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_dedup_finds_a_blob_in_any_encoding(tmp_path):
+    store = _store(tmp_path, 'csv=gzip')
+    compressed_ref = store.put_bytes(TEXT_HASH, TEXT, filename='data.csv')
+
+    assert store.put_bytes(TEXT_HASH, TEXT, filename='data.bin') == compressed_ref
+    assert [key for key, _size, _mtime in store.iter_blobs()] == [f'{TEXT_HASH}.gz']
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from utils.db_pool import ConnectionPool, PoolTimeoutError
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+        self.ping_error = None
+        self.rollback_error = None
+
+    def ping(self, reconnect=False):
+        if self.ping_error:
+            raise self.ping_error
+
+    def rollback(self):
+        self.rollbacks += 1
+        if self.rollback_error:
+            raise self.rollback_error
+
+    def close(self):
+        self.closed = True
+
+
+class _Factory:
+    def __init__(self):
+        self.created = []
+        self.error = None
+
+    def __call__(self):
+        if self.error:
+            raise self.error
+        conn = _FakeConnection()
+        self.created.append(conn)
+        return conn
+
+
+@pytest.fixture
+def factory():
+    return _Factory()
+
+
+def test_connections_are_reused(factory):
+    pool = ConnectionPool(factory, size=2, ping_interval=60)
+    for _ in range(3):
+        with pool.connection():
+            pass
+
+    assert len(factory.created) == 1
+    stats = pool.stats()
+    assert (stats['open'], stats['idle'], stats['in_use'], stats['acquires']) == (1, 1, 0, 3)
+
+
+def test_exhausted_pool_times_out(factory):
+    pool = ConnectionPool(factory, size=1, timeout=0.05)
+    pool.acquire()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_waiter_gets_the_released_connection(factory):
+    pool = ConnectionPool(factory, size=1, timeout=5, ping_interval=60)
+    conn = pool.acquire()
+    borrowed = []
+    waiter = threading.Thread(target=lambda: borrowed.append(pool.acquire()))
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while pool.stats()['waiters'] == 0:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+    pool.release(conn)
+    waiter.join(5)
+
+    assert borrowed == [conn]
+
+
+def test_broken_and_old_connections_are_replaced(factory):
+    pool = ConnectionPool(factory, size=1, ping_interval=0)
+    with pool.connection() as conn:
+        conn.ping_error = OSError('gone away')
+    with pool.connection() as replacement:
+        pass
+    assert replacement is not conn and conn.closed
+    assert pool.stats()['failed_health_checks'] == 1
+
+    pool = ConnectionPool(factory, size=1, recycle=0.01, ping_interval=60)
+    with pool.connection() as conn:
+        pass
+    time.sleep(0.02)
+    with pool.connection() as replacement:
+        pass
+    assert replacement is not conn and conn.closed
+    assert pool.stats()['recycled'] == 1
+
+
+def test_errors_roll_back_and_drop_connections_that_cannot(factory):
+    pool = ConnectionPool(factory, size=1)
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            raise ValueError('query failed')
+    assert conn.rollbacks == 1 and not conn.closed
+    assert pool.stats()['idle'] == 1
+
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.rollback_error = OSError('lost connection')
+            raise ValueError('query failed')
+    assert conn.closed
+    assert (pool.stats()['open'], pool.stats()['idle']) == (0, 0)
+
+
+def test_failed_connect_frees_its_slot(factory):
+    pool = ConnectionPool(factory, size=1, timeout=0.05)
+    factory.error = OSError('refused')
+    with pytest.raises(OSError):
+        pool.acquire()
+
+    factory.error = None
+    with pool.connection():
+        pass
+    assert pool.stats()['open'] == 1
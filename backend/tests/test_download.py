@@ -0,0 +1,79 @@
+import hashlib
+import io
+import os
+
+import pytest
+from flask import Flask
+
+from routes.auth_routes import auth_bp
+from routes.submit_routes import submit_bp
+from utils.storage import get_blob_store
+from utils.upload_stream import HashVaultRequest
+
+RAW = os.urandom(50_000)                       # stored as-is
+TEXT = b'line of a quarterly report\n' * 2000  # stored gzip-compressed
+
+
+@pytest.fixture
+def app(sqlite_config):
+    app = Flask(__name__)
+    app.request_class = HashVaultRequest
+    app.config.update(sqlite_config, BCRYPT_ROUNDS=4, JWT_SECRET='test-secret-' + 'x' * 32)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(submit_bp)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    token = client.post('/api/auth/signup', json={
+        'username': 'alice', 'email': 'alice@example.com', 'password': 'secret123',
+    }).get_json()['token']
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
+
+
+def _submit(client, data: bytes, name: str) -> dict:
+    response = client.post('/api/submit', data={'file': (io.BytesIO(data), name)})
+    assert response.status_code == 201
+    return response.get_json()
+
+
+@pytest.mark.parametrize('data, name', [(RAW, 'raw.pdf'), (TEXT, 'report.txt')])
+def test_download_supports_ranges_and_etags(client, data, name):
+    submission = _submit(client, data, name)
+    url = f"/api/submissions/{submission['submission_id']}/file"
+
+    full = client.get(url)
+    partial = client.get(url, headers={'Range': 'bytes=100-199'})
+    cached = client.get(url, headers={'If-None-Match': f'"{hashlib.sha256(data).hexdigest()}"'})
+
+    assert full.status_code == 200
+    assert full.data == data
+    assert full.headers['Content-Length'] == str(len(data))
+    assert full.headers['Content-Disposition'] == f'attachment; filename={name}'
+    assert partial.status_code == 206
+    assert partial.data == data[100:200]
+    assert partial.headers['Content-Range'] == f'bytes 100-199/{len(data)}'
+    assert cached.status_code == 304
+
+
+def test_compressed_blob_is_served_decompressed(app, client):
+    submission = _submit(client, TEXT, 'report.txt')
+    with app.app_context():
+        stored = get_blob_store().find(submission['file_hash'])
+
+    assert stored.endswith('.gz')
+    assert client.get(f"/api/submissions/{submission['submission_id']}/file").data == TEXT
+
+
+def test_download_needs_auth_and_an_existing_file(app, client):
+    submission = _submit(client, RAW, 'raw.pdf')
+    url = f"/api/submissions/{submission['submission_id']}/file"
+
+    assert app.test_client().get(url).status_code == 401
+    assert client.get('/api/submissions/HV-MISSING/file').status_code == 404
+    with app.app_context():
+        get_blob_store().delete(submission['file_hash'])
+    assert client.get(url).status_code == 404
@@ -0,0 +1,107 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask
+
+from routes.submit_routes import submit_bp
+from utils.db_utils import append_merkle_batch_mysql, append_submissions_mysql
+from utils.merkle import (
+    build_levels,
+    inclusion_proof,
+    leaf_hash,
+    merkle_root,
+    node_hash,
+    root_from_proof,
+    verify_inclusion,
+)
+
+
+def _leaves(n: int) -> list[str]:
+    return [leaf_hash(f'leaf-{i}'.encode()) for i in range(n)]
+
+
+@pytest.mark.parametrize('n', range(1, 10))
+def test_every_leaf_proves_inclusion(n):
+    leaves = _leaves(n)
+    levels = build_levels(leaves)
+    root = merkle_root(leaves)
+
+    for index, leaf in enumerate(leaves):
+        proof = inclusion_proof(levels, index)
+        assert len(proof) <= (n - 1).bit_length()
+        assert verify_inclusion(leaf, proof, root)
+
+
+def test_proof_rejects_other_leaves_and_altered_paths():
+    leaves = _leaves(5)
+    levels = build_levels(leaves)
+    root = levels[-1][0]
+    proof = inclusion_proof(levels, 2)
+
+    assert not verify_inclusion(leaves[3], proof, root)
+    flipped = [dict(step, position='left' if step['position'] == 'right' else 'right') for step in proof]
+    assert not verify_inclusion(leaves[2], flipped, root)
+    assert not verify_inclusion(leaves[2], proof[:-1], root)
+
+
+def test_leaves_and_inner_nodes_are_domain_separated():
+    a, b = _leaves(2)
+    # A leaf over the concatenated children must not collide with the node.
+    assert leaf_hash(bytes.fromhex(a) + bytes.fromhex(b)) != node_hash(a, b)
+    assert root_from_proof(a, []) == a
+    with pytest.raises(ValueError):
+        build_levels([])
+
+
+def _submission(n: int) -> dict:
+    return {
+        'submission_id': f'HV-MERKLE{n:06d}',
+        'file_hash': f'{n:064x}',
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'filename': f'file{n}.txt',
+        'content_type': 'text/plain',
+        'file_size': n,
+        'blob_ref': None,
+    }
+
+
+@pytest.fixture
+def client(sqlite_config):
+    app = Flask(__name__)
+    app.config.update(sqlite_config)
+    app.register_blueprint(submit_bp)
+    return app.test_client()
+
+
+def test_batch_proofs_verify_against_the_anchor_block(sqlite_config, client):
+    results, _tip = append_merkle_batch_mysql(sqlite_config, [_submission(n) for n in range(5)])
+
+    roots = {result['merkle_root'] for result in results}
+    assert len(roots) == 1
+    for leaf_index, result in enumerate(results):
+        proof = client.get(f"/api/submissions/{result['submission_id']}/proof").get_json()
+        merkle = proof['merkle']
+        assert proof['anchor_mode'] == 'merkle' and proof['valid'] is True
+        assert (merkle['leaf_index'], merkle['batch_size']) == (leaf_index, 5)
+        assert merkle['root'] == proof['block']['block_hash_input'] == result['merkle_root']
+        assert verify_inclusion(merkle['leaf_hash'], merkle['path'], merkle['root'])
+
+
+def test_tampered_submission_no_longer_proves(sqlite_config, client):
+    append_merkle_batch_mysql(sqlite_config, [_submission(n) for n in range(3)])
+    with sqlite3.connect(sqlite_config['SQLITE_PATH']) as conn:
+        conn.execute("UPDATE submissions SET file_hash = ? WHERE submission_id = 'HV-MERKLE000001'",
+                     ('f' * 64,))
+
+    assert client.get('/api/submissions/HV-MERKLE000001/proof').get_json()['valid'] is False
+    assert client.get('/api/submissions/HV-MERKLE000002/proof').get_json()['valid'] is True
+
+
+def test_chain_blocks_prove_without_a_path(sqlite_config, client):
+    append_submissions_mysql(sqlite_config, [_submission(7)])
+
+    proof = client.get('/api/submissions/HV-MERKLE000007/proof').get_json()
+
+    assert (proof['anchor_mode'], proof['merkle'], proof['valid']) == ('chain', None, True)
+    assert client.get('/api/submissions/HV-MISSING/proof').status_code == 404
@@ -0,0 +1,66 @@
+import io
+import os
+
+import pytest
+from flask import Flask
+
+from routes.metrics_routes import metrics_bp
+from routes.submit_routes import submit_bp
+from utils.metrics import HASHED_BYTES, Histogram
+from utils.upload_sessions import UploadSessionStore
+from utils.upload_stream import HashVaultRequest
+
+
+def _hashed_bytes(operation: str) -> float:
+    return dict(HASHED_BYTES.samples()).get(
+        f'hashvault_hashed_bytes_total{{operation="{operation}"}}', 0
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('test_seconds', 'Test.', ('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, 'a')
+
+    samples = dict(histogram.samples())
+
+    assert samples['test_seconds_bucket{route="a",le="0.1"}'] == 1
+    assert samples['test_seconds_bucket{route="a",le="1"}'] == 3
+    assert samples['test_seconds_bucket{route="a",le="+Inf"}'] == 4
+    assert samples['test_seconds_count{route="a"}'] == 4
+    assert samples['test_seconds_sum{route="a"}'] == pytest.approx(6.05)
+
+
+@pytest.fixture
+def app(sqlite_config):
+    app = Flask(__name__)
+    app.request_class = HashVaultRequest
+    app.config.update(sqlite_config, METRICS_TOKEN='')
+    app.register_blueprint(submit_bp)
+    app.register_blueprint(metrics_bp)
+    return app
+
+
+def test_streamed_submit_reports_spool_hashing(app):
+    client = app.test_client()
+    data = os.urandom(20000)
+    before = _hashed_bytes('spool')
+
+    response = client.post('/api/submit', data={'file': (io.BytesIO(data), 'report.txt')})
+
+    assert response.status_code == 201
+    assert _hashed_bytes('spool') - before == len(data)
+    assert 'operation="spool"' in client.get('/api/metrics').get_data(as_text=True)
+
+
+def test_chunk_append_reports_upload_hashing(tmp_path):
+    store = UploadSessionStore(str(tmp_path))
+    upload_id = store.create('report.txt', 'text/plain', 3000)['upload_id']
+    before = _hashed_bytes('upload_chunk'), _hashed_bytes('upload_rehash')
+
+    store.append(upload_id, 0, io.BytesIO(b'a' * 1000))
+    UploadSessionStore(str(tmp_path)).append(upload_id, 1000, io.BytesIO(b'b' * 2000))
+
+    # The second store has no hash state for the session and re-hashes the first 1000 bytes.
+    assert _hashed_bytes('upload_chunk') - before[0] == 3000
+    assert _hashed_bytes('upload_rehash') - before[1] == 1000
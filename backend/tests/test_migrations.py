@@ -0,0 +1,110 @@
+import sqlite3
+
+import pytest
+
+from utils.migrations import (
+    LATEST_VERSION,
+    MIGRATIONS,
+    SQLITE_MIGRATIONS,
+    SchemaVersionError,
+    check_schema_version,
+    get_schema_version,
+    migrate,
+)
+
+V7_SUBMISSIONS = """
+CREATE TABLE submissions (
+    id INTEGER PRIMARY KEY,
+    submission_id VARCHAR(100) NOT NULL UNIQUE,
+    filename VARCHAR(255) NULL,
+    content_type VARCHAR(255) NULL,
+    file_size BIGINT NULL,
+    file_blob BLOB NULL,
+    blob_ref VARCHAR(255) NULL,
+    file_hash CHAR(64) NOT NULL,
+    hash_algorithm VARCHAR(32) NOT NULL DEFAULT 'sha256',
+    leaf_hashes TEXT NULL,
+    timestamp DATETIME NOT NULL,
+    anchored_at DATETIME NOT NULL,
+    anchor_hash CHAR(64) NOT NULL,
+    prev_anchor_hash CHAR(64) NULL,
+    merkle_root CHAR(64) NULL,
+    merkle_leaf_index INT NULL,
+    merkle_proof TEXT NULL
+)
+"""
+
+
+def _schema(path: str) -> tuple[set, set]:
+    with sqlite3.connect(path) as conn:
+        columns = {row[1:] for row in conn.execute('PRAGMA table_info(submissions)')}
+        indexes = {row[1] for row in conn.execute('PRAGMA index_list(submissions)')}
+    return columns, indexes
+
+
+def _downgrade_to_v7(config) -> None:
+    """Turn a fresh database back into the shape migration 7 left behind."""
+    with sqlite3.connect(config['SQLITE_PATH']) as conn:
+        conn.execute('DROP TABLE submissions')
+        conn.execute(V7_SUBMISSIONS)
+        for index, indexed in (
+            ('idx_submissions_anchor_hash', 'anchor_hash'),
+            ('idx_submissions_timestamp_id', 'timestamp, id'),
+            ('idx_submissions_file_hash', 'file_hash'),
+        ):
+            conn.execute(f'CREATE INDEX {index} ON submissions ({indexed})')
+        conn.executemany(
+            "INSERT INTO submissions (submission_id, file_hash, hash_algorithm, timestamp, "
+            "anchored_at, anchor_hash) VALUES (?, ?, ?, '2024-01-01', '2024-01-01', ?)",
+            [('HV-FLAT', 'a' * 64, 'sha256', 'c' * 64), ('HV-TREE', 'b' * 64, 'sha256-tree:1024', 'd' * 64)],
+        )
+        conn.execute('DELETE FROM schema_version WHERE version > 7')
+
+
+def test_migration_list_is_contiguous():
+    assert [version for version, _name, _func in MIGRATIONS] == list(range(1, LATEST_VERSION + 1))
+    assert set(SQLITE_MIGRATIONS) <= set(range(1, LATEST_VERSION + 1))
+
+
+def test_fresh_database_is_created_at_the_latest_version(sqlite_config):
+    assert get_schema_version(sqlite_config) == LATEST_VERSION
+    assert check_schema_version(sqlite_config) == LATEST_VERSION
+    assert migrate(sqlite_config) == []  # nothing left to apply
+
+
+def test_unmigrated_database_fails_the_startup_check(sqlite_config, tmp_path):
+    config = dict(sqlite_config, SQLITE_PATH=str(tmp_path / 'empty.db'))
+
+    assert get_schema_version(config) == 0
+    with pytest.raises(SchemaVersionError, match='manage.py migrate'):
+        check_schema_version(config)
+    with pytest.raises(RuntimeError, match='--target'):
+        migrate(config, target=LATEST_VERSION - 1)
+
+
+def test_upgrade_matches_a_fresh_schema_and_backfills(sqlite_config):
+    fresh = _schema(sqlite_config['SQLITE_PATH'])
+    _downgrade_to_v7(sqlite_config)
+    with pytest.raises(SchemaVersionError):
+        check_schema_version(sqlite_config)
+
+    applied = migrate(sqlite_config)
+
+    assert [version for version, _name in applied] == list(range(8, LATEST_VERSION + 1))
+    assert check_schema_version(sqlite_config) == LATEST_VERSION
+    assert _schema(sqlite_config['SQLITE_PATH']) == fresh
+    with sqlite3.connect(sqlite_config['SQLITE_PATH']) as conn:
+        rows = dict(conn.execute(
+            "SELECT submission_id, status || ':' || IFNULL(file_sha256, '-') FROM submissions"
+        ))
+    assert rows == {'HV-FLAT': 'anchored:' + 'a' * 64, 'HV-TREE': 'anchored:-'}
+
+
+def test_upgrade_without_a_sqlite_path_is_refused(sqlite_config):
+    _downgrade_to_v7(sqlite_config)
+    with sqlite3.connect(sqlite_config['SQLITE_PATH']) as conn:
+        conn.execute('DELETE FROM schema_version WHERE version = 7')
+
+    with pytest.raises(RuntimeError, match=r'No SQLite upgrade path for migrations \[7\]'):
+        migrate(sqlite_config)
+    assert get_schema_version(sqlite_config) == 6  # nothing was applied
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import bcrypt
+import pytest
+
+import app as app_module
+from config import Config
+from utils.password_hasher import HasherBusyError, PasswordHasher, get_password_hasher
+
+
+class _BlockingCheck:
+    """Stand-in for ``bcrypt.checkpw`` that holds its worker until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def __call__(self, password, password_hash):
+        assert self.release.wait(5)
+        return True
+
+
+def _wait_for(predicate) -> None:
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def _occupy(hasher, monkeypatch) -> tuple[_BlockingCheck, threading.Thread]:
+    blocking = _BlockingCheck()
+    monkeypatch.setattr(bcrypt, 'checkpw', blocking)
+    thread = threading.Thread(target=hasher.check_password, args=('pw', 'hash'))
+    thread.start()
+    _wait_for(lambda: hasher.stats()['in_flight'] == 1)
+    return blocking, thread
+
+
+def test_hash_and_check_round_trip():
+    hasher = PasswordHasher(workers=1, max_queue=0, rounds=4)
+
+    password_hash = hasher.hash_password('secret123')
+
+    assert password_hash.startswith('$2b$04$')
+    assert hasher.check_password('secret123', password_hash)
+    assert not hasher.check_password('wrong', password_hash)
+    assert hasher.stats()['completed'] == 3
+
+
+def test_full_queue_rejects_immediately(monkeypatch):
+    hasher = PasswordHasher(workers=1, max_queue=0, rounds=4)
+    blocking, thread = _occupy(hasher, monkeypatch)
+
+    started = time.monotonic()
+    with pytest.raises(HasherBusyError):
+        hasher.check_password('pw', 'hash')
+    assert time.monotonic() - started < 1
+
+    blocking.release.set()
+    thread.join(5)
+    stats = hasher.stats()
+    assert (stats['rejected'], stats['completed'], stats['in_flight']) == (1, 1, 0)
+    assert hasher.check_password('pw', 'hash')  # the slot was given back
+
+
+def test_busy_login_is_answered_with_503(sqlite_config, monkeypatch):
+    for key, value in dict(sqlite_config, BCRYPT_ROUNDS=4, PASSWORD_HASH_WORKERS=1,
+                           PASSWORD_HASH_QUEUE=0, JWT_SECRET='test-secret-' + 'x' * 32).items():
+        monkeypatch.setattr(Config, key, value)
+    app = app_module.create_app()
+    client = app.test_client()
+    assert client.post('/api/auth/signup', json={
+        'username': 'alice', 'email': 'alice@example.com', 'password': 'secret123',
+    }).status_code == 201
+    with app.app_context():
+        hasher = get_password_hasher()
+    blocking, thread = _occupy(hasher, monkeypatch)
+
+    response = client.post('/api/auth/login', json={'username': 'alice', 'password': 'secret123'})
+    blocking.release.set()
+    thread.join(5)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json()['error'] == 'Service busy'
@@ -0,0 +1,81 @@
+import io
+import json
+import os
+import pstats
+
+import pytest
+from flask import Flask
+
+from routes.submit_routes import submit_bp
+from utils.profiling import install_profiling
+from utils.upload_stream import HashVaultRequest
+
+ADMIN = {'X-Admin-Token': 'admin-secret'}
+
+
+@pytest.fixture
+def app(sqlite_config, tmp_path):
+    app = Flask(__name__)
+    app.request_class = HashVaultRequest
+    app.config.update(sqlite_config, ADMIN_TOKEN='admin-secret', PROFILE_SAMPLE_RATE=0.0,
+                      PROFILE_SLOW_MS=60_000, PROFILE_DIR=str(tmp_path / 'profiles'),
+                      PROFILE_KEEP=100)
+    app.register_blueprint(submit_bp)
+    install_profiling(app)
+    return app
+
+
+def _submit(app, headers=None):
+    return app.test_client().post('/api/submit', headers=headers or {}, data={
+        'file': (io.BytesIO(b'quarterly report\n' * 100), 'report.txt'),
+    })
+
+
+def _dumps(app) -> list[str]:
+    directory = app.config['PROFILE_DIR']
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_admin_can_request_a_profile(app):
+    response = _submit(app, dict(ADMIN, **{'X-Profile': '1'}))
+    status = app.test_client().get(
+        f"/api/submissions/{response.get_json()['submission_id']}/status",
+        headers=dict(ADMIN, **{'X-Profile': '1'}),
+    )
+
+    timing = response.headers['Server-Timing']
+    for name in ('parse', 'hash.spool', 'store', 'fingerprint', 'anchor', 'serialize'):
+        assert f'{name};dur=' in timing
+    assert 'db.get_submission_mysql;dur=' in status.headers['Server-Timing']
+    json_dump, prof_dump = [name for name in _dumps(app) if '-submit.submit_file-' in name]
+    with open(os.path.join(app.config['PROFILE_DIR'], json_dump), encoding='utf-8') as fileobj:
+        summary = json.load(fileobj)
+    assert (summary['status'], summary['sampled']) == (201, False)
+    assert {item['phase'] for item in summary['phases']} >= {'parse', 'store'}
+    pstats.Stats(os.path.join(app.config['PROFILE_DIR'], prof_dump))  # readable
+
+
+def test_profile_header_needs_the_admin_token(app):
+    response = _submit(app, {'X-Profile': '1', 'X-Admin-Token': 'wrong'})
+
+    assert 'Server-Timing' not in response.headers
+    assert _dumps(app) == []
+
+
+def test_sampled_requests_are_dumped_only_when_slow(app):
+    app.config['PROFILE_SAMPLE_RATE'] = 1.0
+    response = _submit(app)
+    assert 'Server-Timing' not in response.headers
+    assert _dumps(app) == []
+
+    app.config['PROFILE_SLOW_MS'] = 0
+    _submit(app)
+    assert len(_dumps(app)) == 2
+
+
+def test_only_the_newest_dumps_are_kept(app):
+    app.config.update(PROFILE_SAMPLE_RATE=1.0, PROFILE_SLOW_MS=0, PROFILE_KEEP=2)
+    for _ in range(4):
+        _submit(app)
+
+    assert len(_dumps(app)) == 4  # two .json + .prof pairs
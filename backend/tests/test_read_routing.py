@@ -0,0 +1,35 @@
+import io
+
+import pytest
+
+import app as app_module
+from config import Config
+from utils.db_routing import READ_PRIMARY_COOKIE
+
+ORIGIN = 'http://localhost:5173'
+
+
+@pytest.fixture
+def client(sqlite_config, monkeypatch):
+    for key, value in sqlite_config.items():
+        monkeypatch.setattr(Config, key, value)
+    monkeypatch.setattr(Config, 'CORS_ORIGINS', [ORIGIN])
+    return app_module.create_app().test_client()
+
+
+def test_cross_origin_requests_may_carry_the_read_primary_cookie(client):
+    response = client.options('/api/submit', headers={
+        'Origin': ORIGIN, 'Access-Control-Request-Method': 'POST',
+    })
+
+    assert response.headers['Access-Control-Allow-Origin'] == ORIGIN
+    assert response.headers['Access-Control-Allow-Credentials'] == 'true'
+
+
+def test_submit_sets_the_read_primary_cookie(client):
+    response = client.post('/api/submit', headers={'Origin': ORIGIN},
+                           data={'file': (io.BytesIO(b'hello'), 'report.txt')})
+
+    assert response.status_code == 201
+    assert response.headers['Access-Control-Allow-Credentials'] == 'true'
+    assert client.get_cookie(READ_PRIMARY_COOKIE) is not None
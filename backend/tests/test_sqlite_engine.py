@@ -0,0 +1,68 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from utils.sqlite_engine import SQLiteConnection, is_missing_table_error, translate
+
+
+def test_mysql_constructs_are_translated():
+    assert translate(
+        'SELECT SUBSTRING(file_blob, %s, %s) FROM submissions WHERE id = %s FOR UPDATE'
+    ).split() == 'SELECT substr(file_blob, ?, ?) FROM submissions WHERE id = ?'.split()
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'engine.db')
+    conn = SQLiteConnection(path)
+    with conn.cursor() as cur:
+        cur.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, name TEXT, at DATETIME)')
+    conn.close()
+    return path
+
+
+def test_rows_are_dicts_and_datetimes_round_trip(path):
+    conn = SQLiteConnection(path)
+    at = datetime(2024, 5, 6, 7, 8, 9, 123456)
+    with conn.cursor() as cur:
+        cur.executemany('INSERT INTO events (name, at) VALUES (%s, %s)', [('a', at), ('b', at)])
+        cur.execute('SELECT name, at FROM events WHERE name = %s', ('a',))
+        assert cur.fetchone() == {'name': 'a', 'at': at}
+    with conn.cursor(dict_rows=False) as cur:
+        cur.execute('SELECT name FROM events ORDER BY id')
+        assert list(cur) == [('a',), ('b',)]
+    conn.close()
+
+
+def test_begin_takes_the_write_lock_without_blocking_readers(path):
+    writer = SQLiteConnection(path)
+    other = SQLiteConnection(path, timeout=0.05)
+    writer.begin()
+    with writer.cursor() as cur:
+        cur.execute("INSERT INTO events (name) VALUES ('pending')")
+
+    with pytest.raises(sqlite3.OperationalError, match='locked'):
+        other.begin()
+    with other.cursor() as cur:
+        cur.execute('SELECT COUNT(*) AS n FROM events')
+        assert cur.fetchone() == {'n': 0}  # uncommitted write is invisible
+
+    writer.rollback()
+    other.begin()
+    other.commit()
+    writer.close()
+    other.close()
+
+
+def test_settings_and_errors(path):
+    with pytest.raises(ValueError):
+        SQLiteConnection(path, synchronous='OFF')
+    conn = SQLiteConnection(path, synchronous='normal')
+    with conn.cursor() as cur:
+        cur.execute('PRAGMA journal_mode')
+        assert cur.fetchone() == {'journal_mode': 'wal'}
+        with pytest.raises(sqlite3.OperationalError) as excinfo:
+            cur.execute('SELECT * FROM missing')
+    assert is_missing_table_error(excinfo.value)
+    conn.close()
@@ -0,0 +1,116 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask
+
+import utils.storage as storage
+from utils.cache import MISSING, TTLCache
+from utils.db_utils import append_submissions_mysql
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is MISSING
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_entries=10, ttl=60)
+    cache.set('short', 1, ttl=0.01)
+    cache.set('never', 2, ttl=0)  # not cached at all
+    time.sleep(0.02)
+
+    assert cache.get('short') is MISSING
+    assert cache.get('never') is MISSING
+    assert cache.stats()['expirations'] == 1
+
+
+def test_ttl_cache_bounds_bytes():
+    cache = TTLCache(max_entries=100, ttl=60, max_bytes=250, sizeof=lambda value: 100)
+    for key in 'abc':
+        cache.set(key, key)
+
+    assert cache.keys() == ['b', 'c']
+
+
+def _submission(n: int, leaf_hashes=None) -> dict:
+    return {
+        'submission_id': f'HV-CACHE{n:07d}',
+        'file_hash': f'{n:064x}',
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'filename': f'file{n}.txt',
+        'content_type': 'text/plain',
+        'file_size': n,
+        'blob_ref': None,
+        'hash_algorithm': 'sha256-tree:1024' if leaf_hashes else 'sha256',
+        'leaf_hashes': leaf_hashes,
+    }
+
+
+@pytest.fixture
+def app(sqlite_config):
+    append_submissions_mysql(sqlite_config, [
+        _submission(1, leaf_hashes=['a' * 64, 'b' * 64]),
+        _submission(2),
+    ])
+    app = Flask(__name__)
+    app.config.update(sqlite_config)
+    with app.app_context():
+        yield app
+
+
+def test_cached_record_is_not_changed_by_callers(app):
+    first = storage.get_submission('HV-CACHE0000001')  # miss, then cached
+    first['file_hash'] = 'tampered'
+    second = storage.get_submission('HV-CACHE0000001')  # hit
+    second['filename'] = 'tampered'
+
+    third = storage.get_submission('HV-CACHE0000001')
+    assert third['file_hash'] == f'{1:064x}'
+    assert third['filename'] == 'file1.txt'
+    assert list(third['leaf_hashes']) == ['a' * 64, 'b' * 64]
+    with pytest.raises(AttributeError):
+        third['leaf_hashes'].append('c' * 64)  # nested values are immutable
+
+
+def test_cache_serves_repeat_lookups_without_the_database(app, monkeypatch):
+    storage.get_submission('HV-CACHE0000002')
+    assert storage.get_submission('HV-MISSING') is None
+
+    def unreachable(*args, **kwargs):
+        raise AssertionError('database was queried')
+
+    monkeypatch.setattr(storage, 'get_submission_mysql', unreachable)
+    monkeypatch.setattr(storage, 'get_submissions_mysql', unreachable)
+
+    assert storage.get_submission('HV-CACHE0000002')['file_size'] == 2
+    assert storage.get_submission('HV-MISSING') is None  # negative entry
+    assert set(storage.get_submissions(['HV-CACHE0000002', 'HV-MISSING'])) == {'HV-CACHE0000002'}
+
+
+class _IdleWorker:
+    def wake(self):
+        pass
+
+
+def test_pending_records_are_not_cached(app, monkeypatch):
+    monkeypatch.setattr(storage, 'get_anchor_worker', _IdleWorker)  # leave it pending
+    storage.save_submission(**dict(_submission(3), leaf_hashes=None))
+    app.config['ANCHOR_ASYNC'] = True
+    try:
+        storage.save_submission(**dict(_submission(4), leaf_hashes=None))
+    finally:
+        app.config['ANCHOR_ASYNC'] = False
+
+    assert storage.get_submission('HV-CACHE0000004')['status'] == 'pending'
+    assert storage._submission_cache().get('HV-CACHE0000004') is MISSING
+    assert storage._submission_cache().get('HV-CACHE0000003') is MISSING  # cached on first read
+    storage.get_submission('HV-CACHE0000003')
+    assert storage._submission_cache().get('HV-CACHE0000003') is not MISSING
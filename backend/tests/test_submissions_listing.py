@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import Flask
+
+from routes.submit_routes import _decode_cursor, _encode_cursor, submit_bp
+from utils.db_utils import append_submissions_mysql
+
+BASE_TIME = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _submission(n: int, timestamp: datetime, content_type: str = 'text/plain') -> dict:
+    return {
+        'submission_id': f'HV-LIST{n:08d}',
+        'file_hash': f'{n:064x}',
+        'timestamp': timestamp.isoformat(),
+        'filename': f'report_{n}.txt',
+        'content_type': content_type,
+        'file_size': n,
+        'blob_ref': None,
+    }
+
+
+@pytest.fixture
+def client(sqlite_config):
+    # Pairs of submissions share a timestamp, so pages must break ties on id.
+    append_submissions_mysql(sqlite_config, [
+        _submission(n, BASE_TIME + timedelta(seconds=n // 2),
+                    'application/pdf' if n % 3 == 0 else 'text/plain')
+        for n in range(1, 12)
+    ])
+    app = Flask(__name__)
+    app.config.update(sqlite_config)
+    app.register_blueprint(submit_bp)
+    return app.test_client()
+
+
+def _ids(submissions: list[dict]) -> list[str]:
+    return [submission['submission_id'] for submission in submissions]
+
+
+def test_cursor_round_trip():
+    position = (datetime(2024, 5, 1, 12, 0, 0, 123456), 42)
+
+    token = _encode_cursor(position)
+
+    assert '=' not in token
+    assert _decode_cursor(token) == position
+
+
+def test_malformed_cursor_is_rejected(client):
+    with pytest.raises(ValueError):
+        _decode_cursor('not-a-cursor')
+    assert client.get('/api/submissions?after=not-a-cursor').status_code == 400
+
+
+def test_pages_cover_every_submission_once_newest_first(client):
+    everything = client.get('/api/submissions?limit=100').get_json()
+    assert everything['next_cursor'] is None
+
+    seen = []
+    url = '/api/submissions?limit=3'
+    while url:
+        page = client.get(url).get_json()
+        assert page['count'] <= 3
+        seen.extend(_ids(page['submissions']))
+        url = f"/api/submissions?limit=3&after={page['next_cursor']}" if page['next_cursor'] else None
+
+    assert seen == _ids(everything['submissions'])
+    assert sorted(seen) == [f'HV-LIST{n:08d}' for n in range(1, 12)]
+    assert seen[0] == 'HV-LIST00000011'
+
+
+def test_cursor_pages_apply_filters(client):
+    first = client.get('/api/submissions?limit=2&content_type=application/pdf').get_json()
+    rest = client.get(
+        f"/api/submissions?limit=2&content_type=application/pdf&after={first['next_cursor']}"
+    ).get_json()
+
+    assert _ids(first['submissions']) + _ids(rest['submissions']) == [
+        'HV-LIST00000009', 'HV-LIST00000006', 'HV-LIST00000003',
+    ]
+    assert rest['next_cursor'] is None
+
+
+def test_ndjson_stream_resumes_after_a_cursor(client):
+    page = client.get('/api/submissions?limit=4').get_json()
+
+    response = client.get(f"/api/submissions?format=ndjson&after={page['next_cursor']}")
+
+    streamed = [line for line in response.get_data(as_text=True).splitlines() if line]
+    assert len(streamed) == 7
+    assert 'HV-LIST00000007' in streamed[0]
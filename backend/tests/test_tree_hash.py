@@ -0,0 +1,115 @@
+import hashlib
+import io
+import os
+
+import pytest
+from flask import Flask
+
+import utils.storage as storage
+from routes.submit_routes import submit_bp
+from routes.upload_routes import upload_bp
+from routes.verify_routes import verify_bp
+from utils.hash_utils import TreeHasher, changed_regions, tree_hash_stream
+from utils.upload_stream import HashVaultRequest
+
+LEAF = 1024
+DATA = os.urandom(LEAF * 5 + 100)
+
+
+def test_changed_regions_merges_adjacent_leaves():
+    expected = ['a', 'b', 'c', 'd', 'e']
+    actual = ['a', 'x', 'y', 'd', 'z']
+
+    assert changed_regions(expected, actual, LEAF) == [
+        {'offset': LEAF, 'length': 2 * LEAF, 'first_leaf': 1, 'last_leaf': 2},
+        {'offset': 4 * LEAF, 'length': LEAF, 'first_leaf': 4, 'last_leaf': 4},
+    ]
+
+
+@pytest.mark.parametrize('actual', [['a', 'b', 'c', 'd'], ['a', 'b']])
+def test_changed_regions_counts_missing_leaves(actual):
+    # Growing from or shrinking to two leaves changes the same trailing range.
+    expected = ['a', 'b'] if len(actual) > 2 else ['a', 'b', 'c', 'd']
+
+    assert changed_regions(expected, actual, LEAF) == [
+        {'offset': 2 * LEAF, 'length': 2 * LEAF, 'first_leaf': 2, 'last_leaf': 3},
+    ]
+
+
+def test_changed_regions_identical_is_empty():
+    assert changed_regions(['a', 'b'], ['a', 'b'], LEAF) == []
+
+
+@pytest.mark.parametrize('size', [0, 1, LEAF, LEAF * 3 + 7])
+@pytest.mark.parametrize('chunk', [1, 100, LEAF, LEAF * 2 + 3])
+def test_tree_hasher_matches_tree_hash_stream(size, chunk):
+    data = DATA[:size]
+    hasher = TreeHasher(LEAF, workers=2)
+    for start in range(0, len(data), chunk):
+        hasher.update(data[start:start + chunk])
+
+    assert hasher.result() == tree_hash_stream(io.BytesIO(data), LEAF, workers=2)
+
+
+@pytest.fixture
+def app(sqlite_config):
+    app = Flask(__name__)
+    app.request_class = HashVaultRequest
+    app.config.update(sqlite_config, HASH_ALGORITHM='tree', TREE_HASH_LEAF_SIZE=LEAF)
+    app.register_blueprint(submit_bp)
+    app.register_blueprint(upload_bp)
+    app.register_blueprint(verify_bp)
+    return app
+
+
+@pytest.fixture
+def no_reread(monkeypatch):
+    """Fail if a stored blob is read back to tree-hash it."""
+    def tree_hash_stream(*args, **kwargs):
+        raise AssertionError('blob was hashed a second time')
+    monkeypatch.setattr(storage, 'tree_hash_stream', tree_hash_stream)
+
+
+def test_tree_submission_keeps_plain_sha256(app, no_reread):
+    client = app.test_client()
+    sha256 = hashlib.sha256(DATA).hexdigest()
+    root, _ = tree_hash_stream(io.BytesIO(DATA), LEAF)
+
+    response = client.post('/api/submit', data={'file': (io.BytesIO(DATA), 'report.txt')})
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['file_hash'] == root
+    assert body['file_sha256'] == sha256
+    submission_id = body['submission_id']
+
+    found = client.get(f'/api/submissions/by-hash/{sha256}').get_json()
+    assert [item['submission_id'] for item in found['submissions']] == [submission_id]
+
+    for digest in (sha256, root):
+        verified = client.post('/api/verify/hash', json={
+            'submission_id': submission_id, 'file_hash': digest,
+        }).get_json()
+        assert verified['verified'] is True
+
+    tampered = client.post('/api/verify/hash', json={
+        'submission_id': submission_id, 'file_hash': hashlib.sha256(b'other').hexdigest(),
+    }).get_json()
+    assert tampered['verified'] is False
+
+
+def test_resumable_upload_hashes_leaves_while_receiving(app, no_reread):
+    client = app.test_client()
+    upload_id = client.post('/api/uploads', json={
+        'filename': 'report.txt', 'size': len(DATA),
+    }).get_json()['upload_id']
+    for start in range(0, len(DATA), 1500):
+        chunk = DATA[start:start + 1500]
+        client.put(f'/api/uploads/{upload_id}', data=chunk, headers={
+            'Content-Range': f'bytes {start}-{start + len(chunk) - 1}/{len(DATA)}',
+        })
+
+    response = client.post(f'/api/uploads/{upload_id}/complete')
+
+    assert response.status_code == 201
+    assert response.get_json()['file_hash'] == tree_hash_stream(io.BytesIO(DATA), LEAF)[0]
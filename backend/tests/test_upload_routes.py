@@ -0,0 +1,99 @@
+import hashlib
+import os
+
+import pytest
+from flask import Flask
+
+import routes.upload_routes as upload_routes
+from routes.submit_routes import submit_bp
+from utils.db_utils import get_submission_mysql
+
+DATA = os.urandom(5000)
+
+
+@pytest.fixture
+def app(sqlite_config):
+    app = Flask(__name__)
+    app.config.update(sqlite_config)
+    app.register_blueprint(submit_bp)
+    app.register_blueprint(upload_routes.upload_bp)
+    return app
+
+
+def _upload(client) -> str:
+    upload_id = client.post('/api/uploads', json={
+        'filename': 'report.txt', 'size': len(DATA),
+    }).get_json()['upload_id']
+    for start in range(0, len(DATA), 2000):
+        chunk = DATA[start:start + 2000]
+        response = client.put(f'/api/uploads/{upload_id}', data=chunk, headers={
+            'Content-Range': f'bytes {start}-{start + len(chunk) - 1}/{len(DATA)}',
+        })
+        assert response.status_code == 200
+    return upload_id
+
+
+def test_complete_can_be_retried_after_anchoring_fails(app, sqlite_config, monkeypatch):
+    client = app.test_client()
+    upload_id = _upload(client)
+    save_submission = upload_routes.save_submission
+    calls = []
+
+    def flaky_save(**submission):
+        calls.append(submission['submission_id'])
+        if len(calls) == 1:
+            raise RuntimeError('database down')
+        return save_submission(**submission)
+
+    monkeypatch.setattr(upload_routes, 'save_submission', flaky_save)
+    app.testing = False  # let the failure become a 500 instead of propagating
+
+    assert client.post(f'/api/uploads/{upload_id}/complete').status_code == 500
+    assert client.get(f'/api/uploads/{upload_id}').get_json()['complete'] is True
+
+    response = client.post(f'/api/uploads/{upload_id}/complete')
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['submission_id'] == calls[0] == calls[1]
+    assert body['file_hash'] == hashlib.sha256(DATA).hexdigest()
+    assert get_submission_mysql(sqlite_config, body['submission_id'])['status'] == 'anchored'
+    assert client.get(f'/api/uploads/{upload_id}').status_code == 404
+
+
+def test_complete_does_not_anchor_a_submission_twice(app, monkeypatch):
+    client = app.test_client()
+    upload_id = _upload(client)
+    save_submission = upload_routes.save_submission
+
+    def saved_but_lost(**submission):
+        save_submission(**submission)
+        raise RuntimeError('connection reset after commit')
+
+    monkeypatch.setattr(upload_routes, 'save_submission', saved_but_lost)
+    app.testing = False
+    assert client.post(f'/api/uploads/{upload_id}/complete').status_code == 500
+
+    monkeypatch.setattr(upload_routes, 'save_submission', save_submission)
+    response = client.post(f'/api/uploads/{upload_id}/complete')
+
+    assert response.status_code == 201
+    listing = client.get('/api/submissions').get_json()
+    assert [item['submission_id'] for item in listing['submissions']] == [
+        response.get_json()['submission_id']
+    ]
+
+
+def test_chunk_overlapping_a_received_range_gets_the_resume_offset(app):
+    client = app.test_client()
+    upload_id = client.post('/api/uploads', json={
+        'filename': 'report.txt', 'size': len(DATA),
+    }).get_json()['upload_id']
+    client.put(f'/api/uploads/{upload_id}', data=DATA[:2000],
+               headers={'Content-Range': f'bytes 0-1999/{len(DATA)}'})
+
+    response = client.put(f'/api/uploads/{upload_id}', data=DATA[:2000],
+                          headers={'Content-Range': f'bytes 0-1999/{len(DATA)}'})
+
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 2000
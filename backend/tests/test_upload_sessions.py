@@ -0,0 +1,194 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from utils.upload_sessions import (
+    UploadHashMismatch,
+    UploadNotFound,
+    UploadOffsetMismatch,
+    UploadSessionError,
+    UploadSessionStore,
+)
+
+DATA = os.urandom(3000)
+
+
+def _commit_to(directory):
+    def commit(path, file_hash, meta):
+        target = os.path.join(directory, file_hash)
+        os.replace(path, target)
+        return {'blob_ref': f'fs:{file_hash}'}
+
+    return commit
+
+
+def test_appends_track_offset_and_hash(tmp_path):
+    sessions = UploadSessionStore(str(tmp_path / 'sessions'))
+    upload_id = sessions.create('a.txt', 'text/plain', len(DATA))['upload_id']
+
+    assert sessions.append(upload_id, 0, io.BytesIO(DATA[:1000])) == 1000
+    assert sessions.append(upload_id, 1000, io.BytesIO(DATA[1000:]), chunk_size=256) == 3000
+    assert sessions.get(upload_id)['offset'] == 3000
+
+    meta, result = sessions.finish(upload_id, _commit_to(str(tmp_path)), lambda meta: meta['blob_ref'])
+
+    assert meta['file_hash'] == hashlib.sha256(DATA).hexdigest()
+    assert result == f"fs:{meta['file_hash']}"
+    with pytest.raises(UploadNotFound):
+        sessions.get(upload_id)
+
+
+def test_chunk_at_the_wrong_offset_is_rejected(tmp_path):
+    sessions = UploadSessionStore(str(tmp_path / 'sessions'))
+    upload_id = sessions.create('a.txt', 'text/plain', len(DATA))['upload_id']
+    sessions.append(upload_id, 0, io.BytesIO(DATA[:1000]))
+
+    for start in (0, 500, 2000):
+        with pytest.raises(UploadOffsetMismatch) as excinfo:
+            sessions.append(upload_id, start, io.BytesIO(DATA[start:start + 10]))
+        assert excinfo.value.offset == 1000
+
+
+def test_chunk_past_the_declared_size_is_not_written(tmp_path):
+    sessions = UploadSessionStore(str(tmp_path / 'sessions'))
+    upload_id = sessions.create('a.txt', 'text/plain', 1000)['upload_id']
+    sessions.append(upload_id, 0, io.BytesIO(DATA[:400]))
+
+    with pytest.raises(UploadSessionError):
+        sessions.append(upload_id, 400, io.BytesIO(DATA[400:1200]), chunk_size=100)
+
+    assert sessions.get(upload_id)['offset'] == 400
+    sessions.append(upload_id, 400, io.BytesIO(DATA[400:1000]))
+    meta, _result = sessions.finish(upload_id, _commit_to(str(tmp_path)), lambda meta: None)
+    assert meta['file_hash'] == hashlib.sha256(DATA[:1000]).hexdigest()
+
+
+def test_chunks_landing_on_different_workers_hash_correctly(tmp_path):
+    root = str(tmp_path / 'sessions')
+    first, second = UploadSessionStore(root), UploadSessionStore(root)
+    upload_id = first.create('a.txt', 'text/plain', len(DATA))['upload_id']
+
+    first.append(upload_id, 0, io.BytesIO(DATA[:1000]))
+    second.append(upload_id, 1000, io.BytesIO(DATA[1000:2000]))
+    first.append(upload_id, 2000, io.BytesIO(DATA[2000:]))
+
+    meta, _result = second.finish(upload_id, _commit_to(str(tmp_path)), lambda meta: None)
+    assert meta['file_hash'] == hashlib.sha256(DATA).hexdigest()
+
+
+def test_workers_drop_hash_state_another_worker_moved_past(tmp_path):
+    root = str(tmp_path / 'sessions')
+    first, second = UploadSessionStore(root), UploadSessionStore(root)
+    upload_id = first.create('a.txt', 'text/plain', len(DATA))['upload_id']
+    first.append(upload_id, 0, io.BytesIO(DATA[:1000]))
+    second.append(upload_id, 1000, io.BytesIO(DATA[1000:2000]))
+
+    # The first worker's state is stale; using it again rebuilds from disk.
+    first.append(upload_id, 2000, io.BytesIO(DATA[2000:]))
+    assert first.stats()['hash_states_cached'] == 1
+    meta, _result = first.finish(upload_id, _commit_to(str(tmp_path)), lambda meta: None)
+    assert meta['file_hash'] == hashlib.sha256(DATA).hexdigest()
+
+    # The second worker never hears about the finish until it collects garbage.
+    assert second.stats()['hash_states_cached'] == 1
+    second.collect_garbage()
+    assert second.stats()['hash_states_cached'] == 0
+    assert first.stats()['hash_states_cached'] == 0
+    assert first._locks == {} and second._locks == {}
+
+
+def test_hash_states_are_bounded(tmp_path):
+    sessions = UploadSessionStore(str(tmp_path / 'sessions'), max_hash_states=2)
+    upload_ids = [sessions.create('a.txt', 'text/plain', len(DATA))['upload_id'] for _ in range(3)]
+    for upload_id in upload_ids:
+        sessions.append(upload_id, 0, io.BytesIO(DATA[:1000]))
+
+    assert sessions.stats()['hash_states_cached'] == 2
+    # The evicted session is re-hashed from disk and still finishes correctly.
+    sessions.append(upload_ids[0], 1000, io.BytesIO(DATA[1000:]))
+    meta, _result = sessions.finish(upload_ids[0], _commit_to(str(tmp_path)), lambda meta: None)
+    assert meta['file_hash'] == hashlib.sha256(DATA).hexdigest()
+
+
+def test_declared_hash_mismatch_discards_the_session(tmp_path):
+    sessions = UploadSessionStore(str(tmp_path / 'sessions'))
+    upload_id = sessions.create('a.txt', 'text/plain', 10, expected_hash='0' * 64)['upload_id']
+    sessions.append(upload_id, 0, io.BytesIO(DATA[:10]))
+
+    with pytest.raises(UploadHashMismatch):
+        sessions.finish(upload_id, _commit_to(str(tmp_path)), lambda meta: None)
+    with pytest.raises(UploadNotFound):
+        sessions.get(upload_id)
+
+
+def test_failed_submit_keeps_the_committed_session_for_a_retry(tmp_path):
+    sessions = UploadSessionStore(str(tmp_path / 'sessions'))
+    upload_id = sessions.create('a.txt', 'text/plain', len(DATA))['upload_id']
+    sessions.append(upload_id, 0, io.BytesIO(DATA))
+    commits = []
+
+    def commit(path, file_hash, meta):
+        commits.append(file_hash)
+        return _commit_to(str(tmp_path))(path, file_hash, meta)
+
+    def failing_submit(meta):
+        raise RuntimeError('database down')
+
+    with pytest.raises(RuntimeError):
+        sessions.finish(upload_id, commit, failing_submit)
+    assert sessions.get(upload_id)['offset'] == len(DATA)
+
+    meta, result = sessions.finish(upload_id, commit, lambda meta: meta['blob_ref'])
+
+    assert len(commits) == 1
+    assert result == f"fs:{hashlib.sha256(DATA).hexdigest()}"
+    with pytest.raises(UploadNotFound):
+        sessions.get(upload_id)
+
+
+class _SlowStream(io.BytesIO):
+    """Stream that stalls on its first read so a racing writer overlaps it."""
+
+    def __init__(self, data: bytes, delay: float):
+        super().__init__(data)
+        self._delay = delay
+
+    def read(self, size=-1):
+        if self._delay:
+            time.sleep(self._delay)
+            self._delay = 0
+        return super().read(size)
+
+
+def _race_append(root, upload_id, barrier, results):
+    sessions = UploadSessionStore(root)
+    barrier.wait()
+    try:
+        results.put(('ok', sessions.append(upload_id, 0, _SlowStream(DATA[:1000], 0.3))))
+    except UploadOffsetMismatch as exc:
+        results.put(('conflict', exc.offset))
+
+
+def test_two_processes_racing_on_one_offset(tmp_path):
+    context = multiprocessing.get_context('fork')
+    root = str(tmp_path / 'sessions')
+    sessions = UploadSessionStore(root)
+    upload_id = sessions.create('a.txt', 'text/plain', 1000)['upload_id']
+    barrier = context.Barrier(2)
+    results = context.Queue()
+
+    workers = [context.Process(target=_race_append, args=(root, upload_id, barrier, results))
+               for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+
+    assert sorted(results.get(timeout=1) for _ in workers) == [('conflict', 1000), ('ok', 1000)]
+    assert sessions.get(upload_id)['offset'] == 1000
+    meta, _result = sessions.finish(upload_id, _commit_to(str(tmp_path)), lambda meta: None)
+    assert meta['file_hash'] == hashlib.sha256(DATA[:1000]).hexdigest()
@@ -0,0 +1,82 @@
+import hashlib
+import io
+import os
+
+import pytest
+from flask import Flask
+
+import utils.upload_stream as upload_stream
+from routes.submit_routes import submit_bp
+from routes.verify_routes import verify_bp
+from utils.blob_store import FilesystemBlobStore
+from utils.storage import get_blob_store
+from utils.upload_stream import HashingSpoolFile, HashVaultRequest
+
+DATA = os.urandom(200_000)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+def test_spool_file_hashes_while_writing(tmp_path):
+    store = FilesystemBlobStore(str(tmp_path), fsync='never')
+    spool = HashingSpoolFile(store, 'report.txt')
+    for start in range(0, len(DATA), 7000):
+        spool.write(DATA[start:start + 7000])
+    spool.seek(0)
+
+    assert spool.read(10) == DATA[:10]
+    assert spool.hexdigest() == SHA256
+    assert spool.commit() == (f'fs:{SHA256}', SHA256, len(DATA))
+    assert spool.closed
+    assert os.listdir(store.tmp_dir) == []
+
+    abandoned = HashingSpoolFile(store)
+    abandoned.write(b'partial')
+    abandoned.close()
+    assert os.listdir(store.tmp_dir) == []
+
+
+@pytest.fixture
+def app(sqlite_config, monkeypatch):
+    def reread(*args, **kwargs):
+        raise AssertionError('upload was read a second time')
+
+    monkeypatch.setattr(upload_stream, 'generate_hash_from_stream', reread)
+    monkeypatch.setattr(FilesystemBlobStore, 'put_stream', reread)
+    app = Flask(__name__)
+    app.request_class = HashVaultRequest
+    app.config.update(sqlite_config)
+    app.register_blueprint(submit_bp)
+    app.register_blueprint(verify_bp)
+    return app
+
+
+def _temp_files(app) -> list[str]:
+    with app.app_context():
+        return os.listdir(get_blob_store().tmp_dir)
+
+
+def test_submit_and_verify_hash_the_upload_once(app):
+    client = app.test_client()
+
+    submitted = client.post('/api/submit', data={'file': (io.BytesIO(DATA), 'report.txt')})
+    submission_id = submitted.get_json()['submission_id']
+    verified = client.post('/api/verify', data={
+        'submission_id': submission_id, 'file': (io.BytesIO(DATA), 'report.txt'),
+    })
+
+    assert submitted.status_code == 201
+    assert submitted.get_json()['file_hash'] == SHA256
+    assert verified.get_json()['verified'] is True
+    with app.app_context():
+        with get_blob_store().open(SHA256) as fileobj:
+            assert fileobj.read() == DATA
+    assert _temp_files(app) == []  # the verify spool was discarded
+
+
+def test_rejected_upload_leaves_no_spool_file(app):
+    response = app.test_client().post('/api/submit', data={
+        'file': (io.BytesIO(DATA), 'payload.exe'),
+    })
+
+    assert response.status_code == 400
+    assert _temp_files(app) == []
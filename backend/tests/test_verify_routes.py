@@ -0,0 +1,130 @@
+import hashlib
+import io
+
+import pytest
+from flask import Flask
+
+from routes.submit_routes import submit_bp
+from routes.verify_routes import verify_bp
+from utils.hash_utils import is_sha256_hex
+from utils.upload_stream import HashVaultRequest
+
+DATA = b'quarterly report\n' * 100
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.fixture
+def app(sqlite_config):
+    app = Flask(__name__)
+    app.request_class = HashVaultRequest
+    app.config.update(sqlite_config)
+    app.register_blueprint(submit_bp)
+    app.register_blueprint(verify_bp)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def submission_id(client):
+    response = client.post('/api/submit', data={'file': (io.BytesIO(DATA), 'report.txt')})
+    assert response.status_code == 201
+    return response.get_json()['submission_id']
+
+
+def test_is_sha256_hex_rejects_a_trailing_newline():
+    assert is_sha256_hex(SHA256)
+    assert is_sha256_hex(SHA256.upper())
+    assert not is_sha256_hex(SHA256 + '\n')
+    assert not is_sha256_hex(SHA256[:-1])
+    assert not is_sha256_hex(123)
+
+
+def test_verify_hash_matches_and_detects_tampering(client, submission_id):
+    authentic = client.post('/api/verify/hash', json={
+        'submission_id': submission_id, 'file_hash': SHA256.upper(),
+    }).get_json()
+    tampered = client.post('/api/verify/hash', json={
+        'submission_id': submission_id, 'file_hash': hashlib.sha256(b'x').hexdigest(),
+    }).get_json()
+
+    assert authentic['verified'] is True
+    assert authentic['original_hash'] == SHA256
+    assert tampered['verified'] is False
+
+
+def test_verify_hash_accepts_form_data(client, submission_id):
+    response = client.post('/api/verify/hash', data={
+        'submission_id': submission_id, 'file_hash': SHA256,
+    })
+
+    assert response.status_code == 200
+    assert response.get_json()['verified'] is True
+
+
+def test_verify_hash_unknown_submission_is_404(client):
+    response = client.post('/api/verify/hash', json={
+        'submission_id': 'HV-MISSING', 'file_hash': SHA256,
+    })
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('body', [
+    [],
+    'x',
+    ['HV-1', SHA256],
+    {'submission_id': 123, 'file_hash': SHA256},
+    {'submission_id': 'HV-1', 'file_hash': 123},
+    {'submission_id': 'HV-1', 'file_hash': SHA256[:-1]},
+    {'file_hash': SHA256},
+])
+def test_verify_hash_rejects_malformed_bodies(client, body):
+    response = client.post('/api/verify/hash', json=body)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_by_hash_finds_the_submission_and_rejects_a_trailing_newline(client, submission_id):
+    found = client.get(f'/api/submissions/by-hash/{SHA256}').get_json()
+
+    assert [item['submission_id'] for item in found['submissions']] == [submission_id]
+    assert client.get(f'/api/submissions/by-hash/{SHA256}%0A').status_code == 400
+
+
+def _batch(client, files: list[tuple[bytes, str]], **form):
+    data = {'files': [(io.BytesIO(content), name) for content, name in files]}
+    data.update(form)
+    return client.post('/api/verify/batch', data=data)
+
+
+def test_verify_batch_reports_each_file(client, submission_id):
+    body = _batch(client, [(DATA, 'a.txt'), (b'edited', 'b.txt'), (DATA, 'c.txt')],
+                  submission_ids=[submission_id, submission_id, 'HV-MISSING']).get_json()
+
+    assert (body['count'], body['verified'], body['tampered'], body['not_found']) == (3, 1, 1, 1)
+    first, second, third = body['results']
+    assert (first['index'], first['verified'], first['filename']) == (0, True, 'a.txt')
+    assert second['verified'] is False
+    assert second['uploaded_hash'] == hashlib.sha256(b'edited').hexdigest()
+    assert third['error'] == 'Submission not found: HV-MISSING'
+
+
+def test_verify_batch_against_a_single_submission(client, submission_id):
+    body = _batch(client, [(DATA, 'a.txt'), (DATA, 'b.txt')], submission_id=submission_id).get_json()
+
+    assert (body['count'], body['verified']) == (2, 2)
+
+
+def test_verify_batch_rejects_bad_requests(app, client, submission_id):
+    app.config['VERIFY_BATCH_MAX'] = 2
+    three = [(DATA, 'a.txt'), (DATA, 'b.txt'), (DATA, 'c.txt')]
+
+    assert client.post('/api/verify/batch', data={}).status_code == 400
+    assert _batch(client, three, submission_id=submission_id).status_code == 400
+    assert _batch(client, three[:2], submission_ids=[submission_id]).status_code == 400
+    assert _batch(client, three[:2], submission_ids=[submission_id, ' ']).status_code == 400
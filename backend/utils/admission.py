@@ -0,0 +1,258 @@
+"""Admission control for the upload endpoints.
+
+Every upload endpoint belongs to an admission class (``submit``,
+``upload`` for resumable-upload chunks, or ``verify``). A request is
+admitted before its body is read, in two steps:
+
+1. **Per-client token bucket** (``ADMISSION_<CLASS>_RATE`` requests per
+   minute, bursts of ``ADMISSION_<CLASS>_BURST``). Clients are told apart
+   by the user ID of a valid Bearer token, or else by remote address
+   (from ``X-Forwarded-For`` when ``TRUSTED_PROXIES`` is set). The rates
+   are off by default.
+   A client over its rate gets ``429`` with the time until its next token
+   in ``Retry-After``.
+2. **Class-wide budget** of ``ADMISSION_<CLASS>_CONCURRENCY`` requests and
+   ``ADMISSION_<CLASS>_MAX_MB`` of declared ``Content-Length`` in flight.
+   When the budget is used up, a request waits in a short queue
+   (``ADMISSION_QUEUE_SIZE`` waiters, ``ADMISSION_QUEUE_TIMEOUT`` seconds).
+   When the queue is full or the wait runs out it gets ``503`` with
+   ``Retry-After``.
+
+Overload therefore costs a rejected request a header parse, instead of a
+spooled 60 MB body, a pooled DB connection and a timeout. A limit of
+``0`` turns that check off.
+"""
+
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+
+from utils.cache import MISSING, TTLCache
+from utils.extensions import get_extension
+from utils.metrics import ADMISSION_DECISIONS, ADMISSION_WAIT
+
+ADMISSION_CLASSES = ('submit', 'upload', 'verify')
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a request is not admitted."""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionBusyError(AdmissionRejected):
+    """The endpoint's concurrency or byte budget is exhausted (503)."""
+
+
+class RateLimitedError(AdmissionRejected):
+    """The client exceeded its request rate (429)."""
+
+    status_code = 429
+
+
+class AdmissionGate:
+    """Bounded concurrency and in-flight bytes with a short FIFO wait queue.
+
+    Args:
+        max_concurrent: Requests admitted at once (0 = unlimited).
+        max_bytes: Sum of admitted request sizes (0 = unlimited). A single
+            request larger than the budget is admitted once nothing else
+            is in flight, so it cannot starve.
+        queue_size: Requests allowed to wait for capacity.
+        queue_timeout: Seconds a request may wait.
+    """
+
+    def __init__(self, max_concurrent: int = 0, max_bytes: int = 0,
+                 queue_size: int = 0, queue_timeout: float = 0.0):
+        self.max_concurrent = max(0, int(max_concurrent))
+        self.max_bytes = max(0, int(max_bytes))
+        self.queue_size = max(0, int(queue_size))
+        self.queue_timeout = max(0.0, float(queue_timeout))
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._bytes = 0
+        self._waiting = []  # FIFO of waiter tickets
+
+    def _fits(self, size: int) -> bool:
+        if self.max_concurrent and self._in_flight >= self.max_concurrent:
+            return False
+        if self.max_bytes and self._in_flight and self._bytes + size > self.max_bytes:
+            return False
+        return True
+
+    def acquire(self, size: int) -> float:
+        """Admit a request of ``size`` bytes; returns the seconds it waited.
+
+        Raises:
+            AdmissionBusyError: If the queue is full or the wait timed out.
+        """
+        with self._cond:
+            if not self._waiting and self._fits(size):
+                self._admit(size)
+                return 0.0
+            if len(self._waiting) >= self.queue_size:
+                raise AdmissionBusyError('Too many uploads in progress', self.queue_timeout or 1)
+
+            ticket = object()
+            self._waiting.append(ticket)
+            started = time.monotonic()
+            deadline = started + self.queue_timeout
+            try:
+                while self._waiting[0] is not ticket or not self._fits(size):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AdmissionBusyError('Timed out waiting for upload capacity',
+                                                 self.queue_timeout or 1)
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()  # the next waiter may now be at the head
+            self._admit(size)
+            return time.monotonic() - started
+
+    def _admit(self, size: int) -> None:
+        self._in_flight += 1
+        self._bytes += size
+
+    def release(self, size: int) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._bytes -= size
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'in_flight': self._in_flight,
+                'bytes_in_flight': self._bytes,
+                'waiting': len(self._waiting),
+                'max_concurrent': self.max_concurrent,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class TokenBuckets:
+    """Per-client token buckets holding at most ``burst`` tokens.
+
+    Idle buckets are dropped once they would have refilled completely, so
+    memory stays bounded by the number of recently active clients.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_clients: int = 100000):
+        self.rate = max(0.0, float(rate_per_minute)) / 60.0
+        self.burst = max(1, int(burst))
+        refill_seconds = self.burst / self.rate if self.rate else 1
+        self._buckets = TTLCache(max_clients, refill_seconds, name='admission_buckets')
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> float:
+        """Take a token for ``client``; returns 0, or the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            tokens, updated = (self.burst, now) if bucket is MISSING else bucket
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets.set(client, (tokens, now))
+                return (1 - tokens) / self.rate
+            self._buckets.set(client, (tokens - 1, now))
+            return 0.0
+
+
+class AdmissionController:
+    """Gate and token buckets of one admission class."""
+
+    def __init__(self, name: str, config):
+        prefix = f'ADMISSION_{name.upper()}_'
+        self.name = name
+        self.gate = AdmissionGate(
+            max_concurrent=config.get(prefix + 'CONCURRENCY', 0),
+            max_bytes=config.get(prefix + 'MAX_MB', 0) * 1024 * 1024,
+            queue_size=config.get('ADMISSION_QUEUE_SIZE', 0),
+            queue_timeout=config.get('ADMISSION_QUEUE_TIMEOUT', 0),
+        )
+        rate = config.get(prefix + 'RATE', 0)
+        self.buckets = TokenBuckets(rate, config.get(prefix + 'BURST', 1)) if rate > 0 else None
+        self.rejected_busy = 0
+        self.rejected_rate = 0
+        self.queued = 0
+
+    def admit(self, client: str, size: int) -> None:
+        if self.buckets is not None:
+            retry_after = self.buckets.take(client)
+            if retry_after:
+                self.rejected_rate += 1
+                ADMISSION_DECISIONS.inc(1, self.name, 'rate_limited')
+                raise RateLimitedError('Too many requests from this client', retry_after)
+        try:
+            waited = self.gate.acquire(size)
+        except AdmissionBusyError:
+            self.rejected_busy += 1
+            ADMISSION_DECISIONS.inc(1, self.name, 'rejected')
+            raise
+        if waited:
+            self.queued += 1
+            ADMISSION_WAIT.observe(waited, self.name)
+        ADMISSION_DECISIONS.inc(1, self.name, 'queued' if waited else 'admitted')
+
+    def stats(self) -> dict:
+        return {
+            **self.gate.stats(),
+            'queued': self.queued,
+            'rejected_busy': self.rejected_busy,
+            'rejected_rate': self.rejected_rate,
+        }
+
+
+def _controllers() -> dict:
+    return get_extension('hashvault_admission', lambda config: {
+        name: AdmissionController(name, config) for name in ADMISSION_CLASSES
+    })
+
+
+def get_admission_stats() -> dict:
+    return {name: controller.stats() for name, controller in _controllers().items()}
+
+
+def _client_key() -> str:
+    from utils.auth_middleware import get_token_user_id
+
+    user_id = get_token_user_id()
+    if user_id is not None:
+        return f'user:{user_id}'
+    return f'ip:{request.remote_addr}'
+
+
+def admission_controlled(name: str):
+    """Decorator admitting a request into admission class ``name`` before the view runs.
+
+    The request's declared ``Content-Length`` (or ``MAX_CONTENT_LENGTH``
+    when it is unknown) counts against the class byte budget until the
+    view returns.
+
+    Raises:
+        RateLimitedError / AdmissionBusyError: handled in ``app.py``.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            controller = _controllers()[name]
+            size = request.content_length
+            if size is None:
+                size = current_app.config.get('MAX_CONTENT_LENGTH') or 0
+            controller.admit(_client_key(), size)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                controller.gate.release(size)
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,168 @@
+"""In-process anchor sequencer with group commit.
+
+Appending to the anchor chain needs the current tip, so concurrent submits
+either collide on ``anchors.block_index`` or have to be serialised. The
+sequencer owns the chain tip in memory and is the only writer in the
+process: request threads enqueue their submission and wait on a future
+while a single background thread drains the queue, anchors everything that
+is pending in one transaction and resolves each future with its record.
+
+In ``merkle`` mode each batch becomes a single block whose hash commits to
+the Merkle root of the batch, so the batch window (``max_batch`` /
+``max_wait``) also decides the tree size.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.db_utils import append_merkle_batch_mysql, append_submissions_mysql
+
+logger = logging.getLogger(__name__)
+
+ANCHOR_MODES = {
+    'chain': append_submissions_mysql,
+    'merkle': append_merkle_batch_mysql,
+}
+
+
+class AnchorTimeoutError(RuntimeError):
+    """Raised when a submission was not anchored in time.
+
+    ``submission_id`` is None when the submission was withdrawn and nothing
+    was stored. Otherwise its batch was already committing and may still
+    anchor it under that ID.
+    """
+
+    def __init__(self, message: str, submission_id: str | None = None):
+        super().__init__(message)
+        self.submission_id = submission_id
+
+
+class AnchorSequencer:
+    """Single-writer queue that appends submissions to the anchor chain.
+
+    Args:
+        config: App config used for database access.
+        max_batch: Maximum submissions committed in one transaction.
+        max_wait: Seconds to keep collecting a batch after the first item
+            arrives. ``0`` commits whatever is already queued.
+        mode: ``chain`` (one block per submission) or ``merkle`` (one block
+            per batch).
+    """
+
+    def __init__(self, config, max_batch: int = 100, max_wait: float = 0.0,
+                 mode: str = 'chain'):
+        if mode not in ANCHOR_MODES:
+            raise ValueError(f"ANCHOR_MODE must be one of {', '.join(ANCHOR_MODES)}")
+        self._config = config
+        self._append_batch = ANCHOR_MODES[mode]
+        self.mode = mode
+        self._max_batch = max(1, int(max_batch))
+        self._max_wait = max(0.0, float(max_wait))
+        self._queue = queue.Queue()
+        self._tip = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.committed = 0
+        self.retries = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='anchor-sequencer', daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, submission: dict) -> Future:
+        """Queue a submission for anchoring.
+
+        Args:
+            submission: Keyword arguments of ``save_submission_mysql``.
+
+        Returns:
+            Future resolved with the saved submission dict.
+        """
+        future = Future()
+        self._ensure_started()
+        self._queue.put((submission, future))
+        return future
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._max_wait
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                self._commit(batch)
+            except Exception:
+                logger.exception('Anchor sequencer failed to commit a batch')
+
+    def _append(self, submissions: list[dict]) -> list[dict]:
+        # A None tip is read and locked inside the append transaction.
+        try:
+            results, self._tip = self._append_batch(self._config, submissions, self._tip)
+        except Exception:
+            # Another process may have extended the chain; retry once against
+            # the locked tip so a concurrent writer cannot win the race again.
+            self.retries += 1
+            self._tip = None
+            results, self._tip = self._append_batch(self._config, submissions, None)
+        return results
+
+    def _commit(self, batch: list) -> None:
+        pending = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+
+        try:
+            results = self._append([item for item, _future in pending])
+        except Exception as exc:
+            self._tip = None
+            if len(pending) == 1:
+                pending[0][1].set_exception(exc)
+                return
+            # Isolate the failing submission so the rest of the batch still lands.
+            for item, future in pending:
+                try:
+                    future.set_result(self._append([item])[0])
+                except Exception as item_exc:
+                    self._tip = None
+                    future.set_exception(item_exc)
+                else:
+                    self.committed += 1
+            return
+
+        self.batches += 1
+        self.committed += len(pending)
+        for (_item, future), result in zip(pending, results):
+            future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'queued': self._queue.qsize(),
+            'batches': self.batches,
+            'committed': self.committed,
+            'retries': self.retries,
+            'chain_tip': self._tip[0] if self._tip else None,
+        }
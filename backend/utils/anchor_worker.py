@@ -0,0 +1,119 @@
+"""Background anchoring of pending submissions (``ANCHOR_ASYNC``).
+
+In asynchronous mode ``/api/submit`` stores the submission with status
+``pending`` and returns at once. A worker thread in each process then
+anchors pending rows in insertion order, in batches of up to ``max_batch``
+(one block per submission in ``chain`` mode, one Merkle block per batch
+in ``merkle`` mode).
+
+A submit wakes the worker straight away. It also polls every
+``poll_interval`` seconds, which picks up rows written by other processes
+and rows left pending by a crash or restart. Workers in different processes
+take turns on the chain-tip row lock (see ``anchor_pending_mysql``).
+"""
+
+import logging
+import threading
+import time
+
+from utils.db_utils import anchor_pending_mysql, count_pending_submissions_mysql
+
+logger = logging.getLogger(__name__)
+
+
+class AnchorWorker:
+    """Thread that drains pending submissions onto the anchor chain.
+
+    Args:
+        config: App config used for database access.
+        max_batch: Maximum submissions anchored in one transaction.
+        poll_interval: Seconds between checks for pending rows when idle.
+        mode: ``chain`` or ``merkle`` (see ``ANCHOR_MODE``).
+    """
+
+    def __init__(self, config, max_batch: int = 100, poll_interval: float = 1.0,
+                 mode: str = 'chain'):
+        self._config = config
+        self._max_batch = max(1, int(max_batch))
+        self._poll_interval = max(0.05, float(poll_interval))
+        self.mode = mode
+        self._wake = threading.Event()
+        self._progress = threading.Condition()
+        self._generation = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.anchored = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='anchor-worker', daemon=True)
+                self._thread.start()
+
+    def wake(self) -> None:
+        """Ask the worker to look for pending submissions now."""
+        self.start()
+        self._wake.set()
+
+    def wait_for_progress(self, timeout: float) -> bool:
+        """Block until this worker anchors a batch, or ``timeout`` passes."""
+        with self._progress:
+            generation = self._generation
+            return self._progress.wait_for(lambda: self._generation != generation, timeout)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self._poll_interval)
+            self._wake.clear()
+            try:
+                self._drain()
+            except Exception:
+                self.failures += 1
+                logger.exception('Anchor worker failed; retrying in %.1fs', self._poll_interval)
+
+    def _drain(self) -> None:
+        while True:
+            anchored = anchor_pending_mysql(self._config, self._max_batch, self.mode)
+            if not anchored:
+                return
+            self.batches += 1
+            self.anchored += len(anchored)
+            with self._progress:
+                self._generation += 1
+                self._progress.notify_all()
+
+    def stats(self) -> dict:
+        try:
+            pending = count_pending_submissions_mysql(self._config)
+        except Exception:
+            pending = None
+        return {
+            'mode': self.mode,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'pending': pending,
+            'batches': self.batches,
+            'anchored': self.anchored,
+            'failures': self.failures,
+        }
+
+
+def wait_until_anchored(worker: AnchorWorker, is_pending, timeout: float,
+                        recheck: float = 1.0) -> bool:
+    """Wait up to ``timeout`` seconds for ``is_pending()`` to turn false.
+
+    Rechecks after every local batch and at least every ``recheck`` seconds,
+    because another process may anchor the row. Returns the final
+    ``is_pending()`` result.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        pending = is_pending()
+        remaining = deadline - time.monotonic()
+        if not pending or remaining <= 0:
+            return pending
+        worker.wait_for_progress(min(remaining, recheck))
@@ -1,11 +1,92 @@
-"""JWT authentication middleware."""
+"""JWT authentication middleware.
 
+Decoded token payloads and resolved users are cached per process so the
+authenticated hot path needs neither a signature check nor a DB round-trip.
+Token entries live until the token's ``exp`` (capped by
+``AUTH_TOKEN_CACHE_TTL``); user entries live for ``AUTH_USER_CACHE_TTL`` and
+are dropped explicitly when a user is created. Users cannot be changed or
+deleted yet; whatever adds that must call ``invalidate_user`` too, or a
+changed user is served stale for up to ``AUTH_USER_CACHE_TTL``.
+"""
+
+import hmac
+import time
 from functools import wraps
 
 import jwt
 from flask import current_app, g, jsonify, request
 
+from utils.cache import MISSING, TTLCache
 from utils.db_utils import get_user_by_id_mysql
+from utils.extensions import get_extension
+
+
+def _auth_caches() -> tuple[TTLCache, TTLCache]:
+    """Return the app's ``(token_cache, user_cache)``, creating them on first use."""
+    return get_extension('hashvault_auth_caches', lambda config: (
+        TTLCache(config.get('AUTH_TOKEN_CACHE_SIZE', 10000),
+                 config.get('AUTH_TOKEN_CACHE_TTL', 900), name='auth_tokens'),
+        TTLCache(config.get('AUTH_USER_CACHE_SIZE', 10000),
+                 config.get('AUTH_USER_CACHE_TTL', 300), name='auth_users'),
+    ))
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a cached user after it is created, changed or deleted.
+
+    Signup is currently the only write to ``users``.
+    """
+    _auth_caches()[1].invalidate(user_id)
+
+
+def get_auth_cache_stats() -> dict:
+    token_cache, user_cache = _auth_caches()
+    return {'tokens': token_cache.stats(), 'users': user_cache.stats()}
+
+
+def _decode_token(token: str) -> dict:
+    """Decode a JWT, reusing the cached payload while the token is unexpired.
+
+    Raises:
+        jwt.InvalidTokenError: (or a subclass) for invalid or expired tokens.
+    """
+    token_cache = _auth_caches()[0]
+    payload = token_cache.get(token)
+    if payload is not MISSING:
+        return payload
+
+    payload = jwt.decode(
+        token,
+        current_app.config['JWT_SECRET'],
+        algorithms=['HS256'],
+    )
+    exp = payload.get('exp')
+    if exp is not None:
+        remaining = float(exp) - time.time()
+        token_cache.set(token, payload, ttl=min(remaining, token_cache.ttl))
+    return payload
+
+
+def _resolve_user(user_id) -> dict | None:
+    user_cache = _auth_caches()[1]
+    user = user_cache.get(user_id)
+    if user is MISSING:
+        user = get_user_by_id_mysql(current_app.config, user_id)
+        if not user:
+            return user
+        user_cache.set(user_id, user)
+    return dict(user)  # callers may annotate g.current_user
+
+
+def get_token_user_id():
+    """Return the user ID of a valid Bearer token on the request, or None."""
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    try:
+        return _decode_token(auth_header[7:]).get('user_id')
+    except jwt.InvalidTokenError:
+        return None
 
 
 def auth_required(f):
@@ -24,17 +105,13 @@ def auth_required(f):
         token = auth_header[7:]  # strip "Bearer "
 
         try:
-            payload = jwt.decode(
-                token,
-                current_app.config['JWT_SECRET'],
-                algorithms=['HS256'],
-            )
+            payload = _decode_token(token)
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token has expired'}), 401
         except jwt.InvalidTokenError:
             return jsonify({'error': 'Invalid token'}), 401
 
-        user = get_user_by_id_mysql(current_app.config, payload.get('user_id'))
+        user = _resolve_user(payload.get('user_id'))
         if not user:
             return jsonify({'error': 'User not found'}), 401
 
@@ -42,3 +119,30 @@ def auth_required(f):
         return f(*args, **kwargs)
 
     return decorated
+
+
+def has_admin_token() -> bool:
+    """Return True if the request carries the configured ``X-Admin-Token``."""
+    expected = current_app.config.get('ADMIN_TOKEN') or ''
+    if not expected:
+        return False
+    provided = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(provided.encode('utf-8'), expected.encode('utf-8'))
+
+
+def admin_required(f):
+    """Decorator that enforces the ``X-Admin-Token`` header.
+
+    Admin endpoints are disabled (403) unless ``ADMIN_TOKEN`` is configured.
+    """
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not current_app.config.get('ADMIN_TOKEN'):
+            return jsonify({'error': 'Admin API is disabled'}), 403
+        if not has_admin_token():
+            return jsonify({'error': 'Invalid admin token'}), 401
+
+        return f(*args, **kwargs)
+
+    return decorated
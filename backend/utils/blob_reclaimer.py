@@ -0,0 +1,92 @@
+"""Reclaim blobs that no submission references.
+
+Blobs are written before their submission is anchored, so a failed or
+abandoned submit can leave a blob behind, as can a crashed spool in the temp
+directory. The reclaimer walks the blob store in batches, asks MySQL which
+refs are still counted in ``blobs`` and deletes the rest, but only once the
+file is older than the grace period. Deduplicated writes refresh a blob's
+mtime, so a blob that is about to be referenced again is never collected
+while its submission is still in flight. Deletion goes through
+``FilesystemBlobStore.reclaim``, which renames the blob away before its
+final mtime check, so a write that reuses it concurrently either keeps it
+or stores a fresh copy.
+"""
+
+import logging
+import time
+
+from utils.db_utils import get_referenced_blob_refs_mysql
+
+logger = logging.getLogger(__name__)
+
+
+def _touched_since(store, key: str, mtime: float) -> bool:
+    """Re-check a blob in a dry run, in case a new upload reused it."""
+    try:
+        return store.mtime(key) > mtime
+    except FileNotFoundError:
+        return False
+
+
+def reclaim_unreferenced_blobs(config, store, grace_seconds: float = 86400,
+                               dry_run: bool = False, batch_size: int = 500) -> dict:
+    """Delete unreferenced blobs and stale temp files older than the grace period.
+
+    Args:
+        config: App config used for database access.
+        store: Blob store supporting ``iter_blobs`` (the filesystem backend).
+        grace_seconds: Minimum age before an unreferenced file is deleted.
+        dry_run: Only report what would be deleted.
+        batch_size: Blob refs looked up per query.
+
+    Returns:
+        Counters: ``scanned``, ``referenced``, ``reclaimed``, ``reclaimed_bytes``,
+        ``skipped_recent`` and ``temp_files_removed``.
+    """
+    if not hasattr(store, 'iter_blobs'):
+        raise RuntimeError('The configured blob store cannot be scanned for reclaiming')
+
+    cutoff = time.time() - grace_seconds
+    stats = {
+        'scanned': 0,
+        'referenced': 0,
+        'reclaimed': 0,
+        'reclaimed_bytes': 0,
+        'skipped_recent': 0,
+        'temp_files_removed': 0,
+        'dry_run': dry_run,
+    }
+
+    def process(batch: list[tuple]) -> None:
+        referenced = get_referenced_blob_refs_mysql(
+            config, [store.make_ref(key) for key, _size, _mtime in batch]
+        )
+        for key, size, mtime in batch:
+            if store.make_ref(key) in referenced:
+                stats['referenced'] += 1
+            elif mtime > cutoff or (
+                _touched_since(store, key, mtime) if dry_run else not store.reclaim(key, mtime)
+            ):
+                stats['skipped_recent'] += 1
+            else:
+                logger.info('Reclaimed unreferenced blob %s (%d bytes)', key, size)
+                stats['reclaimed'] += 1
+                stats['reclaimed_bytes'] += size
+
+    batch = []
+    for entry in store.iter_blobs():
+        stats['scanned'] += 1
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            process(batch)
+            batch = []
+    if batch:
+        process(batch)
+
+    for path, mtime in store.iter_temp_files():
+        if mtime <= cutoff:
+            if not dry_run:
+                store.discard_temp_file(path)
+            stats['temp_files_removed'] += 1
+
+    return stats
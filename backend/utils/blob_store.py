@@ -0,0 +1,429 @@
+"""Blob storage backends for submitted file contents.
+
+Blobs are content-addressed by their SHA-256 ``file_hash``. MySQL keeps only
+a ``blob_ref`` string of the form ``<scheme>:<key>`` that names the backend
+holding the bytes. Filesystem keys of compressed blobs carry the codec as a
+suffix (``<file_hash>.gz``); see ``utils.compression``.
+"""
+
+import io
+import mmap
+import os
+import re
+import uuid
+
+from utils.compression import (
+    CODECS,
+    DEFAULT_COMPRESSION,
+    MIN_SAVINGS,
+    compress_file,
+    compressed_key,
+    compression_for,
+    open_reader,
+    parse_compression_rules,
+    split_key,
+    uncompressed_size,
+)
+from utils.db_utils import get_legacy_blob_size_mysql, read_legacy_blob_chunk_mysql
+from utils.hash_utils import copy_and_hash
+
+_BLOB_KEY = re.compile(
+    r'^[0-9a-f]{64}(?:%s)?$' % '|'.join(re.escape(suffix) for suffix, _l, _r in CODECS.values())
+)
+
+FSYNC_POLICIES = ('always', 'file', 'never')
+
+
+def split_blob_ref(blob_ref: str) -> tuple[str, str]:
+    """Split a ``scheme:key`` blob reference into its parts."""
+    scheme, sep, key = (blob_ref or '').partition(':')
+    if not sep or not scheme or not key:
+        raise ValueError(f'Invalid blob reference: {blob_ref!r}')
+    return scheme, key
+
+
+class BlobStore:
+    """Interface implemented by every blob backend."""
+
+    scheme = ''
+
+    def make_ref(self, key: str) -> str:
+        return f'{self.scheme}:{key}'
+
+    def put_bytes(self, file_hash: str, data: bytes, filename: str | None = None) -> str:
+        """Store ``data`` under ``file_hash`` and return its blob reference.
+
+        ``filename`` lets the backend pick an encoding for the file type.
+        """
+        raise NotImplementedError
+
+    def put_stream(self, stream, chunk_size: int = 1024 * 1024,
+                   filename: str | None = None) -> tuple[str, str, int]:
+        """Store a binary stream, hashing it on the way.
+
+        Returns:
+            Tuple of (blob_ref, file_hash, file_size).
+        """
+        raise NotImplementedError
+
+    def open(self, key: str):
+        """Open a stored blob for binary reading."""
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> str | None:
+        """Filesystem path of a blob, for zero-copy serving, if it has one."""
+        return None
+
+
+class FilesystemBlobStore(BlobStore):
+    """Content-addressed blobs in sharded directories on local disk.
+
+    ``<root>/ab/cd/abcd...`` holds the blob whose hash starts with ``abcd``.
+    Writes go to ``<root>/tmp`` first and are renamed into place, so readers
+    never observe a partially written blob.
+
+    Args:
+        root: Directory holding the blobs.
+        fsync: One of ``FSYNC_POLICIES``.
+        compression: Extension to ``(codec, level)`` rules, as returned by
+            ``parse_compression_rules``. Files of other types are stored raw.
+    """
+
+    scheme = 'fs'
+
+    def __init__(self, root: str, fsync: str = 'always', compression: dict | None = None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'BLOB_FSYNC must be one of {", ".join(FSYNC_POLICIES)}')
+        self.root = os.path.abspath(root)
+        self.tmp_dir = os.path.join(self.root, 'tmp')
+        self.fsync = fsync
+        self.compression = compression or {}
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        if not _BLOB_KEY.match(key):
+            raise ValueError(f'Invalid blob key: {key!r}')
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def find(self, file_hash: str) -> str | None:
+        """Return the key of the stored blob with ``file_hash`` in any encoding."""
+        for key in [file_hash] + [compressed_key(file_hash, codec) for codec in CODECS]:
+            if os.path.exists(self._path(key)):
+                return key
+        return None
+
+    def _fsync_dir(self, path: str) -> None:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return  # Directories cannot be opened on some platforms (Windows).
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def new_temp_file(self):
+        """Open a fresh temporary file inside the store for spooling."""
+        path = os.path.join(self.tmp_dir, f'{uuid.uuid4().hex}.part')
+        return open(path, 'xb+'), path
+
+    def commit_temp_file(self, temp_path: str, file_hash: str,
+                         filename: str | None = None) -> str:
+        """Atomically move a fully written temp file into place.
+
+        The temp file must already be flushed. If a blob with the same hash
+        exists (in any encoding) it is kept and the temp file is discarded.
+        Otherwise the file is compressed when ``filename`` has a compressible
+        extension, fsynced if the policy asks for it and renamed into place.
+        """
+        existing = self.find(file_hash)
+        if existing and self._touch(self._path(existing)):
+            os.unlink(temp_path)
+            return self.make_ref(existing)
+
+        key, temp_path = self._encode(temp_path, file_hash, filename)
+        final_path = self._path(key)
+        if self.fsync != 'never':
+            self._fsync_file(temp_path)
+        final_dir = os.path.dirname(final_path)
+        os.makedirs(final_dir, exist_ok=True)
+        os.replace(temp_path, final_path)
+        if self.fsync == 'always':
+            self._fsync_dir(final_dir)
+        return self.make_ref(key)
+
+    def _encode(self, temp_path: str, file_hash: str, filename: str | None) -> tuple[str, str]:
+        """Compress a temp file if its type calls for it.
+
+        Returns:
+            Tuple of (blob key, temp file to commit under that key).
+        """
+        compression = compression_for(filename, self.compression)
+        if compression is None:
+            return file_hash, temp_path
+
+        codec, level = compression
+        fileobj, packed_path = self.new_temp_file()
+        try:
+            with fileobj:
+                packed_size = compress_file(temp_path, fileobj, codec, level)
+        except BaseException:
+            self.discard_temp_file(packed_path)
+            raise
+        if packed_size > os.path.getsize(temp_path) * (1 - MIN_SAVINGS):
+            self.discard_temp_file(packed_path)  # not worth decompressing on every read
+            return file_hash, temp_path
+        os.unlink(temp_path)
+        return compressed_key(file_hash, codec), packed_path
+
+    def _fsync_file(self, path: str) -> None:
+        with open(path, 'rb') as fileobj:
+            os.fsync(fileobj.fileno())
+
+    def _touch(self, path: str) -> bool:
+        """Restart the reclaim grace period of a blob a deduplicated write reuses.
+
+        Returns False if the blob is gone (e.g. just reclaimed); the caller
+        must then write its own copy.
+        """
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        except OSError:
+            pass
+        return True
+
+    def discard_temp_file(self, temp_path: str) -> None:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+
+    def sync_file(self, fileobj) -> None:
+        """Flush ``fileobj`` and fsync it according to the store policy."""
+        fileobj.flush()
+        if self.fsync != 'never':
+            os.fsync(fileobj.fileno())
+
+    def put_bytes(self, file_hash: str, data: bytes, filename: str | None = None) -> str:
+        existing = self.find(file_hash)
+        if existing and self._touch(self._path(existing)):
+            return self.make_ref(existing)
+        fileobj, temp_path = self.new_temp_file()
+        try:
+            with fileobj:
+                fileobj.write(data)
+            return self.commit_temp_file(temp_path, file_hash, filename)
+        except BaseException:
+            self.discard_temp_file(temp_path)
+            raise
+
+    def put_stream(self, stream, chunk_size: int = 1024 * 1024,
+                   filename: str | None = None) -> tuple[str, str, int]:
+        fileobj, temp_path = self.new_temp_file()
+        try:
+            with fileobj:
+                file_hash, size = copy_and_hash(stream, fileobj, chunk_size)
+            return self.commit_temp_file(temp_path, file_hash, filename), file_hash, size
+        except BaseException:
+            self.discard_temp_file(temp_path)
+            raise
+
+    def open(self, key: str):
+        """Open a blob; compressed blobs are decompressed as they are read."""
+        _file_hash, codec = split_key(key)
+        if codec:
+            return open_reader(codec, self._path(key))
+        return open(self._path(key), 'rb')
+
+    def map(self, key: str):
+        """Memory-map a blob read-only; returns ``b''`` for empty blobs.
+
+        Compressed blobs cannot be mapped and are returned decompressed.
+        """
+        if split_key(key)[1]:
+            with self.open(key) as fileobj:
+                return fileobj.read()
+        with open(self._path(key), 'rb') as fileobj:
+            if os.fstat(fileobj.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def size(self, key: str) -> int:
+        """Size of the original file. For compressed blobs this decompresses
+        the whole blob, so callers that know the size should use it instead."""
+        _file_hash, codec = split_key(key)
+        if codec:
+            return uncompressed_size(codec, self._path(key))
+        return os.path.getsize(self._path(key))
+
+    def mtime(self, key: str) -> float:
+        return os.path.getmtime(self._path(key))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def reclaim(self, key: str, mtime: float) -> bool:
+        """Delete a blob unless a deduplicated write touched it after ``mtime``.
+
+        The blob is first renamed to a tombstone in the temp directory. A
+        write that reuses it from then on finds it missing and stores its
+        own copy; one that touched it just before the rename shows up in
+        the tombstone's mtime, and the blob is put back.
+
+        Returns:
+            True if the blob was deleted.
+        """
+        path = self._path(key)
+        tombstone = os.path.join(self.tmp_dir, f'{key}.{uuid.uuid4().hex}.reclaim')
+        try:
+            os.replace(path, tombstone)
+        except FileNotFoundError:
+            return False
+        if os.path.getmtime(tombstone) > mtime:
+            try:
+                os.link(tombstone, path)
+            except FileExistsError:
+                pass  # a write already stored a fresh copy
+            os.unlink(tombstone)
+            return False
+        os.unlink(tombstone)
+        return True
+
+    def local_path(self, key: str) -> str | None:
+        if split_key(key)[1]:
+            return None  # the file on disk is not the original bytes
+        return self._path(key)
+
+    def iter_blobs(self):
+        """Yield ``(key, stored size, mtime)`` for every stored blob."""
+        for shard in sorted(os.listdir(self.root)):
+            if len(shard) != 2 or not os.path.isdir(os.path.join(self.root, shard)):
+                continue
+            for sub_shard in sorted(os.listdir(os.path.join(self.root, shard))):
+                directory = os.path.join(self.root, shard, sub_shard)
+                if not os.path.isdir(directory):
+                    continue
+                for key in sorted(os.listdir(directory)):
+                    if not _BLOB_KEY.match(key):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(directory, key))
+                    except FileNotFoundError:
+                        continue
+                    yield key, stat.st_size, stat.st_mtime
+
+    def iter_temp_files(self):
+        """Yield ``(path, mtime)`` for spool files left in the temp directory."""
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            try:
+                yield path, os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+
+
+class _LegacyBlobReader(io.RawIOBase):
+    """Reads a ``submissions.file_blob`` value in bounded chunks."""
+
+    def __init__(self, read_chunk, size: int):
+        self._read_chunk = read_chunk
+        self._size = size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        remaining = self._size - self._pos
+        if remaining <= 0:
+            return 0
+        length = min(len(buffer), remaining)
+        data = self._read_chunk(self._pos, length)
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+class MySQLLegacyBlobStore(BlobStore):
+    """Read-only access to blobs stored in the ``submissions.file_blob`` column.
+
+    Keys are submission IDs. Data is fetched with ``SUBSTRING`` in chunks so a
+    large LONGBLOB is never materialised in memory at once.
+    """
+
+    scheme = 'mysql'
+
+    def __init__(self, config, chunk_size: int = 1024 * 1024):
+        self.config = config
+        self.chunk_size = chunk_size
+
+    def put_bytes(self, file_hash: str, data: bytes, filename: str | None = None) -> str:
+        raise RuntimeError('The MySQL blob backend is read-only')
+
+    def open(self, key: str):
+        def read_chunk(offset: int, length: int) -> bytes:
+            return read_legacy_blob_chunk_mysql(self.config, key, offset, length)
+
+        return io.BufferedReader(
+            _LegacyBlobReader(read_chunk, self.size(key)),
+            buffer_size=self.chunk_size,
+        )
+
+    def size(self, key: str) -> int:
+        size = get_legacy_blob_size_mysql(self.config, key)
+        if size is None:
+            raise FileNotFoundError(key)
+        return size
+
+    def exists(self, key: str) -> bool:
+        return get_legacy_blob_size_mysql(self.config, key) is not None
+
+    def delete(self, key: str) -> None:
+        raise RuntimeError('The MySQL blob backend is read-only')
+
+
+def create_blob_store(config) -> BlobStore:
+    """Build the writable blob store selected by ``BLOB_STORAGE_BACKEND``."""
+    backend = (config.get('BLOB_STORAGE_BACKEND') or 'filesystem').lower()
+    if backend == 'filesystem':
+        return FilesystemBlobStore(
+            config.get('BLOB_STORAGE_DIR'),
+            fsync=(config.get('BLOB_FSYNC') or 'always').lower(),
+            compression=parse_compression_rules(
+                config.get('BLOB_COMPRESSION', DEFAULT_COMPRESSION)
+            ),
+        )
+    raise RuntimeError(f"Unknown BLOB_STORAGE_BACKEND '{backend}'")
@@ -0,0 +1,122 @@
+"""Small thread-safe in-process caches."""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+def approximate_size(value) -> int:
+    """Rough memory footprint of a cached value in bytes.
+
+    Counts the container plus its direct keys and values, which is accurate
+    enough for flat rows such as submission dicts.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a TTL.
+
+    Entries can carry their own TTL (e.g. a JWT payload that is only valid
+    until its ``exp``). With ``max_bytes`` set, the approximate size of the
+    cached values is also bounded and least recently used entries are
+    evicted to stay under it. Lookups, evictions and expirations are
+    counted for ``stats()``.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0, name: str = '',
+                 max_bytes: int | None = None, sizeof=approximate_size):
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self._sizeof = sizeof
+        self._data = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=MISSING):
+        """Return the cached value, or ``default`` if absent or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value, size = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        size = self._sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (time.monotonic() + ttl, value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes and self._bytes > self.max_bytes
+            ):
+                _key, (_expires_at, _value, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def keys(self) -> list:
+        """Snapshot of the cached keys, oldest first (expired ones included)."""
+        with self._lock:
+            return list(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes if self.max_bytes else None,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -0,0 +1,267 @@
+"""Incremental, checkpointed audit of the anchor chain.
+
+Anchors are streamed in block order with a server-side cursor and cut into
+contiguous segments. Each segment is re-hashed in a worker process; the
+parent only checks that neighbouring segments link up. A successful audit
+records an HMAC-signed checkpoint of the verified tip so the next run only
+needs to check blocks appended since then.
+"""
+
+import hashlib
+import hmac
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from utils.db_utils import (
+    _build_anchor_hash,
+    get_anchor_mysql,
+    get_chain_tip_mysql,
+    get_latest_audit_checkpoint_mysql,
+    iter_anchors_mysql,
+    save_audit_checkpoint_mysql,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _signing_key(config) -> bytes:
+    key = config.get('AUDIT_SIGNING_KEY') or config.get('SECRET_KEY') or ''
+    return key.encode('utf-8')
+
+
+def sign_checkpoint(config, block_index: int, anchor_hash: str, verified_at: datetime) -> str:
+    message = f"{block_index}|{anchor_hash}|{verified_at.isoformat()}".encode('utf-8')
+    return hmac.new(_signing_key(config), message, hashlib.sha256).hexdigest()
+
+
+def verify_segment(rows: list[tuple]) -> dict:
+    """Re-hash a contiguous run of anchor rows.
+
+    Runs in a worker process, so it only takes and returns plain data.
+
+    Returns:
+        ``{'first': (index, prev_hash), 'last': (index, hash), 'broken': None |
+        {'block_index', 'reason'}}``
+    """
+    broken = None
+    prev_index = None
+    prev_hash = None
+    for block_index, submission_id, file_hash, anchored_at, prev_anchor_hash, anchor_hash in rows:
+        if prev_index is not None and block_index != prev_index + 1:
+            broken = {'block_index': prev_index + 1, 'reason': 'missing block'}
+            break
+        if prev_index is not None and prev_anchor_hash != prev_hash:
+            broken = {'block_index': block_index, 'reason': 'previous anchor hash mismatch'}
+            break
+        expected = _build_anchor_hash(
+            block_index=block_index,
+            submission_id=submission_id,
+            file_hash=file_hash,
+            anchored_at=anchored_at,
+            prev_anchor_hash=prev_anchor_hash,
+        )
+        if expected != anchor_hash:
+            broken = {'block_index': block_index, 'reason': 'anchor hash mismatch'}
+            break
+        prev_index, prev_hash = block_index, anchor_hash
+
+    first = rows[0]
+    return {
+        'first': (first[0], first[4]),
+        'last': (prev_index, prev_hash),
+        'broken': broken,
+    }
+
+
+class AuditProgress:
+    """Thread-safe progress record shared with the admin endpoint."""
+
+    def __init__(self, on_update=None):
+        self._lock = threading.Lock()
+        self._state = {'status': 'idle'}
+        self._on_update = on_update
+
+    def update(self, **fields) -> None:
+        with self._lock:
+            self._state.update(fields)
+            state = dict(self._state)
+        if self._on_update:
+            self._on_update(state)
+
+    def reset(self, **fields) -> None:
+        with self._lock:
+            self._state = dict(fields)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._state)
+
+
+def _load_checkpoint(config) -> tuple[int, str | None, str | None]:
+    """Return ``(block_index, anchor_hash, problem)`` of the usable checkpoint."""
+    checkpoint = get_latest_audit_checkpoint_mysql(config)
+    if not checkpoint:
+        return 0, None, None
+
+    expected = sign_checkpoint(
+        config, int(checkpoint['block_index']), checkpoint['anchor_hash'], checkpoint['verified_at']
+    )
+    if not hmac.compare_digest(expected, checkpoint['signature']):
+        return 0, None, 'checkpoint signature is invalid'
+
+    block = get_anchor_mysql(config, int(checkpoint['block_index']))
+    if not block or block['anchor_hash'] != checkpoint['anchor_hash']:
+        return 0, None, 'checkpointed block no longer matches'
+
+    return int(checkpoint['block_index']), checkpoint['anchor_hash'], None
+
+
+def run_audit(config, full: bool = False, progress: AuditProgress | None = None,
+              workers: int | None = None, segment_size: int | None = None) -> dict:
+    """Verify the anchor chain and record a checkpoint when it is intact.
+
+    Args:
+        config: App config (dict-like).
+        full: Ignore checkpoints and re-verify from the genesis block.
+        progress: Optional progress record updated while running.
+        workers: Worker processes (``AUDIT_WORKERS``); ``1`` verifies inline.
+        segment_size: Blocks per segment (``AUDIT_SEGMENT_SIZE``).
+
+    Returns:
+        Final progress dict, including ``first_broken`` when the chain is broken.
+    """
+    progress = progress or AuditProgress()
+    workers = int(workers or config.get('AUDIT_WORKERS') or os.cpu_count() or 1)
+    segment_size = int(segment_size or config.get('AUDIT_SEGMENT_SIZE') or 10000)
+
+    start_index, start_hash, checkpoint_problem = 0, None, None
+    if not full:
+        start_index, start_hash, checkpoint_problem = _load_checkpoint(config)
+    tip_index, _tip_hash = get_chain_tip_mysql(config)
+
+    progress.reset(
+        status='running',
+        mode='full' if full or start_index == 0 else 'incremental',
+        started_at=datetime.now(timezone.utc).isoformat(),
+        start_block=start_index + 1,
+        tip_block=tip_index,
+        blocks_checked=0,
+        first_broken=None,
+        checkpoint_warning=checkpoint_problem,
+    )
+
+    expected_index = start_index + 1
+    expected_prev = start_hash
+    last_index, last_hash = start_index, start_hash
+    checked = 0
+    first_broken = None
+
+    def check_result(result: dict, size: int) -> bool:
+        nonlocal expected_index, expected_prev, last_index, last_hash, checked, first_broken
+        first_index, first_prev = result['first']
+        if first_index != expected_index:
+            first_broken = {'block_index': expected_index, 'reason': 'missing block'}
+        elif first_prev != expected_prev:
+            first_broken = {'block_index': first_index, 'reason': 'previous anchor hash mismatch'}
+        elif result['broken']:
+            first_broken = result['broken']
+        if first_broken:
+            progress.update(first_broken=first_broken)
+            return False
+        last_index, last_hash = result['last']
+        expected_index, expected_prev = last_index + 1, last_hash
+        checked += size
+        progress.update(blocks_checked=checked, verified_through=last_index)
+        return True
+
+    def segments():
+        segment = []
+        for row in iter_anchors_mysql(config, after_block_index=start_index):
+            segment.append(tuple(row))
+            if len(segment) >= segment_size:
+                yield segment
+                segment = []
+        if segment:
+            yield segment
+
+    segment_iter = segments()
+    try:
+        if workers <= 1:
+            for segment in segment_iter:
+                if not check_result(verify_segment(segment), len(segment)):
+                    break
+        else:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                in_flight = deque()
+                for segment in segment_iter:
+                    in_flight.append((pool.submit(verify_segment, segment), len(segment)))
+                    # Bound memory: at most two segments per worker in flight.
+                    if len(in_flight) >= workers * 2:
+                        future, size = in_flight.popleft()
+                        if not check_result(future.result(), size):
+                            break
+                while in_flight and not first_broken:
+                    future, size = in_flight.popleft()
+                    check_result(future.result(), size)
+                for future, _size in in_flight:
+                    future.cancel()
+    except Exception as exc:
+        logger.exception('Chain audit failed')
+        progress.update(status='error', error=str(exc),
+                        finished_at=datetime.now(timezone.utc).isoformat())
+        return progress.snapshot()
+    finally:
+        segment_iter.close()
+
+    if first_broken:
+        progress.update(status='broken', finished_at=datetime.now(timezone.utc).isoformat())
+        return progress.snapshot()
+
+    checkpoint = None
+    if last_index > start_index:
+        verified_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        signature = sign_checkpoint(config, last_index, last_hash, verified_at)
+        save_audit_checkpoint_mysql(config, last_index, last_hash, checked, verified_at, signature)
+        checkpoint = {'block_index': last_index, 'anchor_hash': last_hash}
+
+    progress.update(
+        status='ok',
+        checkpoint=checkpoint,
+        verified_through=last_index,
+        finished_at=datetime.now(timezone.utc).isoformat(),
+    )
+    return progress.snapshot()
+
+
+_audit_progress = AuditProgress()
+_audit_lock = threading.Lock()
+
+
+def start_background_audit(config, full: bool = False) -> bool:
+    """Start an audit thread unless one is already running.
+
+    Returns:
+        True if a new audit was started.
+    """
+    if not _audit_lock.acquire(blocking=False):
+        return False
+
+    def target():
+        try:
+            run_audit(config, full=full, progress=_audit_progress)
+        finally:
+            _audit_lock.release()
+
+    _audit_progress.reset(status='starting')
+    threading.Thread(target=target, name='chain-audit', daemon=True).start()
+    return True
+
+
+def get_audit_progress() -> dict:
+    return _audit_progress.snapshot()
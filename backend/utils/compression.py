@@ -0,0 +1,143 @@
+"""Transparent compression of stored blobs.
+
+Text-like uploads (source files, CSV, JSON, Markdown) typically shrink 5-10x,
+so the filesystem blob store compresses them once, when a finished upload is
+committed. The codec and level are chosen per file extension; formats that
+are already compressed (zip, png, jpg, docx, ...) are never listed and are
+stored as-is. A blob that does not shrink by at least ``MIN_SAVINGS`` is
+stored raw as well.
+
+The codec is recorded as a suffix of the blob key, e.g.
+``fs:<sha256>.gz``, so readers know how to decode a blob without a database
+lookup and blobs written before compression existed keep working unchanged.
+The SHA-256 of a blob is always that of the original bytes.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+
+# codec -> (key suffix, default level, valid levels)
+CODECS = {
+    'gzip': ('.gz', 6, range(1, 10)),
+    'bz2': ('.bz2', 9, range(1, 10)),
+    'xz': ('.xz', 6, range(0, 10)),
+}
+
+DEFAULT_COMPRESSION = 'txt,md,csv,json,py,js,html,css=gzip:6'
+
+# Keep the compressed copy only if it saves at least this fraction.
+MIN_SAVINGS = 0.1
+
+
+def parse_compression_rules(spec: str | None) -> dict[str, tuple[str, int]]:
+    """Parse a ``BLOB_COMPRESSION`` setting.
+
+    The format is ``ext[,ext...]=codec[:level]`` groups separated by ``;``,
+    e.g. ``txt,md,json=gzip:6;csv=xz:6``. ``off`` (or an empty value)
+    disables compression.
+
+    Returns:
+        Mapping of lower-case extension to ``(codec, level)``.
+
+    Raises:
+        ValueError: If a group, codec or level is invalid.
+    """
+    spec = (spec or '').strip()
+    if spec.lower() in ('', 'off', 'none', 'false'):
+        return {}
+
+    rules = {}
+    for group in filter(None, (part.strip() for part in spec.split(';'))):
+        extensions, sep, codec_spec = group.partition('=')
+        codec, _sep, level = codec_spec.strip().lower().partition(':')
+        if not sep or codec not in CODECS:
+            raise ValueError(
+                f"Invalid BLOB_COMPRESSION group {group!r}; expected ext,...=codec[:level] "
+                f"with codec one of {', '.join(CODECS)}"
+            )
+        _suffix, default_level, levels = CODECS[codec]
+        try:
+            level = int(level) if level else default_level
+        except ValueError:
+            level = None
+        if level not in levels:
+            raise ValueError(f"Invalid compression level in BLOB_COMPRESSION group {group!r}")
+        for ext in extensions.split(','):
+            ext = ext.strip().lower().lstrip('.')
+            if ext:
+                rules[ext] = (codec, level)
+    return rules
+
+
+def compression_for(filename: str | None, rules: dict) -> tuple[str, int] | None:
+    """Return the ``(codec, level)`` to store ``filename`` with, or None."""
+    if not filename or '.' not in filename:
+        return None
+    return rules.get(filename.rsplit('.', 1)[1].lower())
+
+
+def compressed_key(file_hash: str, codec: str) -> str:
+    return file_hash + CODECS[codec][0]
+
+
+def split_key(key: str) -> tuple[str, str | None]:
+    """Split a blob key into ``(file_hash, codec or None)``."""
+    file_hash, dot, suffix = key.partition('.')
+    if not dot:
+        return key, None
+    for codec, (codec_suffix, _level, _levels) in CODECS.items():
+        if codec_suffix == dot + suffix:
+            return file_hash, codec
+    raise ValueError(f'Unknown blob encoding: {key!r}')
+
+
+def open_writer(codec: str, fileobj, level: int):
+    """Wrap a binary file so that writes to the result are compressed.
+
+    Closing the writer flushes the codec trailer but leaves ``fileobj`` open.
+    """
+    if codec == 'gzip':
+        # mtime=0 keeps the output deterministic for identical content.
+        return gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=level, mtime=0)
+    if codec == 'bz2':
+        return bz2.BZ2File(fileobj, 'wb', compresslevel=level)
+    if codec == 'xz':
+        return lzma.LZMAFile(fileobj, 'wb', preset=level)
+    raise ValueError(f'Unknown compression codec: {codec!r}')
+
+
+def open_reader(codec: str, path: str):
+    """Open a compressed file as a seekable stream of the original bytes.
+
+    Data is decompressed incrementally as it is read, so memory use does not
+    grow with the size of the blob.
+    """
+    if codec == 'gzip':
+        return gzip.open(path, 'rb')
+    if codec == 'bz2':
+        return bz2.open(path, 'rb')
+    if codec == 'xz':
+        return lzma.open(path, 'rb')
+    raise ValueError(f'Unknown compression codec: {codec!r}')
+
+
+def compress_file(src_path: str, dst_fileobj, codec: str, level: int,
+                  chunk_size: int = 1024 * 1024) -> int:
+    """Compress ``src_path`` into ``dst_fileobj`` and return the compressed size."""
+    with open(src_path, 'rb') as src:
+        with open_writer(codec, dst_fileobj, level) as writer:
+            for chunk in iter(lambda: src.read(chunk_size), b''):
+                writer.write(chunk)
+    dst_fileobj.flush()
+    return os.fstat(dst_fileobj.fileno()).st_size
+
+
+def uncompressed_size(codec: str, path: str, chunk_size: int = 1024 * 1024) -> int:
+    """Size of the original bytes of a compressed blob (decompresses it)."""
+    size = 0
+    with open_reader(codec, path) as reader:
+        for chunk in iter(lambda: reader.read(chunk_size), b''):
+            size += len(chunk)
+    return size
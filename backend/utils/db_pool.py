@@ -0,0 +1,187 @@
+"""Thread-safe database connection pool."""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
+    """Bounded pool of reusable DB-API connections.
+
+    Connections are created lazily up to ``size``. Borrowers wait up to
+    ``timeout`` seconds for a free connection. Idle connections are pinged
+    before reuse when they have been idle longer than ``ping_interval`` and
+    are replaced once they are older than ``recycle`` seconds.
+    """
+
+    def __init__(self, factory, size: int = 10, timeout: float = 10.0,
+                 recycle: float = 3600.0, ping_interval: float = 10.0):
+        self._factory = factory
+        self._size = max(1, int(size))
+        self._timeout = float(timeout)
+        self._recycle = float(recycle)
+        self._ping_interval = float(ping_interval)
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, created_at, returned_at)
+        self._created_at = {}  # id(conn) -> created_at
+        self._open = 0
+        self._in_use = 0
+        self._waiters = 0
+
+        self._acquires = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._failed_checks = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ------------------------------------------------------------------
+
+    def _create(self):
+        try:
+            conn = self._factory()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn) -> None:
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, conn, created_at: float, returned_at: float) -> bool:
+        now = time.monotonic()
+        if self._recycle > 0 and now - created_at > self._recycle:
+            with self._cond:
+                self._recycled += 1
+            return False
+        if now - returned_at >= self._ping_interval:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                with self._cond:
+                    self._failed_checks += 1
+                return False
+        return True
+
+    def acquire(self):
+        """Borrow a connection, waiting up to the pool timeout."""
+        started = time.monotonic()
+        deadline = started + self._timeout
+
+        with self._cond:
+            self._waiters += 1
+            try:
+                while not self._idle and self._open >= self._size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f'Timed out after {self._timeout:.1f}s waiting for a database connection'
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters -= 1
+
+            waited = time.monotonic() - started
+            self._acquires += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._in_use += 1
+
+            if self._idle:
+                conn, created_at, returned_at = self._idle.pop()
+            else:
+                self._open += 1
+                conn = None
+
+        if conn is None:
+            return self._create()
+
+        if self._is_usable(conn, created_at, returned_at):
+            return conn
+
+        # Stale or broken: replace it while keeping the slot.
+        self._discard(conn)
+        return self._create()
+
+    def release(self, conn, discard: bool = False) -> None:
+        """Return a borrowed connection, or close it when ``discard`` is set."""
+        if discard:
+            self._discard(conn)
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._open -= 1
+            else:
+                created_at = self._created_at.get(id(conn), time.monotonic())
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a ``with`` block.
+
+        Any open transaction is rolled back if the block raises; connections
+        that cannot be rolled back are dropped from the pool.
+        """
+        conn = self.acquire()
+        with self.lease(conn):
+            yield conn
+
+    @contextmanager
+    def lease(self, conn):
+        """Return ``conn`` (from ``acquire``) to the pool when the block ends.
+
+        Errors are handled as in ``connection``.
+        """
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                self.release(conn, discard=True)
+            else:
+                self.release(conn)
+            raise
+        self.release(conn)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for conn, _created_at, _returned_at in idle:
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        """Return a snapshot of pool usage counters."""
+        with self._cond:
+            return {
+                'size': self._size,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiters': self._waiters,
+                'acquires': self._acquires,
+                'timeouts': self._timeouts,
+                'recycled': self._recycled,
+                'failed_health_checks': self._failed_checks,
+                'wait_seconds_total': round(self._wait_total, 6),
+                'wait_seconds_max': round(self._wait_max, 6),
+            }
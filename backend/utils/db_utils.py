@@ -1,8 +1,23 @@
-"""MySQL helpers for submission persistence with blockchain-style anchoring."""
+"""Database helpers for submission persistence with blockchain-style anchoring.
 
+Written against MySQL (PyMySQL); with ``DB_ENGINE=sqlite`` the same queries
+run on an embedded SQLite database through ``utils.sqlite_engine``.
+"""
+
+import functools
 import hashlib
+import json
+import threading
+import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone, timedelta
 
+from utils.db_pool import ConnectionPool
+from utils.db_routing import ReplicaSet, parse_replicas, primary_reads, reads_use_primary
+from utils.merkle import build_levels, inclusion_proof, leaf_hash, verify_inclusion
+from utils.metrics import timed_db
+from utils.sqlite_engine import SQLiteConnection
+
 IST = timezone(timedelta(hours=5, minutes=30))
 
 
@@ -26,15 +41,37 @@ def _quote_identifier(name: str) -> str:
     return f"`{name.replace('`', '``')}`"
 
 
-def _open_connection(config, with_database: bool):
+ENGINES = ('mysql', 'sqlite')
+
+
+def _engine(config) -> str:
+    engine = str(_cfg(config, 'DB_ENGINE', 'mysql') or 'mysql').lower()
+    if engine not in ENGINES:
+        raise ValueError(f"DB_ENGINE must be one of {', '.join(ENGINES)}")
+    return engine
+
+
+def _open_sqlite_connection(config):
+    return SQLiteConnection(
+        _cfg(config, 'SQLITE_PATH'),
+        timeout=float(_cfg(config, 'DB_POOL_TIMEOUT', 10)),
+        synchronous=_cfg(config, 'SQLITE_SYNCHRONOUS', 'FULL'),
+    )
+
+
+def _open_connection(config, with_database: bool, autocommit: bool = False,
+                     replica: dict | None = None):
+    if _engine(config) == 'sqlite':
+        return _open_sqlite_connection(config)
     pymysql = _require_pymysql()
+    replica = replica or {}
     params = {
-        'host': _cfg(config, 'DB_HOST'),
-        'port': int(_cfg(config, 'DB_PORT', 3306)),
-        'user': _cfg(config, 'DB_USER'),
-        'password': _cfg(config, 'DB_PASSWORD', ''),
+        'host': replica.get('host') or _cfg(config, 'DB_HOST'),
+        'port': int(replica.get('port') or _cfg(config, 'DB_PORT', 3306)),
+        'user': replica.get('user') or _cfg(config, 'DB_USER'),
+        'password': _first_set(replica.get('password'), _cfg(config, 'DB_PASSWORD', '')),
         'charset': 'utf8mb4',
-        'autocommit': False,
+        'autocommit': autocommit,
         'cursorclass': pymysql.cursors.DictCursor,
     }
     if with_database:
@@ -42,6 +79,156 @@ def _open_connection(config, with_database: bool):
     return pymysql.connect(**params)
 
 
+def _first_set(value, default):
+    return default if value is None else value
+
+
+_pools: dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(config, replica: dict | None = None) -> tuple:
+    if _engine(config) == 'sqlite':
+        return ('sqlite', _cfg(config, 'SQLITE_PATH'))
+    replica = replica or {}
+    return (
+        replica.get('host') or _cfg(config, 'DB_HOST'),
+        int(replica.get('port') or _cfg(config, 'DB_PORT', 3306)),
+        replica.get('user') or _cfg(config, 'DB_USER'),
+        _cfg(config, 'DB_NAME'),
+    )
+
+
+def _get_pool(config, replica: dict | None = None) -> ConnectionPool:
+    key = _pool_key(config, replica)
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # Pooled connections run in autocommit mode so plain reads never
+            # hold a snapshot open while idle; writers call ``conn.begin()``.
+            pool = ConnectionPool(
+                lambda: _open_connection(config, with_database=True, autocommit=True,
+                                         replica=replica),
+                size=int(_cfg(config, 'DB_POOL_SIZE', 10)),
+                timeout=float(_cfg(config, 'DB_POOL_TIMEOUT', 10)),
+                recycle=float(_cfg(config, 'DB_POOL_RECYCLE', 3600)),
+                ping_interval=float(_cfg(config, 'DB_POOL_PING_INTERVAL', 10)),
+            )
+            _pools[key] = pool
+    return pool
+
+
+@contextmanager
+def _connection(config):
+    """Borrow a pooled connection to the configured database."""
+    with _get_pool(config).connection() as conn:
+        yield conn
+
+
+_replica_sets: dict[tuple, ReplicaSet | None] = {}
+
+
+def _get_replicas(config) -> ReplicaSet | None:
+    """Return the read replicas of ``config``, or None when there are none."""
+    key = (_pool_key(config), _cfg(config, 'DB_REPLICAS', ''))
+    if key in _replica_sets:
+        return _replica_sets[key]
+    with _pools_lock:
+        if key not in _replica_sets:
+            replicas = parse_replicas(_cfg(config, 'DB_REPLICAS', ''))
+            if replicas and _engine(config) == 'sqlite':
+                raise ValueError('DB_REPLICAS is not supported with DB_ENGINE=sqlite')
+            _replica_sets[key] = ReplicaSet(
+                replicas,
+                retry_after=float(_cfg(config, 'DB_REPLICA_RETRY', 30)),
+                max_lag=float(_cfg(config, 'DB_REPLICA_MAX_LAG', 0)),
+                check_interval=float(_cfg(config, 'DB_REPLICA_CHECK_INTERVAL', 5)),
+            ) if replicas else None
+    return _replica_sets[key]
+
+
+def _reads_from_replicas(config) -> bool:
+    return not reads_use_primary() and _get_replicas(config) is not None
+
+
+@contextmanager
+def _read_connection(config):
+    """Borrow a connection for a read that tolerates replication lag.
+
+    Uses a healthy replica when ``DB_REPLICAS`` is set and the current
+    context does not require the primary; otherwise the primary. A replica
+    that cannot be reached is marked down and the read goes to the primary.
+    """
+    replicas = None if reads_use_primary() else _get_replicas(config)
+    replica = replicas.choose() if replicas else None
+    if replica is not None:
+        pool = _get_pool(config, replica)
+        try:
+            conn = pool.acquire()
+        except Exception as exc:
+            replicas.mark_down(replica, exc)
+        else:
+            try:
+                usable = replicas.check_lag(replica, conn)
+            except Exception as exc:
+                replicas.mark_down(replica, exc)
+                pool.release(conn, discard=True)
+                usable = None
+            if usable is False:
+                pool.release(conn)
+            elif usable:
+                pymysql = _require_pymysql()
+                with pool.lease(conn):
+                    try:
+                        yield conn
+                    except pymysql.err.OperationalError as exc:
+                        replicas.mark_down(replica, exc)
+                        raise
+                return
+    with _connection(config) as conn:
+        yield conn
+
+
+def _primary_on_miss(func):
+    """Repeat a lookup on the primary when a replica finds nothing (yet)."""
+    @functools.wraps(func)
+    def wrapper(config, *args, **kwargs):
+        result = func(config, *args, **kwargs)
+        if not result and _reads_from_replicas(config):
+            with primary_reads():
+                result = func(config, *args, **kwargs)
+        return result
+
+    return wrapper
+
+
+def get_pool_stats(config) -> dict:
+    """Return usage counters for the connection pool of ``config``."""
+    return _get_pool(config).stats()
+
+
+def get_replica_stats(config) -> dict | None:
+    """Return routing and pool counters per read replica, or None without replicas."""
+    replicas = _get_replicas(config)
+    if replicas is None:
+        return None
+    stats = replicas.stats()
+    for replica, entry in zip(replicas.replicas, stats['replicas']):
+        entry['pool'] = _get_pool(config, replica).stats()
+    return stats
+
+
+def close_pools() -> None:
+    """Close idle connections in every pool (e.g. on worker shutdown)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
 def _to_mysql_datetime(timestamp_iso: str) -> datetime:
     dt = datetime.fromisoformat(timestamp_iso.replace('Z', '+00:00'))
     if dt.tzinfo is not None:
@@ -65,137 +252,68 @@ def _to_api_timestamp_or_none(value) -> str | None:
     return _to_api_timestamp(value)
 
 
-def _ensure_column(cur, db_name: str, table: str, column: str, ddl: str) -> None:
-    cur.execute(
-        """
-        SELECT 1
-        FROM information_schema.COLUMNS
-        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
-        LIMIT 1
-        """,
-        (db_name, table, column),
-    )
-    if cur.fetchone() is None:
-        cur.execute(ddl)
+def _encode_leaf_hashes(leaf_hashes: list[str] | None) -> str | None:
+    return json.dumps(leaf_hashes, separators=(',', ':')) if leaf_hashes else None
 
 
-def _make_nullable_if_exists(cur, db_name: str, table: str, column: str, column_type: str) -> None:
-    cur.execute(
-        """
-        SELECT IS_NULLABLE
-        FROM information_schema.COLUMNS
-        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
-        LIMIT 1
-        """,
-        (db_name, table, column),
-    )
-    row = cur.fetchone()
-    if row and row.get('IS_NULLABLE') == 'NO':
-        cur.execute(f"ALTER TABLE {table} MODIFY COLUMN {column} {column_type} NULL")
+def _decode_leaf_hashes(value: str | None) -> list[str] | None:
+    return json.loads(value) if value else None
 
 
-def init_database(config) -> None:
-    """Create database/tables and keep schema compatible with existing installs."""
-    db_name = _cfg(config, 'DB_NAME', 'hashvault')
-    db_ident = _quote_identifier(db_name)
+def _file_sha256(item: dict) -> str | None:
+    """Flat SHA-256 of a submission's file; ``file_hash`` itself for ``sha256`` fingerprints."""
+    if item.get('file_sha256'):
+        return item['file_sha256']
+    return item['file_hash'] if (item.get('hash_algorithm') or 'sha256') == 'sha256' else None
 
-    conn = _open_connection(config, with_database=False)
-    try:
-        with conn.cursor() as cur:
-            cur.execute(f"CREATE DATABASE IF NOT EXISTS {db_ident}")
-        conn.commit()
-    finally:
-        conn.close()
 
-    conn = _open_connection(config, with_database=True)
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS submissions (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    submission_id VARCHAR(100) NOT NULL UNIQUE,
-                    filename VARCHAR(255) NULL,
-                    content_type VARCHAR(255) NULL,
-                    file_size BIGINT NULL,
-                    file_blob LONGBLOB NULL,
-                    file_hash CHAR(64) NOT NULL,
-                    timestamp DATETIME(6) NOT NULL,
-                    anchored_at DATETIME(6) NOT NULL,
-                    anchor_hash CHAR(64) NOT NULL UNIQUE,
-                    prev_anchor_hash CHAR(64) NULL
-                )
-                """
-            )
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS anchors (
-                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                    block_index BIGINT NOT NULL UNIQUE,
-                    submission_id VARCHAR(100) NOT NULL UNIQUE,
-                    file_hash CHAR(64) NOT NULL,
-                    anchored_at DATETIME(6) NOT NULL,
-                    prev_anchor_hash CHAR(64) NULL,
-                    anchor_hash CHAR(64) NOT NULL UNIQUE
-                )
-                """
-            )
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    username VARCHAR(100) NOT NULL UNIQUE,
-                    email VARCHAR(255) NOT NULL UNIQUE,
-                    password_hash VARCHAR(255) NOT NULL,
-                    created_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
-                )
-                """
-            )
+def _streaming_cursor(conn, dict_rows: bool = True):
+    """Open a cursor that streams rows instead of buffering the result."""
+    if isinstance(conn, SQLiteConnection):
+        return conn.cursor(dict_rows)  # SQLite steps through results lazily
+    pymysql = _require_pymysql()
+    return conn.cursor(pymysql.cursors.SSDictCursor if dict_rows else pymysql.cursors.SSCursor)
 
-            # Compatibility for older table variants.
-            _make_nullable_if_exists(cur, db_name, 'submissions', 'team_name', 'VARCHAR(255)')
-            _make_nullable_if_exists(cur, db_name, 'submissions', 'filename', 'VARCHAR(255)')
 
-            _ensure_column(
-                cur, db_name, 'submissions', 'filename',
-                'ALTER TABLE submissions ADD COLUMN filename VARCHAR(255) NULL'
-            )
-            _ensure_column(
-                cur, db_name, 'submissions', 'content_type',
-                'ALTER TABLE submissions ADD COLUMN content_type VARCHAR(255) NULL'
-            )
-            _ensure_column(
-                cur, db_name, 'submissions', 'file_size',
-                'ALTER TABLE submissions ADD COLUMN file_size BIGINT NULL'
-            )
-            _ensure_column(
-                cur, db_name, 'submissions', 'file_blob',
-                'ALTER TABLE submissions ADD COLUMN file_blob LONGBLOB NULL'
-            )
-            _ensure_column(
-                cur, db_name, 'submissions', 'anchored_at',
-                'ALTER TABLE submissions ADD COLUMN anchored_at DATETIME(6) NULL'
-            )
-            _ensure_column(
-                cur, db_name, 'submissions', 'anchor_hash',
-                'ALTER TABLE submissions ADD COLUMN anchor_hash CHAR(64) NULL'
-            )
-            _ensure_column(
-                cur, db_name, 'submissions', 'prev_anchor_hash',
-                'ALTER TABLE submissions ADD COLUMN prev_anchor_hash CHAR(64) NULL'
-            )
-        conn.commit()
-    finally:
-        conn.close()
+def _reference_blobs(cur, submissions: list[dict], referenced_at: datetime) -> None:
+    """Count new references to content-addressed blobs (inside the anchor transaction)."""
+    refs = {}
+    for item in submissions:
+        blob_ref = item.get('blob_ref')
+        if blob_ref:
+            size, count = refs.get(blob_ref, (item.get('file_size'), 0))
+            refs[blob_ref] = (size, count + 1)
+    if not refs:
+        return
+    if getattr(cur, 'dialect', 'mysql') == 'sqlite':
+        upsert = """
+            ON CONFLICT (blob_ref) DO UPDATE SET
+                ref_count = ref_count + excluded.ref_count,
+                last_referenced_at = excluded.last_referenced_at
+        """
+    else:
+        upsert = """
+            ON DUPLICATE KEY UPDATE
+                ref_count = ref_count + VALUES(ref_count),
+                last_referenced_at = VALUES(last_referenced_at)
+        """
+    cur.executemany(
+        """
+        INSERT INTO blobs (blob_ref, file_size, ref_count, created_at, last_referenced_at)
+        VALUES (%s, %s, %s, %s, %s)
+        """ + upsert,
+        [(ref, size, count, referenced_at, referenced_at) for ref, (size, count) in refs.items()],
+    )
 
 
-def _get_latest_anchor(cur) -> tuple[int, str | None]:
+def _get_latest_anchor(cur, for_update: bool = False) -> tuple[int, str | None]:
     cur.execute(
-        """
+        f"""
         SELECT block_index, anchor_hash
         FROM anchors
         ORDER BY block_index DESC
         LIMIT 1
+        {'FOR UPDATE' if for_update else ''}
         """
     )
     row = cur.fetchone()
@@ -213,92 +331,396 @@ def _build_anchor_hash(block_index: int, submission_id: str, file_hash: str,
     return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
 
-def save_submission_mysql(
+def _build_leaf_hash(submission_id: str, file_hash: str, submission_time: datetime) -> str:
+    payload = f"{submission_id}|{file_hash}|{submission_time.isoformat()}"
+    return leaf_hash(payload.encode('utf-8'))
+
+
+@timed_db
+def get_chain_tip_mysql(config) -> tuple[int, str | None]:
+    """Return ``(block_index, anchor_hash)`` of the newest anchor block."""
+    with _connection(config) as conn:
+        with conn.cursor() as cur:
+            return _get_latest_anchor(cur)
+
+
+def _plan_chain_blocks(items: list[dict], tip: tuple[int, str | None],
+                       anchored_at: datetime) -> tuple[list[dict], list[tuple], tuple[int, str | None]]:
+    """Anchor every item as its own block after ``tip``.
+
+    Args:
+        items: Dicts with ``submission_id``, ``file_hash`` and ``submission_time``.
+
+    Returns:
+        Tuple of (anchor columns per item, ``anchors`` rows, new chain tip).
+    """
+    block_index, prev_anchor_hash = tip
+    fields = []
+    anchor_rows = []
+    for item in items:
+        block_index += 1
+        anchor_hash = _build_anchor_hash(
+            block_index=block_index,
+            submission_id=item['submission_id'],
+            file_hash=item['file_hash'],
+            anchored_at=anchored_at,
+            prev_anchor_hash=prev_anchor_hash,
+        )
+        fields.append({
+            'anchored_at': anchored_at,
+            'anchor_hash': anchor_hash,
+            'prev_anchor_hash': prev_anchor_hash,
+            'merkle_root': None,
+            'merkle_leaf_index': None,
+            'merkle_proof': None,
+        })
+        anchor_rows.append((
+            block_index, item['submission_id'], item['file_hash'],
+            anchored_at, prev_anchor_hash, anchor_hash, None,
+        ))
+        prev_anchor_hash = anchor_hash
+    return fields, anchor_rows, (block_index, prev_anchor_hash)
+
+
+def _plan_merkle_block(items: list[dict], tip: tuple[int, str | None],
+                       anchored_at: datetime) -> tuple[list[dict], list[tuple], tuple[int, str | None]]:
+    """Anchor all items as one Merkle tree in the block after ``tip``.
+
+    The block's ``submission_id`` is a generated ``MB-`` batch ID and its
+    ``file_hash`` is the Merkle root, so the chain itself keeps the same
+    shape as in linear mode. Arguments and result match ``_plan_chain_blocks``.
+    """
+    leaves = [
+        _build_leaf_hash(item['submission_id'], item['file_hash'], item['submission_time'])
+        for item in items
+    ]
+    levels = build_levels(leaves)
+    root = levels[-1][0]
+    batch_id = f"MB-{uuid.uuid4().hex[:12].upper()}"
+
+    last_block_index, prev_anchor_hash = tip
+    block_index = last_block_index + 1
+    anchor_hash = _build_anchor_hash(
+        block_index=block_index,
+        submission_id=batch_id,
+        file_hash=root,
+        anchored_at=anchored_at,
+        prev_anchor_hash=prev_anchor_hash,
+    )
+    fields = [
+        {
+            'anchored_at': anchored_at,
+            'anchor_hash': anchor_hash,
+            'prev_anchor_hash': prev_anchor_hash,
+            'merkle_root': root,
+            'merkle_leaf_index': leaf_index,
+            'merkle_proof': json.dumps(inclusion_proof(levels, leaf_index), separators=(',', ':')),
+        }
+        for leaf_index in range(len(items))
+    ]
+    anchor_rows = [(
+        block_index, batch_id, root, anchored_at, prev_anchor_hash, anchor_hash, len(items),
+    )]
+    return fields, anchor_rows, (block_index, anchor_hash)
+
+
+ANCHOR_PLANS = {
+    'chain': _plan_chain_blocks,
+    'merkle': _plan_merkle_block,
+}
+
+
+def _insert_anchors(cur, anchor_rows: list[tuple]) -> None:
+    cur.executemany(
+        """
+        INSERT INTO anchors (
+            block_index, submission_id, file_hash, anchored_at, prev_anchor_hash,
+            anchor_hash, batch_size
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """,
+        anchor_rows,
+    )
+
+
+def _submission_result(item: dict, submission_time: datetime, anchor: dict | None) -> dict:
+    """API dict returned for a newly saved submission (``anchor`` None while pending)."""
+    result = {
+        'submission_id': item['submission_id'],
+        'filename': item['filename'],
+        'content_type': item['content_type'],
+        'file_size': item['file_size'],
+        'file_hash': item['file_hash'],
+        'hash_algorithm': item.get('hash_algorithm') or 'sha256',
+        'file_sha256': _file_sha256(item),
+        'timestamp': _to_api_timestamp(submission_time),
+        'status': 'anchored' if anchor else 'pending',
+        'anchored_at': _to_api_timestamp(anchor['anchored_at']) if anchor else None,
+        'anchor_hash': anchor['anchor_hash'] if anchor else None,
+        'prev_anchor_hash': anchor['prev_anchor_hash'] if anchor else None,
+    }
+    if anchor and anchor['merkle_root']:
+        result['merkle_root'] = anchor['merkle_root']
+        result['merkle_leaf_index'] = anchor['merkle_leaf_index']
+    return result
+
+
+def _append_anchored(config, submissions: list[dict], tip: tuple[int, str | None] | None,
+                     plan) -> tuple[list[dict], tuple[int, str | None]]:
+    anchored_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    submission_times = [_to_mysql_datetime(item['timestamp']) for item in submissions]
+
+    with _connection(config) as conn:
+        conn.begin()
+        with conn.cursor() as cur:
+            if tip is None:
+                tip = _get_latest_anchor(cur, for_update=True)
+            fields, anchor_rows, tip = plan(
+                [
+                    {'submission_id': item['submission_id'], 'file_hash': item['file_hash'],
+                     'submission_time': submission_time}
+                    for item, submission_time in zip(submissions, submission_times)
+                ],
+                tip,
+                anchored_at,
+            )
+            cur.executemany(
+                """
+                INSERT INTO submissions (
+                    submission_id, filename, content_type, file_size, blob_ref,
+                    file_hash, hash_algorithm, leaf_hashes, file_sha256, timestamp,
+                    anchored_at, anchor_hash, prev_anchor_hash,
+                    merkle_root, merkle_leaf_index, merkle_proof
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                [
+                    (
+                        item['submission_id'],
+                        item['filename'],
+                        item['content_type'],
+                        item['file_size'],
+                        item['blob_ref'],
+                        item['file_hash'],
+                        item.get('hash_algorithm') or 'sha256',
+                        _encode_leaf_hashes(item.get('leaf_hashes')),
+                        _file_sha256(item),
+                        submission_time,
+                        anchor['anchored_at'],
+                        anchor['anchor_hash'],
+                        anchor['prev_anchor_hash'],
+                        anchor['merkle_root'],
+                        anchor['merkle_leaf_index'],
+                        anchor['merkle_proof'],
+                    )
+                    for item, submission_time, anchor in zip(submissions, submission_times, fields)
+                ],
+            )
+            _insert_anchors(cur, anchor_rows)
+            _reference_blobs(cur, submissions, anchored_at)
+        conn.commit()
+
+    results = [
+        _submission_result(item, submission_time, anchor)
+        for item, submission_time, anchor in zip(submissions, submission_times, fields)
+    ]
+    return results, tip
+
+
+@timed_db
+def append_submissions_mysql(
+    config,
+    submissions: list[dict],
+    tip: tuple[int, str | None] | None = None,
+) -> tuple[list[dict], tuple[int, str | None]]:
+    """Anchor and insert a batch of submissions in a single transaction.
+
+    Each submission becomes the next block after ``tip``. When ``tip`` is None
+    the current chain tip is read and locked inside the transaction. A stale
+    ``tip`` makes the insert fail on the unique ``block_index``.
+
+    Args:
+        submissions: Dicts with the keyword arguments of ``save_submission_mysql``.
+        tip: ``(block_index, anchor_hash)`` the batch should extend.
+
+    Returns:
+        Tuple of (submission API dicts in input order, new chain tip).
+    """
+    return _append_anchored(config, submissions, tip, _plan_chain_blocks)
+
+
+@timed_db
+def append_merkle_batch_mysql(
+    config,
+    submissions: list[dict],
+    tip: tuple[int, str | None] | None = None,
+) -> tuple[list[dict], tuple[int, str | None]]:
+    """Anchor a batch of submissions as one Merkle tree in a single block.
+
+    Every submission stores its leaf index and inclusion proof next to the
+    shared block anchor (see ``_plan_merkle_block``).
+
+    Args and return value match ``append_submissions_mysql``.
+    """
+    return _append_anchored(config, submissions, tip, _plan_merkle_block)
+
+
+@timed_db
+def insert_pending_submission_mysql(
     config,
     submission_id: str,
     file_hash: str,
     timestamp: str,
     filename: str,
     content_type: str,
-    file_bytes: bytes,
+    file_size: int,
+    blob_ref: str,
+    hash_algorithm: str = 'sha256',
+    leaf_hashes: list[str] | None = None,
+    file_sha256: str | None = None,
 ) -> dict:
-    submission_time = _to_mysql_datetime(timestamp)
-    anchored_at = datetime.now(timezone.utc).replace(tzinfo=None)
-    file_size = len(file_bytes)
+    """Durably store a submission with status ``pending`` and no anchor yet.
 
-    conn = _open_connection(config, with_database=True)
-    try:
+    The blob reference is counted here, so the file is protected from
+    reclamation while it waits for ``anchor_pending_mysql``.
+    """
+    item = {
+        'submission_id': submission_id,
+        'file_hash': file_hash,
+        'filename': filename,
+        'content_type': content_type,
+        'file_size': file_size,
+        'blob_ref': blob_ref,
+        'hash_algorithm': hash_algorithm,
+        'file_sha256': file_sha256,
+    }
+    submission_time = _to_mysql_datetime(timestamp)
+    with _connection(config) as conn:
+        conn.begin()
         with conn.cursor() as cur:
-            last_block_index, prev_anchor_hash = _get_latest_anchor(cur)
-            block_index = last_block_index + 1
-            anchor_hash = _build_anchor_hash(
-                block_index=block_index,
-                submission_id=submission_id,
-                file_hash=file_hash,
-                anchored_at=anchored_at,
-                prev_anchor_hash=prev_anchor_hash,
-            )
-
             cur.execute(
                 """
                 INSERT INTO submissions (
-                    submission_id, filename, content_type, file_size, file_blob,
-                    file_hash, timestamp, anchored_at, anchor_hash, prev_anchor_hash
+                    submission_id, filename, content_type, file_size, blob_ref,
+                    file_hash, hash_algorithm, leaf_hashes, file_sha256, timestamp, status
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending')
                 """,
                 (
-                    submission_id,
-                    filename,
-                    content_type,
-                    file_size,
-                    file_bytes,
-                    file_hash,
-                    submission_time,
-                    anchored_at,
-                    anchor_hash,
-                    prev_anchor_hash,
+                    submission_id, filename, content_type, file_size, blob_ref,
+                    file_hash, hash_algorithm or 'sha256', _encode_leaf_hashes(leaf_hashes),
+                    _file_sha256(item), submission_time,
                 ),
             )
+            _reference_blobs(cur, [item], datetime.now(timezone.utc).replace(tzinfo=None))
+        conn.commit()
+    return _submission_result(item, submission_time, None)
+
+
+@timed_db
+def anchor_pending_mysql(config, limit: int, mode: str = 'chain') -> list[str]:
+    """Anchor the oldest pending submissions, in insertion order.
+
+    The chain tip is locked first, so concurrent workers (one per process)
+    take turns and never anchor the same row twice.
+
+    Returns:
+        IDs of the submissions anchored by this call (empty when none were pending).
+    """
+    plan = ANCHOR_PLANS[mode]
+    with _connection(config) as conn:
+        conn.begin()
+        with conn.cursor() as cur:
+            tip = _get_latest_anchor(cur, for_update=True)
             cur.execute(
                 """
-                INSERT INTO anchors (
-                    block_index, submission_id, file_hash, anchored_at, prev_anchor_hash, anchor_hash
-                )
-                VALUES (%s, %s, %s, %s, %s, %s)
+                SELECT submission_id, file_hash, timestamp
+                FROM submissions
+                WHERE status = 'pending'
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE
                 """,
-                (
-                    block_index,
-                    submission_id,
-                    file_hash,
-                    anchored_at,
-                    prev_anchor_hash,
-                    anchor_hash,
-                ),
+                (limit,),
             )
+            rows = cur.fetchall()
+            if not rows:
+                conn.commit()
+                return []
+
+            anchored_at = datetime.now(timezone.utc).replace(tzinfo=None)
+            fields, anchor_rows, _tip = plan(
+                [
+                    {'submission_id': row['submission_id'], 'file_hash': row['file_hash'],
+                     'submission_time': row['timestamp']}
+                    for row in rows
+                ],
+                tip,
+                anchored_at,
+            )
+            cur.executemany(
+                """
+                UPDATE submissions
+                SET status = 'anchored', anchored_at = %s, anchor_hash = %s,
+                    prev_anchor_hash = %s, merkle_root = %s, merkle_leaf_index = %s,
+                    merkle_proof = %s
+                WHERE submission_id = %s AND status = 'pending'
+                """,
+                [
+                    (
+                        anchor['anchored_at'], anchor['anchor_hash'], anchor['prev_anchor_hash'],
+                        anchor['merkle_root'], anchor['merkle_leaf_index'], anchor['merkle_proof'],
+                        row['submission_id'],
+                    )
+                    for row, anchor in zip(rows, fields)
+                ],
+            )
+            _insert_anchors(cur, anchor_rows)
         conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+    return [row['submission_id'] for row in rows]
+
 
-    return {
+@timed_db
+def count_pending_submissions_mysql(config) -> int:
+    with _connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) AS pending FROM submissions WHERE status = 'pending'")
+            return int(cur.fetchone()['pending'])
+
+
+@timed_db
+def save_submission_mysql(
+    config,
+    submission_id: str,
+    file_hash: str,
+    timestamp: str,
+    filename: str,
+    content_type: str,
+    file_size: int,
+    blob_ref: str,
+    hash_algorithm: str = 'sha256',
+    leaf_hashes: list[str] | None = None,
+    file_sha256: str | None = None,
+) -> dict:
+    results, _tip = append_submissions_mysql(config, [{
         'submission_id': submission_id,
+        'file_hash': file_hash,
+        'timestamp': timestamp,
         'filename': filename,
         'content_type': content_type,
         'file_size': file_size,
-        'file_hash': file_hash,
-        'timestamp': _to_api_timestamp(submission_time),
-        'anchored_at': _to_api_timestamp(anchored_at),
-        'anchor_hash': anchor_hash,
-        'prev_anchor_hash': prev_anchor_hash,
-    }
+        'blob_ref': blob_ref,
+        'hash_algorithm': hash_algorithm,
+        'leaf_hashes': leaf_hashes,
+        'file_sha256': file_sha256,
+    }])
+    return results[0]
 
 
+@timed_db
+@_primary_on_miss
 def get_submission_mysql(config, submission_id: str) -> dict | None:
-    conn = _open_connection(config, with_database=True)
-    try:
+    with _read_connection(config) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -307,11 +729,18 @@ def get_submission_mysql(config, submission_id: str) -> dict | None:
                     filename,
                     content_type,
                     file_size,
+                    blob_ref,
                     file_hash,
+                    hash_algorithm,
+                    leaf_hashes,
+                    file_sha256,
                     timestamp,
+                    status,
                     anchored_at,
                     anchor_hash,
-                    prev_anchor_hash
+                    prev_anchor_hash,
+                    merkle_root,
+                    merkle_leaf_index
                 FROM submissions
                 WHERE submission_id = %s
                 LIMIT 1
@@ -319,20 +748,74 @@ def get_submission_mysql(config, submission_id: str) -> dict | None:
                 (submission_id,),
             )
             row = cur.fetchone()
-    finally:
-        conn.close()
 
     if not row:
         return None
 
     row['timestamp'] = _to_api_timestamp(row['timestamp'])
     row['anchored_at'] = _to_api_timestamp_or_none(row.get('anchored_at'))
+    row['leaf_hashes'] = _decode_leaf_hashes(row.get('leaf_hashes'))
     return row
 
 
-def get_all_submissions_mysql(config) -> list[dict]:
-    conn = _open_connection(config, with_database=True)
-    try:
+@timed_db
+def get_submissions_mysql(config, submission_ids: list[str]) -> dict[str, dict]:
+    """Fetch many submissions with a single ``IN`` query.
+
+    Returns:
+        Mapping of submission_id to submission dict for the IDs that exist.
+    """
+    unique_ids = list(dict.fromkeys(submission_ids))
+    if not unique_ids:
+        return {}
+
+    placeholders = ', '.join(['%s'] * len(unique_ids))
+    with _read_connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT
+                    submission_id,
+                    filename,
+                    content_type,
+                    file_size,
+                    blob_ref,
+                    file_hash,
+                    hash_algorithm,
+                    leaf_hashes,
+                    file_sha256,
+                    timestamp,
+                    status,
+                    anchored_at,
+                    anchor_hash,
+                    prev_anchor_hash,
+                    merkle_root,
+                    merkle_leaf_index
+                FROM submissions
+                WHERE submission_id IN ({placeholders})
+                """,
+                unique_ids,
+            )
+            rows = cur.fetchall()
+
+    for row in rows:
+        row['timestamp'] = _to_api_timestamp(row['timestamp'])
+        row['anchored_at'] = _to_api_timestamp_or_none(row.get('anchored_at'))
+        row['leaf_hashes'] = _decode_leaf_hashes(row.get('leaf_hashes'))
+    found = {row['submission_id']: row for row in rows}
+
+    missing = [submission_id for submission_id in unique_ids if submission_id not in found]
+    if missing and _reads_from_replicas(config):
+        with primary_reads():
+            found.update(get_submissions_mysql(config, missing))
+    return found
+
+
+@timed_db
+@_primary_on_miss
+def get_submissions_by_hash_mysql(config, file_hash: str, limit: int) -> list[dict]:
+    """Return submissions whose file has the flat SHA-256 ``file_hash``, oldest first."""
+    with _read_connection(config) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -342,17 +825,21 @@ def get_all_submissions_mysql(config) -> list[dict]:
                     content_type,
                     file_size,
                     file_hash,
+                    hash_algorithm,
+                    file_sha256,
                     timestamp,
+                    status,
                     anchored_at,
                     anchor_hash,
                     prev_anchor_hash
                 FROM submissions
-                ORDER BY timestamp DESC
-                """
+                WHERE file_sha256 = %s
+                ORDER BY timestamp, id
+                LIMIT %s
+                """,
+                (file_hash, limit),
             )
             rows = cur.fetchall()
-    finally:
-        conn.close()
 
     for row in rows:
         row['timestamp'] = _to_api_timestamp(row['timestamp'])
@@ -360,11 +847,377 @@ def get_all_submissions_mysql(config) -> list[dict]:
     return rows
 
 
+@timed_db
+@_primary_on_miss
+def get_submission_proof_mysql(config, submission_id: str) -> dict | None:
+    """Return the proof that a submission is covered by its anchor block.
+
+    The response carries the exact payloads that were hashed, the Merkle
+    inclusion path (empty for linear-chain blocks) and whether the stored
+    values still reproduce the block's anchor hash. Checking it costs
+    O(log n) hashes in the batch size and is independent of chain length.
+    """
+    with _read_connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT
+                    s.submission_id,
+                    s.file_hash,
+                    s.timestamp,
+                    s.merkle_root,
+                    s.merkle_leaf_index,
+                    s.merkle_proof,
+                    a.block_index,
+                    a.submission_id AS block_submission_id,
+                    a.file_hash AS block_file_hash,
+                    a.anchored_at,
+                    a.prev_anchor_hash,
+                    a.anchor_hash,
+                    a.batch_size
+                FROM submissions s
+                JOIN anchors a ON a.anchor_hash = s.anchor_hash
+                WHERE s.submission_id = %s
+                LIMIT 1
+                """,
+                (submission_id,),
+            )
+            row = cur.fetchone()
+
+    if not row:
+        return None
+
+    block_payload = (
+        f"{row['block_index']}|{row['block_submission_id']}|{row['block_file_hash']}|"
+        f"{row['anchored_at'].isoformat()}|{row['prev_anchor_hash'] or ''}"
+    )
+    recomputed_anchor = _build_anchor_hash(
+        block_index=int(row['block_index']),
+        submission_id=row['block_submission_id'],
+        file_hash=row['block_file_hash'],
+        anchored_at=row['anchored_at'],
+        prev_anchor_hash=row['prev_anchor_hash'],
+    )
+
+    proof = {
+        'submission_id': row['submission_id'],
+        'file_hash': row['file_hash'],
+        'timestamp': _to_api_timestamp(row['timestamp']),
+        'anchor_mode': 'merkle' if row['merkle_root'] else 'chain',
+        'merkle': None,
+        'block': {
+            'block_index': int(row['block_index']),
+            'block_id': row['block_submission_id'],
+            'block_hash_input': row['block_file_hash'],
+            'anchored_at': row['anchored_at'].isoformat(),
+            'prev_anchor_hash': row['prev_anchor_hash'],
+            'anchor_hash': row['anchor_hash'],
+            'payload': block_payload,
+        },
+    }
+    valid = recomputed_anchor == row['anchor_hash']
+
+    if row['merkle_root']:
+        path = json.loads(row['merkle_proof'] or '[]')
+        leaf = _build_leaf_hash(row['submission_id'], row['file_hash'], row['timestamp'])
+        proof['merkle'] = {
+            'leaf_payload': f"{row['submission_id']}|{row['file_hash']}|{row['timestamp'].isoformat()}",
+            'leaf_hash': leaf,
+            'leaf_index': row['merkle_leaf_index'],
+            'batch_size': row['batch_size'],
+            'path': path,
+            'root': row['merkle_root'],
+        }
+        valid = (
+            valid
+            and row['merkle_root'] == row['block_file_hash']
+            and verify_inclusion(leaf, path, row['merkle_root'])
+        )
+    else:
+        valid = (
+            valid
+            and row['block_submission_id'] == row['submission_id']
+            and row['block_file_hash'] == row['file_hash']
+        )
+
+    proof['valid'] = valid
+    return proof
+
+
+_LIST_COLUMNS = """
+    id,
+    submission_id,
+    filename,
+    content_type,
+    file_size,
+    file_hash,
+    hash_algorithm,
+    file_sha256,
+    timestamp,
+    status,
+    anchored_at,
+    anchor_hash,
+    prev_anchor_hash
+"""
+
+
+def _submission_list_query(filters: dict | None, after: tuple | None) -> tuple[str, list]:
+    """Build the keyset-paginated listing query (newest first)."""
+    filters = filters or {}
+    clauses = []
+    params = []
+    if filters.get('file_hash'):
+        clauses.append('file_hash = %s')
+        params.append(filters['file_hash'])
+    if filters.get('content_type'):
+        clauses.append('content_type = %s')
+        params.append(filters['content_type'])
+    if filters.get('filename'):
+        # '!' rather than the MySQL-only default backslash, so both engines agree.
+        escaped = filters['filename'].replace('!', '!!').replace('%', '!%').replace('_', '!_')
+        clauses.append("filename LIKE %s ESCAPE '!'")
+        params.append(escaped + '%')
+    if filters.get('since'):
+        clauses.append('timestamp >= %s')
+        params.append(_to_mysql_datetime(filters['since']))
+    if filters.get('until'):
+        clauses.append('timestamp < %s')
+        params.append(_to_mysql_datetime(filters['until']))
+    if after:
+        after_timestamp, after_id = after
+        clauses.append('(timestamp < %s OR (timestamp = %s AND id < %s))')
+        params.extend([after_timestamp, after_timestamp, after_id])
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    sql = f"""
+        SELECT {_LIST_COLUMNS}
+        FROM submissions
+        {where}
+        ORDER BY timestamp DESC, id DESC
+    """
+    return sql, params
+
+
+def _format_list_row(row: dict) -> tuple[dict, tuple]:
+    """Format a listing row for the API and return it with its keyset position."""
+    position = (row['timestamp'], row.pop('id'))
+    row['timestamp'] = _to_api_timestamp(row['timestamp'])
+    row['anchored_at'] = _to_api_timestamp_or_none(row.get('anchored_at'))
+    return row, position
+
+
+@timed_db
+def list_submissions_mysql(config, limit: int, after: tuple | None = None,
+                           filters: dict | None = None) -> tuple[list[dict], tuple | None]:
+    """Return one page of submissions, newest first.
+
+    Uses keyset pagination on ``(timestamp, id)`` so every page costs one
+    index range scan regardless of how deep the client has paged.
+
+    Args:
+        limit: Maximum rows to return.
+        after: ``(timestamp, id)`` position returned with the previous page.
+        filters: Optional ``file_hash``, ``content_type``, ``filename``
+            (prefix), ``since`` and ``until`` (ISO timestamps).
+
+    Returns:
+        Tuple of (rows, position of the last row or None if no more pages).
+    """
+    sql, params = _submission_list_query(filters, after)
+    with _read_connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql + ' LIMIT %s', params + [limit + 1])
+            rows = cur.fetchall()
+
+    has_more = len(rows) > limit
+    page = []
+    position = None
+    for row in rows[:limit]:
+        row, position = _format_list_row(row)
+        page.append(row)
+    return page, position if has_more else None
+
+
+@timed_db
+def iter_submissions_mysql(config, after: tuple | None = None, filters: dict | None = None):
+    """Stream every matching submission, newest first, via a server-side cursor."""
+    sql, params = _submission_list_query(filters, after)
+    with _read_connection(config) as conn:
+        cur = _streaming_cursor(conn)
+        try:
+            cur.execute(sql, params)
+            for row in cur:
+                yield _format_list_row(row)[0]
+        finally:
+            cur.close()
+
+
+@timed_db
+def get_legacy_blob_size_mysql(config, submission_id: str) -> int | None:
+    """Return ``LENGTH(file_blob)`` for a pre-blob-store row, or None."""
+    with _read_connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT LENGTH(file_blob) AS blob_size
+                FROM submissions
+                WHERE submission_id = %s AND file_blob IS NOT NULL
+                LIMIT 1
+                """,
+                (submission_id,),
+            )
+            row = cur.fetchone()
+    if not row:
+        return None
+    return int(row['blob_size'])
+
+
+@timed_db
+def read_legacy_blob_chunk_mysql(config, submission_id: str, offset: int, length: int) -> bytes:
+    """Read ``length`` bytes of a legacy ``file_blob`` starting at ``offset``."""
+    with _read_connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT SUBSTRING(file_blob, %s, %s) AS chunk
+                FROM submissions
+                WHERE submission_id = %s
+                LIMIT 1
+                """,
+                (offset + 1, length, submission_id),
+            )
+            row = cur.fetchone()
+    if not row or row['chunk'] is None:
+        return b''
+    return bytes(row['chunk'])
+
+
+# --------------- Blob references ---------------
+
+@timed_db
+def get_referenced_blob_refs_mysql(config, blob_refs: list[str]) -> set[str]:
+    """Return the subset of ``blob_refs`` referenced by at least one submission."""
+    if not blob_refs:
+        return set()
+    placeholders = ', '.join(['%s'] * len(blob_refs))
+    with _connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT blob_ref
+                FROM blobs
+                WHERE blob_ref IN ({placeholders}) AND ref_count > 0
+                """,
+                list(blob_refs),
+            )
+            return {row['blob_ref'] for row in cur.fetchall()}
+
+
+@timed_db
+def get_blob_stats_mysql(config) -> dict:
+    """Physical vs logical size of the deduplicated blob store."""
+    with _connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT
+                    COUNT(*) AS blobs,
+                    COALESCE(SUM(ref_count), 0) AS references_total,
+                    COALESCE(SUM(file_size), 0) AS stored_bytes,
+                    COALESCE(SUM(file_size * ref_count), 0) AS submitted_bytes
+                FROM blobs
+                WHERE ref_count > 0
+                """
+            )
+            row = cur.fetchone()
+    return {key: int(value) for key, value in row.items()}
+
+
+# --------------- Chain audit ---------------
+
+@timed_db
+def iter_anchors_mysql(config, after_block_index: int = 0):
+    """Stream anchor rows in block order using a server-side cursor.
+
+    Yields tuples of (block_index, submission_id, file_hash, anchored_at,
+    prev_anchor_hash, anchor_hash) without buffering the table in memory.
+    """
+    with _connection(config) as conn:
+        cur = _streaming_cursor(conn, dict_rows=False)
+        try:
+            cur.execute(
+                """
+                SELECT block_index, submission_id, file_hash, anchored_at,
+                       prev_anchor_hash, anchor_hash
+                FROM anchors
+                WHERE block_index > %s
+                ORDER BY block_index
+                """,
+                (after_block_index,),
+            )
+            for row in cur:
+                yield row
+        finally:
+            cur.close()
+
+
+@timed_db
+def get_anchor_mysql(config, block_index: int) -> dict | None:
+    with _connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT block_index, submission_id, file_hash, anchored_at,
+                       prev_anchor_hash, anchor_hash
+                FROM anchors
+                WHERE block_index = %s
+                LIMIT 1
+                """,
+                (block_index,),
+            )
+            return cur.fetchone()
+
+
+@timed_db
+def get_latest_audit_checkpoint_mysql(config) -> dict | None:
+    with _connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT block_index, anchor_hash, blocks_verified, verified_at, signature
+                FROM audit_checkpoints
+                ORDER BY block_index DESC, id DESC
+                LIMIT 1
+                """
+            )
+            return cur.fetchone()
+
+
+@timed_db
+def save_audit_checkpoint_mysql(config, block_index: int, anchor_hash: str,
+                                blocks_verified: int, verified_at: datetime,
+                                signature: str) -> None:
+    with _connection(config) as conn:
+        conn.begin()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO audit_checkpoints (
+                    block_index, anchor_hash, blocks_verified, verified_at, signature
+                )
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                (block_index, anchor_hash, blocks_verified, verified_at, signature),
+            )
+        conn.commit()
+
+
 # --------------- User CRUD ---------------
 
+@timed_db
 def create_user_mysql(config, username: str, email: str, password_hash: str) -> dict:
-    conn = _open_connection(config, with_database=True)
-    try:
+    with _connection(config) as conn:
+        conn.begin()
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -375,58 +1228,50 @@ def create_user_mysql(config, username: str, email: str, password_hash: str) ->
             )
             user_id = cur.lastrowid
         conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
 
     return {'id': user_id, 'username': username, 'email': email}
 
 
+@timed_db
+@_primary_on_miss
 def get_user_by_username_mysql(config, username: str) -> dict | None:
-    conn = _open_connection(config, with_database=True)
-    try:
+    with _read_connection(config) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT id, username, email, password_hash, created_at FROM users WHERE username = %s LIMIT 1",
                 (username,),
             )
             row = cur.fetchone()
-    finally:
-        conn.close()
     if row and row.get('created_at'):
         row['created_at'] = _to_api_timestamp(row['created_at'])
     return row
 
 
+@timed_db
+@_primary_on_miss
 def get_user_by_email_mysql(config, email: str) -> dict | None:
-    conn = _open_connection(config, with_database=True)
-    try:
+    with _read_connection(config) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT id, username, email, password_hash, created_at FROM users WHERE email = %s LIMIT 1",
                 (email,),
             )
             row = cur.fetchone()
-    finally:
-        conn.close()
     if row and row.get('created_at'):
         row['created_at'] = _to_api_timestamp(row['created_at'])
     return row
 
 
+@timed_db
+@_primary_on_miss
 def get_user_by_id_mysql(config, user_id: int) -> dict | None:
-    conn = _open_connection(config, with_database=True)
-    try:
+    with _read_connection(config) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT id, username, email, created_at FROM users WHERE id = %s LIMIT 1",
                 (user_id,),
             )
             row = cur.fetchone()
-    finally:
-        conn.close()
     if row and row.get('created_at'):
         row['created_at'] = _to_api_timestamp(row['created_at'])
     return row
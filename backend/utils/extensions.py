@@ -0,0 +1,24 @@
+"""Per-app singletons kept in ``current_app.extensions``."""
+
+import threading
+
+from flask import current_app
+
+# Reentrant: a factory may look up another extension.
+_lock = threading.RLock()
+
+
+def get_extension(name: str, factory):
+    """Return ``current_app.extensions[name]``, building it once with ``factory(config)``.
+
+    Concurrent first requests share one instance, so objects that own
+    threads (the anchor sequencer and worker) are never started twice.
+    """
+    value = current_app.extensions.get(name)
+    if value is None:
+        with _lock:
+            value = current_app.extensions.get(name)
+            if value is None:
+                value = factory(current_app.config)
+                current_app.extensions[name] = value
+    return value
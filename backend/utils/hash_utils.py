@@ -1,5 +1,23 @@
 import hashlib
+import re
+import threading
+import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.merkle import LEAF_PREFIX, build_levels
+from utils.metrics import observe_hashing
+
+SHA256_HEX = re.compile(r'[0-9a-fA-F]{64}')
+
+# ``file_hash`` is either a flat SHA-256 of the file, or the Merkle root of
+# its fixed-size leaves ("sha256-tree:<leaf size in bytes>").
+FLAT_HASH_ALGORITHM = 'sha256'
+TREE_HASH_ALGORITHM = 'sha256-tree'
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
 
 
 def generate_hash_from_stream(stream) -> str:
@@ -9,6 +27,8 @@ def generate_hash_from_stream(stream) -> str:
     """
     sha256 = hashlib.sha256()
     start_pos = None
+    started = time.perf_counter()
+    size = 0
 
     try:
         start_pos = stream.tell()
@@ -18,6 +38,8 @@ def generate_hash_from_stream(stream) -> str:
 
     for chunk in iter(lambda: stream.read(8192), b''):
         sha256.update(chunk)
+        size += len(chunk)
+    observe_hashing('stream', size, time.perf_counter() - started)
 
     if start_pos is not None:
         try:
@@ -28,6 +50,192 @@ def generate_hash_from_stream(stream) -> str:
     return sha256.hexdigest()
 
 
+def copy_and_hash(src, dst, chunk_size: int = 1024 * 1024) -> tuple[str, int]:
+    """Copy ``src`` into ``dst`` in bounded chunks while hashing it.
+
+    Returns:
+        Tuple of (SHA-256 hex digest, number of bytes copied).
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    started = time.perf_counter()
+    for chunk in iter(lambda: src.read(chunk_size), b''):
+        sha256.update(chunk)
+        dst.write(chunk)
+        size += len(chunk)
+    observe_hashing('copy', size, time.perf_counter() - started)
+    return sha256.hexdigest(), size
+
+
+def _get_hash_pool(workers: int) -> ThreadPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                _hash_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hash')
+    return _hash_pool
+
+
+def hash_streams_concurrently(streams: list, workers: int = 4) -> list[str]:
+    """Hash several binary streams in parallel.
+
+    hashlib releases the GIL while digesting large buffers, so a small
+    thread pool scales across cores. The pool is shared process-wide and
+    sized by the first caller.
+
+    Returns:
+        SHA-256 hex digests in the same order as ``streams``.
+    """
+    if len(streams) <= 1:
+        return [generate_hash_from_stream(stream) for stream in streams]
+    pool = _get_hash_pool(workers)
+    return list(pool.map(generate_hash_from_stream, streams))
+
+
+def tree_hash_algorithm(leaf_size: int) -> str:
+    return f'{TREE_HASH_ALGORITHM}:{int(leaf_size)}'
+
+
+def tree_hash_settings(config) -> tuple[int, int] | None:
+    """``(leaf size, workers)`` when ``HASH_ALGORITHM`` is ``tree``, else None."""
+    if config.get('HASH_ALGORITHM', 'sha256') != 'tree':
+        return None
+    return config.get('TREE_HASH_LEAF_SIZE', 1024 * 1024), config.get('TREE_HASH_WORKERS', 4)
+
+
+def tree_leaf_size(hash_algorithm: str | None) -> int | None:
+    """Leaf size of a tree-hash algorithm name, or None for flat SHA-256.
+
+    Raises:
+        ValueError: For unknown algorithm names.
+    """
+    if not hash_algorithm or hash_algorithm == FLAT_HASH_ALGORITHM:
+        return None
+    name, _, leaf_size = hash_algorithm.partition(':')
+    if name != TREE_HASH_ALGORITHM or not leaf_size.isdigit() or int(leaf_size) <= 0:
+        raise ValueError(f'Unknown hash algorithm: {hash_algorithm!r}')
+    return int(leaf_size)
+
+
+def _hash_leaf(data: bytes) -> str:
+    sha256 = hashlib.sha256(LEAF_PREFIX)
+    sha256.update(data)
+    return sha256.hexdigest()
+
+
+class TreeHasher:
+    """Incremental tree-hash fingerprint over ``leaf_size`` leaves.
+
+    Bytes are fed in file order with ``update``; each completed leaf is
+    hashed on the shared hash pool, with at most two leaves per worker in
+    memory at a time. Leaf and node hashing follow ``utils.merkle``, so an
+    empty input has a single empty leaf. Must not be used from a hash-pool
+    thread.
+    """
+
+    def __init__(self, leaf_size: int, workers: int = 4):
+        self.leaf_size = int(leaf_size)
+        self._workers = max(1, int(workers))
+        self._pool = _get_hash_pool(workers)
+        self._buffer = bytearray()
+        self._in_flight = deque()
+        self._leaves = []
+        self._result = None
+
+    def _submit(self, data: bytes) -> None:
+        self._in_flight.append(self._pool.submit(_hash_leaf, data))
+        if len(self._in_flight) >= self._workers * 2:
+            self._leaves.append(self._in_flight.popleft().result())
+
+    def update(self, data) -> None:
+        view = memoryview(data)
+        while len(view):
+            if not self._buffer and len(view) >= self.leaf_size:
+                self._submit(bytes(view[:self.leaf_size]))
+                view = view[self.leaf_size:]
+                continue
+            take = self.leaf_size - len(self._buffer)
+            self._buffer += view[:take]
+            view = view[take:]
+            if len(self._buffer) == self.leaf_size:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+
+    def result(self) -> tuple[str, list[str]]:
+        """Finish hashing; returns (root hex digest, leaf hex digests in file order)."""
+        if self._result is None:
+            if self._buffer or not (self._leaves or self._in_flight):
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            leaves = self._leaves + [future.result() for future in self._in_flight]
+            self._in_flight.clear()
+            self._result = (build_levels(leaves)[-1][0], leaves)
+        return self._result
+
+
+def tree_hash_stream(stream, leaf_size: int, workers: int = 4) -> tuple[str, list[str]]:
+    """Merkle-root fingerprint of a stream split into ``leaf_size`` leaves.
+
+    Leaves are read sequentially and hashed in parallel by ``TreeHasher``.
+    The stream is rewound to the start afterwards when possible. Must not be
+    called from a hash-pool thread.
+
+    Returns:
+        Tuple of (root hex digest, leaf hex digests in file order).
+    """
+    try:
+        stream.seek(0)
+    except (AttributeError, OSError):
+        pass
+
+    hasher = TreeHasher(leaf_size, workers)
+    started = time.perf_counter()
+    size = 0
+    for data in iter(lambda: stream.read(leaf_size), b''):
+        hasher.update(data)
+        size += len(data)
+    result = hasher.result()
+    observe_hashing('tree', size, time.perf_counter() - started)
+
+    try:
+        stream.seek(0)
+    except (AttributeError, OSError):
+        pass
+    return result
+
+
+def changed_regions(expected: list[str], actual: list[str], leaf_size: int) -> list[dict]:
+    """Byte ranges whose leaf hashes differ between two tree fingerprints.
+
+    Adjacent changed leaves are merged. Leaves present in only one of the
+    lists (the file grew or shrank) count as changed.
+
+    Returns:
+        ``[{'offset', 'length', 'first_leaf', 'last_leaf'}]`` in file order.
+    """
+    regions = []
+    for index in range(max(len(expected), len(actual))):
+        same = index < len(expected) and index < len(actual) and expected[index] == actual[index]
+        if same:
+            continue
+        if regions and regions[-1]['last_leaf'] == index - 1:
+            regions[-1]['last_leaf'] = index
+            regions[-1]['length'] += leaf_size
+        else:
+            regions.append({
+                'offset': index * leaf_size,
+                'length': leaf_size,
+                'first_leaf': index,
+                'last_leaf': index,
+            })
+    return regions
+
+
+def is_sha256_hex(value: str) -> bool:
+    """Return True if ``value`` looks like a hex-encoded SHA-256 digest."""
+    return isinstance(value, str) and SHA256_HEX.fullmatch(value) is not None
+
+
 def generate_submission_id() -> str:
     """Generate a unique submission ID.
 
@@ -0,0 +1,71 @@
+"""Binary Merkle trees over SHA-256 with compact inclusion proofs.
+
+Leaves are hashed as ``sha256(0x00 || data)`` and inner nodes as
+``sha256(0x01 || left || right)`` over the raw 32-byte digests, so a leaf can
+never be confused with an inner node. A node without a sibling is promoted
+to the next level unchanged. All hashes are exchanged as hex strings.
+"""
+
+import hashlib
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def leaf_hash(data: bytes) -> str:
+    return hashlib.sha256(LEAF_PREFIX + data).hexdigest()
+
+
+def node_hash(left: str, right: str) -> str:
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def build_levels(leaves: list[str]) -> list[list[str]]:
+    """Build every level of the tree, from the leaves up to the root."""
+    if not leaves:
+        raise ValueError('A Merkle tree needs at least one leaf')
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(leaves: list[str]) -> str:
+    return build_levels(leaves)[-1][0]
+
+
+def inclusion_proof(levels: list[list[str]], index: int) -> list[dict]:
+    """Sibling path proving that leaf ``index`` is part of the tree.
+
+    Each step is ``{'hash': sibling, 'position': 'left' | 'right'}`` where
+    ``position`` says on which side the sibling is combined.
+    """
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({
+                'hash': level[sibling],
+                'position': 'left' if sibling < index else 'right',
+            })
+        index //= 2
+    return proof
+
+
+def root_from_proof(leaf: str, proof: list[dict]) -> str:
+    """Recompute the root implied by ``leaf`` and its inclusion ``proof``."""
+    current = leaf
+    for step in proof:
+        if step['position'] == 'left':
+            current = node_hash(step['hash'], current)
+        else:
+            current = node_hash(current, step['hash'])
+    return current
+
+
+def verify_inclusion(leaf: str, proof: list[dict], root: str) -> bool:
+    return root_from_proof(leaf, proof) == root
@@ -0,0 +1,258 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are kept in plain dicts behind a lock per metric.
+Recording a sample is a ``perf_counter`` call, a bisect and a few
+additions, so instrumentation stays on in production. Every worker process
+keeps its own values, so scrape each worker (or run a single worker per
+scrape target); Prometheus sums the series across targets.
+
+Served at ``GET /api/metrics`` (see ``routes.metrics_routes``).
+"""
+
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+
+from utils.profiling import record_phase
+
+# Seconds; covers sub-millisecond cache hits up to slow uploads.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+# Bytes; 1 KiB to 64 MiB in steps of 4.
+SIZE_BUCKETS = tuple(1024 * 4 ** exponent for exponent in range(9))
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonically increasing value per label combination."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labels) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name + _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label combination."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, *labels):
+        """Context manager observing the duration of its block."""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield self.name + '_bucket' + _format_labels(self.labelnames, labels, le), cumulative
+            yield self.name + '_sum' + _format_labels(self.labelnames, labels), values[-1]
+            yield self.name + '_count' + _format_labels(self.labelnames, labels), cumulative
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._start, *self._labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for sample, value in metric.samples():
+                lines.append(f'{sample} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'hashvault_http_request_duration_seconds',
+    'Time until the response is returned, by route.',
+    ('blueprint', 'endpoint', 'method', 'status'),
+))
+DB_DURATION = REGISTRY.register(Histogram(
+    'hashvault_db_query_duration_seconds',
+    'Time spent in each db_utils function, including waiting for a pooled connection.',
+    ('function',),
+))
+DB_ERRORS = REGISTRY.register(Counter(
+    'hashvault_db_errors_total',
+    'db_utils calls that raised.',
+    ('function',),
+))
+HASHED_BYTES = REGISTRY.register(Counter(
+    'hashvault_hashed_bytes_total',
+    'Bytes digested; divide its rate by hashvault_hash_seconds_total for throughput.',
+    ('operation',),
+))
+HASH_SECONDS = REGISTRY.register(Counter(
+    'hashvault_hash_seconds_total',
+    'Wall time spent hashing (including reading the input).',
+    ('operation',),
+))
+UPLOAD_SIZE = REGISTRY.register(Histogram(
+    'hashvault_upload_size_bytes',
+    'Size of stored submission files.',
+    ('route',),
+    buckets=SIZE_BUCKETS,
+))
+ANCHOR_WAIT = REGISTRY.register(Histogram(
+    'hashvault_anchor_wait_seconds',
+    'Time a submit waits for its submission to be anchored.',
+    ('mode',),
+))
+ADMISSION_DECISIONS = REGISTRY.register(Counter(
+    'hashvault_admission_total',
+    'Upload admission decisions: admitted, queued (admitted after waiting), rejected, rate_limited.',
+    ('endpoint', 'outcome'),
+))
+ADMISSION_WAIT = REGISTRY.register(Histogram(
+    'hashvault_admission_wait_seconds',
+    'Time queued requests waited for upload capacity.',
+    ('endpoint',),
+))
+
+
+def observe_hashing(operation: str, size: int, seconds: float) -> None:
+    HASHED_BYTES.inc(size, operation)
+    HASH_SECONDS.inc(seconds, operation)
+    record_phase('hash.' + operation, seconds)
+
+
+def _observe_db(name: str, seconds: float) -> None:
+    DB_DURATION.observe(seconds, name)
+    record_phase('db.' + name, seconds)
+
+
+def timed_db(func):
+    """Record the duration and failures of a ``db_utils`` function.
+
+    Generator functions are timed until they are exhausted or closed.
+    """
+    name = func.__name__
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                yield from func(*args, **kwargs)
+            except Exception:
+                DB_ERRORS.inc(1, name)
+                raise
+            finally:
+                _observe_db(name, time.perf_counter() - start)
+
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            DB_ERRORS.inc(1, name)
+            raise
+        finally:
+            _observe_db(name, time.perf_counter() - start)
+
+    return wrapper
+
+
+def install_request_metrics(app) -> None:
+    """Time every request of ``app`` into ``REQUEST_DURATION``."""
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                request.blueprint or 'app',
+                request.endpoint or 'unmatched',  # 404s must not create a series per URL
+                request.method,
+                str(response.status_code),
+            )
+        return response
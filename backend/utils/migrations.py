@@ -0,0 +1,535 @@
+"""Versioned schema migrations.
+
+Migrations are applied in order by ``python manage.py migrate`` and recorded
+in the ``schema_version`` table. Each one is idempotent, so installs that
+predate versioning (whose tables were patched by the old startup checks)
+can run the full list safely. App startup only compares the recorded
+version with ``LATEST_VERSION``.
+
+To change the schema, append a new ``(version, name, function)`` entry to
+``MIGRATIONS``; never edit one that has already shipped.
+
+SQLite databases (``DB_ENGINE=sqlite``) have no pre-versioning installs to
+upgrade: a new database is created from ``database/schema_sqlite.sql``,
+which must be kept equal to the schema at ``LATEST_VERSION``. Migrations
+added after SQLite support also need an entry in ``SQLITE_MIGRATIONS``.
+"""
+
+import logging
+import os
+from datetime import datetime, timezone
+
+from utils.db_utils import (
+    _cfg,
+    _connection,
+    _engine,
+    _open_connection,
+    _quote_identifier,
+    _require_pymysql,
+)
+from utils.sqlite_engine import is_missing_table_error
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_LOCK_TIMEOUT = 60  # seconds to wait for another migrator
+
+SQLITE_SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'schema_sqlite.sql'
+)
+
+
+class SchemaVersionError(RuntimeError):
+    """Raised when the database schema is older than the running code."""
+
+
+def _column_exists(cur, db_name: str, table: str, column: str) -> bool:
+    cur.execute(
+        """
+        SELECT 1
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        LIMIT 1
+        """,
+        (db_name, table, column),
+    )
+    return cur.fetchone() is not None
+
+
+def _ensure_column(cur, db_name: str, table: str, column: str, ddl: str) -> None:
+    if not _column_exists(cur, db_name, table, column):
+        cur.execute(ddl)
+
+
+def _make_nullable_if_exists(cur, db_name: str, table: str, column: str, column_type: str) -> None:
+    cur.execute(
+        """
+        SELECT IS_NULLABLE
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        LIMIT 1
+        """,
+        (db_name, table, column),
+    )
+    row = cur.fetchone()
+    if row and row.get('IS_NULLABLE') == 'NO':
+        cur.execute(f"ALTER TABLE {table} MODIFY COLUMN {column} {column_type} NULL")
+
+
+def _ensure_index(cur, db_name: str, table: str, index: str, ddl: str) -> None:
+    cur.execute(
+        """
+        SELECT 1
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s
+        LIMIT 1
+        """,
+        (db_name, table, index),
+    )
+    if cur.fetchone() is None:
+        cur.execute(ddl)
+
+
+def _drop_unique_index_if_exists(cur, db_name: str, table: str, column: str) -> None:
+    cur.execute(
+        """
+        SELECT DISTINCT INDEX_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+          AND NON_UNIQUE = 0 AND INDEX_NAME <> 'PRIMARY'
+        """,
+        (db_name, table, column),
+    )
+    for row in cur.fetchall():
+        cur.execute(f"ALTER TABLE {table} DROP INDEX {_quote_identifier(row['INDEX_NAME'])}")
+
+
+# --- Migrations ---
+
+def _create_core_tables(cur, db_name: str) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS submissions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            submission_id VARCHAR(100) NOT NULL UNIQUE,
+            filename VARCHAR(255) NULL,
+            content_type VARCHAR(255) NULL,
+            file_size BIGINT NULL,
+            file_blob LONGBLOB NULL,
+            file_hash CHAR(64) NOT NULL,
+            timestamp DATETIME(6) NOT NULL,
+            anchored_at DATETIME(6) NOT NULL,
+            anchor_hash CHAR(64) NOT NULL,
+            prev_anchor_hash CHAR(64) NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS anchors (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            block_index BIGINT NOT NULL UNIQUE,
+            submission_id VARCHAR(100) NOT NULL UNIQUE,
+            file_hash CHAR(64) NOT NULL,
+            anchored_at DATETIME(6) NOT NULL,
+            prev_anchor_hash CHAR(64) NULL,
+            anchor_hash CHAR(64) NOT NULL UNIQUE
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(100) NOT NULL UNIQUE,
+            email VARCHAR(255) NOT NULL UNIQUE,
+            password_hash VARCHAR(255) NOT NULL,
+            created_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+        )
+        """
+    )
+
+    # Compatibility for older table variants.
+    _make_nullable_if_exists(cur, db_name, 'submissions', 'team_name', 'VARCHAR(255)')
+    _make_nullable_if_exists(cur, db_name, 'submissions', 'filename', 'VARCHAR(255)')
+    for column, column_type in (
+        ('filename', 'VARCHAR(255)'),
+        ('content_type', 'VARCHAR(255)'),
+        ('file_size', 'BIGINT'),
+        ('file_blob', 'LONGBLOB'),
+        ('anchored_at', 'DATETIME(6)'),
+        ('anchor_hash', 'CHAR(64)'),
+        ('prev_anchor_hash', 'CHAR(64)'),
+    ):
+        _ensure_column(
+            cur, db_name, 'submissions', column,
+            f'ALTER TABLE submissions ADD COLUMN {column} {column_type} NULL'
+        )
+
+
+def _add_blob_ref(cur, db_name: str) -> None:
+    _ensure_column(
+        cur, db_name, 'submissions', 'blob_ref',
+        'ALTER TABLE submissions ADD COLUMN blob_ref VARCHAR(255) NULL'
+    )
+
+
+def _add_merkle_anchoring(cur, db_name: str) -> None:
+    # Many submissions share one block, so anchor_hash is no longer unique.
+    for column, column_type in (
+        ('merkle_root', 'CHAR(64)'),
+        ('merkle_leaf_index', 'INT'),
+        ('merkle_proof', 'TEXT'),
+    ):
+        _ensure_column(
+            cur, db_name, 'submissions', column,
+            f'ALTER TABLE submissions ADD COLUMN {column} {column_type} NULL'
+        )
+    _ensure_column(
+        cur, db_name, 'anchors', 'batch_size',
+        'ALTER TABLE anchors ADD COLUMN batch_size INT NULL'
+    )
+    _drop_unique_index_if_exists(cur, db_name, 'submissions', 'anchor_hash')
+    _ensure_index(
+        cur, db_name, 'submissions', 'idx_submissions_anchor_hash',
+        'CREATE INDEX idx_submissions_anchor_hash ON submissions (anchor_hash)'
+    )
+
+
+def _add_submission_lookup_indexes(cur, db_name: str) -> None:
+    # Keyset pagination of the listing, and reverse lookup by file hash.
+    _ensure_index(
+        cur, db_name, 'submissions', 'idx_submissions_timestamp_id',
+        'CREATE INDEX idx_submissions_timestamp_id ON submissions (timestamp, id)'
+    )
+    _ensure_index(
+        cur, db_name, 'submissions', 'idx_submissions_file_hash',
+        'CREATE INDEX idx_submissions_file_hash ON submissions (file_hash)'
+    )
+
+
+def _create_audit_checkpoints(cur, db_name: str) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS audit_checkpoints (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            block_index BIGINT NOT NULL,
+            anchor_hash CHAR(64) NOT NULL,
+            blocks_verified BIGINT NOT NULL,
+            verified_at DATETIME(6) NOT NULL,
+            signature CHAR(64) NOT NULL
+        )
+        """
+    )
+
+
+def _add_hash_algorithm(cur, db_name: str) -> None:
+    # Tree-hash fingerprints: file_hash is a Merkle root over fixed-size leaves.
+    _ensure_column(
+        cur, db_name, 'submissions', 'hash_algorithm',
+        "ALTER TABLE submissions ADD COLUMN hash_algorithm VARCHAR(32) NOT NULL DEFAULT 'sha256'"
+    )
+    _ensure_column(
+        cur, db_name, 'submissions', 'leaf_hashes',
+        'ALTER TABLE submissions ADD COLUMN leaf_hashes MEDIUMTEXT NULL'
+    )
+
+
+def _create_blobs(cur, db_name: str) -> None:
+    # One row per distinct blob; ref_count is maintained by the anchor transaction.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS blobs (
+            blob_ref VARCHAR(255) PRIMARY KEY,
+            file_size BIGINT NULL,
+            ref_count INT NOT NULL DEFAULT 0,
+            created_at DATETIME(6) NOT NULL,
+            last_referenced_at DATETIME(6) NOT NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO blobs (blob_ref, file_size, ref_count, created_at, last_referenced_at)
+        SELECT blob_ref, MAX(file_size), COUNT(*), MIN(anchored_at), MAX(anchored_at)
+        FROM submissions
+        WHERE blob_ref IS NOT NULL
+        GROUP BY blob_ref
+        ON DUPLICATE KEY UPDATE ref_count = VALUES(ref_count)
+        """
+    )
+
+
+def _add_anchor_status(cur, db_name: str) -> None:
+    # Asynchronous anchoring stores a submission before its anchor exists.
+    _ensure_column(
+        cur, db_name, 'submissions', 'status',
+        "ALTER TABLE submissions ADD COLUMN status VARCHAR(16) NOT NULL DEFAULT 'anchored'"
+    )
+    _make_nullable_if_exists(cur, db_name, 'submissions', 'anchored_at', 'DATETIME(6)')
+    _make_nullable_if_exists(cur, db_name, 'submissions', 'anchor_hash', 'CHAR(64)')
+    _ensure_index(
+        cur, db_name, 'submissions', 'idx_submissions_status_id',
+        'CREATE INDEX idx_submissions_status_id ON submissions (status, id)'
+    )
+
+
+def _sqlite_add_anchor_status(cur) -> None:
+    # SQLite cannot drop NOT NULL in place, so the table is rebuilt.
+    columns = (
+        'id, submission_id, filename, content_type, file_size, file_blob, blob_ref, '
+        'file_hash, hash_algorithm, leaf_hashes, timestamp, anchored_at, anchor_hash, '
+        'prev_anchor_hash, merkle_root, merkle_leaf_index, merkle_proof'
+    )
+    cur.execute(
+        """
+        CREATE TABLE submissions_v8 (
+            id INTEGER PRIMARY KEY,
+            submission_id VARCHAR(100) NOT NULL UNIQUE,
+            filename VARCHAR(255) NULL,
+            content_type VARCHAR(255) NULL,
+            file_size BIGINT NULL,
+            file_blob BLOB NULL,
+            blob_ref VARCHAR(255) NULL,
+            file_hash CHAR(64) NOT NULL,
+            hash_algorithm VARCHAR(32) NOT NULL DEFAULT 'sha256',
+            leaf_hashes TEXT NULL,
+            timestamp DATETIME NOT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'anchored',
+            anchored_at DATETIME NULL,
+            anchor_hash CHAR(64) NULL,
+            prev_anchor_hash CHAR(64) NULL,
+            merkle_root CHAR(64) NULL,
+            merkle_leaf_index INT NULL,
+            merkle_proof TEXT NULL
+        )
+        """
+    )
+    cur.execute(f"INSERT INTO submissions_v8 ({columns}) SELECT {columns} FROM submissions")
+    cur.execute("DROP TABLE submissions")
+    cur.execute("ALTER TABLE submissions_v8 RENAME TO submissions")
+    for index, indexed in (
+        ('idx_submissions_anchor_hash', 'anchor_hash'),
+        ('idx_submissions_timestamp_id', 'timestamp, id'),
+        ('idx_submissions_file_hash', 'file_hash'),
+        ('idx_submissions_status_id', 'status, id'),
+    ):
+        cur.execute(f"CREATE INDEX {index} ON submissions ({indexed})")
+
+
+def _add_file_sha256(cur, db_name: str) -> None:
+    # Tree-hash rows keep the Merkle root in file_hash; lookups by plain SHA-256 need this.
+    _ensure_column(
+        cur, db_name, 'submissions', 'file_sha256',
+        'ALTER TABLE submissions ADD COLUMN file_sha256 CHAR(64) NULL'
+    )
+    _backfill_file_sha256(cur)
+    _ensure_index(
+        cur, db_name, 'submissions', 'idx_submissions_file_sha256',
+        'CREATE INDEX idx_submissions_file_sha256 ON submissions (file_sha256)'
+    )
+
+
+def _backfill_file_sha256(cur) -> None:
+    # Older tree-hash rows have no flat digest on record and stay NULL.
+    cur.execute(
+        """
+        UPDATE submissions SET file_sha256 = file_hash
+        WHERE hash_algorithm = 'sha256' AND file_sha256 IS NULL
+        """
+    )
+
+
+def _sqlite_add_file_sha256(cur) -> None:
+    cur.execute('ALTER TABLE submissions ADD COLUMN file_sha256 CHAR(64) NULL')
+    _backfill_file_sha256(cur)
+    cur.execute('CREATE INDEX idx_submissions_file_sha256 ON submissions (file_sha256)')
+
+
+MIGRATIONS = [
+    (1, 'create core tables', _create_core_tables),
+    (2, 'add submissions.blob_ref', _add_blob_ref),
+    (3, 'add merkle anchoring columns', _add_merkle_anchoring),
+    (4, 'add submission lookup indexes', _add_submission_lookup_indexes),
+    (5, 'create audit_checkpoints', _create_audit_checkpoints),
+    (6, 'add submissions.hash_algorithm', _add_hash_algorithm),
+    (7, 'create blobs', _create_blobs),
+    (8, 'add submissions.status', _add_anchor_status),
+    (9, 'add submissions.file_sha256', _add_file_sha256),
+]
+
+# SQLite versions of the migrations above that post-date SQLite support.
+SQLITE_MIGRATIONS = {
+    8: _sqlite_add_anchor_status,
+    9: _sqlite_add_file_sha256,
+}
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# --- Runner ---
+
+def _create_version_table(cur) -> None:
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME(6) NOT NULL
+        )
+        """
+    )
+
+
+def get_schema_version(config) -> int:
+    """Return the highest applied migration, or 0 for an unversioned database."""
+    if _engine(config) == 'sqlite':
+        try:
+            with _connection(config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT MAX(version) AS version FROM schema_version")
+                    row = cur.fetchone()
+        except Exception as exc:
+            if is_missing_table_error(exc):
+                return 0
+            raise
+        return int(row['version'] or 0) if row else 0
+
+    pymysql = _require_pymysql()
+    try:
+        with _connection(config) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT MAX(version) AS version FROM schema_version")
+                row = cur.fetchone()
+    except (pymysql.err.ProgrammingError, pymysql.err.OperationalError) as exc:
+        if exc.args and exc.args[0] in (1049, 1146):  # unknown database / table
+            return 0
+        raise
+    return int(row['version'] or 0) if row else 0
+
+
+def check_schema_version(config) -> int:
+    """Fail fast when the database has not been migrated to this code's schema.
+
+    Raises:
+        SchemaVersionError: If migrations are pending.
+    """
+    version = get_schema_version(config)
+    if version < LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version} but this code needs "
+            f"{LATEST_VERSION}. Run 'python manage.py migrate'."
+        )
+    if version > LATEST_VERSION:
+        logger.warning(
+            'Database schema version %s is newer than this code (%s)', version, LATEST_VERSION
+        )
+    return version
+
+
+def migrate(config, target: int | None = None) -> list[tuple[int, str]]:
+    """Apply pending migrations up to ``target`` (default: all).
+
+    A MySQL named lock serialises concurrent migrators, so several workers
+    or deploy hooks may call this at once.
+
+    Returns:
+        ``(version, name)`` of each migration applied by this call.
+    """
+    target = LATEST_VERSION if target is None else int(target)
+    if _engine(config) == 'sqlite':
+        return _migrate_sqlite(config, target)
+
+    db_name = _cfg(config, 'DB_NAME', 'hashvault')
+    conn = _open_connection(config, with_database=False)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE DATABASE IF NOT EXISTS {_quote_identifier(db_name)}")
+        conn.commit()
+    finally:
+        conn.close()
+
+    lock_name = f'{db_name}.schema_migrations'
+    applied = []
+    with _connection(config) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT GET_LOCK(%s, %s) AS locked", (lock_name, MIGRATION_LOCK_TIMEOUT))
+            if not (cur.fetchone() or {}).get('locked'):
+                raise RuntimeError('Timed out waiting for another migration run to finish')
+            try:
+                _create_version_table(cur)
+                cur.execute("SELECT version FROM schema_version")
+                done = {int(row['version']) for row in cur.fetchall()}
+
+                for version, name, func in MIGRATIONS:
+                    if version in done or version > target:
+                        continue
+                    logger.info('Applying migration %s: %s', version, name)
+                    # MySQL commits DDL implicitly, so each step must be idempotent.
+                    func(cur, db_name)
+                    cur.execute(
+                        "INSERT INTO schema_version (version, name, applied_at) VALUES (%s, %s, %s)",
+                        (version, name, datetime.now(timezone.utc).replace(tzinfo=None)),
+                    )
+                    applied.append((version, name))
+            finally:
+                cur.execute("SELECT RELEASE_LOCK(%s)", (lock_name,))
+                cur.fetchall()
+    return applied
+
+
+def _sqlite_statements(path: str) -> list[str]:
+    with open(path, encoding='utf-8') as fileobj:
+        lines = [line.split('--', 1)[0] for line in fileobj]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+
+def _migrate_sqlite(config, target: int) -> list[tuple[int, str]]:
+    """Create a new SQLite database at ``LATEST_VERSION``, or upgrade one.
+
+    The write lock taken by ``begin()`` serialises concurrent migrators, and
+    SQLite DDL is transactional, so a failed run leaves nothing behind.
+    """
+    applied = []
+    with _connection(config) as conn:
+        conn.begin()
+        with conn.cursor() as cur:
+            _create_version_table(cur)
+            cur.execute("SELECT version FROM schema_version")
+            done = {int(row['version']) for row in cur.fetchall()}
+            if done:
+                pending = [(version, name) for version, name, _func in MIGRATIONS
+                           if version not in done and version <= target]
+                missing = [version for version, _name in pending if version not in SQLITE_MIGRATIONS]
+                if missing:
+                    raise RuntimeError(
+                        f"No SQLite upgrade path for migrations {missing}; "
+                        "recreate the database or migrate it by hand."
+                    )
+                applied_at = datetime.now(timezone.utc).replace(tzinfo=None)
+                for version, name in pending:
+                    logger.info('Applying migration %s: %s', version, name)
+                    SQLITE_MIGRATIONS[version](cur)
+                    cur.execute(
+                        "INSERT INTO schema_version (version, name, applied_at) VALUES (%s, %s, %s)",
+                        (version, name, applied_at),
+                    )
+                    applied.append((version, name))
+            else:
+                if target < LATEST_VERSION:
+                    raise RuntimeError(
+                        f"SQLite databases are created at version {LATEST_VERSION}; "
+                        "--target is not supported."
+                    )
+                logger.info('Creating SQLite schema version %s', LATEST_VERSION)
+                # Statement by statement: executescript() would commit first.
+                for statement in _sqlite_statements(SQLITE_SCHEMA_PATH):
+                    cur.execute(statement)
+                applied_at = datetime.now(timezone.utc).replace(tzinfo=None)
+                for version, name, _func in MIGRATIONS:
+                    cur.execute(
+                        "INSERT INTO schema_version (version, name, applied_at) VALUES (%s, %s, %s)",
+                        (version, name, applied_at),
+                    )
+                    applied.append((version, name))
+        conn.commit()
+    return applied
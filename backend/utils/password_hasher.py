@@ -0,0 +1,114 @@
+"""Bounded executor for bcrypt password hashing.
+
+bcrypt is deliberately slow, so hashing on the request thread lets a burst
+of logins occupy every server worker. Hashes and checks run on a small
+dedicated thread pool instead (bcrypt releases the GIL while it works).
+At most ``workers + max_queue`` jobs are admitted; anything beyond that is
+rejected immediately with ``HasherBusyError`` so the app can answer 503
+rather than queueing requests that would time out anyway.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from utils.extensions import get_extension
+
+
+class HasherBusyError(RuntimeError):
+    """Raised when the password hashing queue is full."""
+
+
+class PasswordHasher:
+    """Run bcrypt on a size-limited pool with a queue-depth limit.
+
+    Args:
+        workers: Threads running bcrypt concurrently.
+        max_queue: Jobs allowed to wait for a free worker.
+        rounds: bcrypt cost factor for new hashes.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 32, rounds: int = 12):
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self.rounds = int(rounds)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix='password-hasher')
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusyError('Password hashing queue is full')
+        with self._lock:
+            self.in_flight += 1
+        queued_at = time.monotonic()
+
+        def job():
+            started = time.monotonic()
+            try:
+                return func(*args)
+            finally:
+                finished = time.monotonic()
+                with self._lock:
+                    waited = started - queued_at
+                    self.in_flight -= 1
+                    self.completed += 1
+                    self.wait_seconds_total += waited
+                    self.wait_seconds_max = max(self.wait_seconds_max, waited)
+                    self.run_seconds_total += finished - started
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(job)
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+            raise
+        return future.result()
+
+    def hash_password(self, password: str) -> str:
+        """Return the bcrypt hash of ``password`` using the configured cost."""
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check_password(self, password: str, password_hash: str) -> bool:
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = self.in_flight
+            completed = self.completed
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'rounds': self.rounds,
+                'in_flight': in_flight,
+                'queued': max(0, in_flight - self.workers),
+                'completed': completed,
+                'rejected': self.rejected,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'run_seconds_avg': round(self.run_seconds_total / completed, 6) if completed else None,
+            }
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Return the app's password hasher, creating it on first use."""
+    return get_extension('hashvault_password_hasher', lambda config: PasswordHasher(
+        workers=config.get('PASSWORD_HASH_WORKERS', 2),
+        max_queue=config.get('PASSWORD_HASH_QUEUE', 32),
+        rounds=config.get('BCRYPT_ROUNDS', 12),
+    ))
@@ -0,0 +1,172 @@
+"""Opt-in per-request profiling.
+
+A request is profiled when it is sampled (``PROFILE_SAMPLE_RATE``) or when
+it carries ``X-Profile: 1`` together with a valid ``X-Admin-Token``. A
+profiled request records a per-phase timing breakdown:
+
+- explicit phases marked in the routes with ``phase()`` (multipart parsing,
+  storing, fingerprinting, anchoring, serialising);
+- every ``db_utils`` call (``db.<function>``) and hashing pass
+  (``hash.<operation>``) made on the request thread, reported by
+  ``utils.metrics``. Writes batched by the anchor sequencer run on its own
+  thread and are only visible as the ``anchor`` phase.
+
+It also runs under ``cProfile``. If the request takes at least
+``PROFILE_SLOW_MS``, or profiling was requested with the header, the
+breakdown (``.json``) and the full profile (``.prof``, readable with
+``pstats`` or snakeviz) are written to ``PROFILE_DIR``. Only the newest
+``PROFILE_KEEP`` dumps are kept. Header-requested profiles also return the
+breakdown in a ``Server-Timing`` response header.
+
+Requests that are not profiled pay one header lookup, plus a
+``random()`` call when sampling is on.
+"""
+
+import cProfile
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+_active = contextvars.ContextVar('hashvault_request_profile', default=None)
+
+
+class RequestProfile:
+    """Phase timings and cProfile run of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}  # name -> [seconds, calls]
+        self.profiler = cProfile.Profile()
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self.phases.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def breakdown(self) -> list[dict]:
+        return [
+            {'phase': name, 'ms': round(seconds * 1000, 3), 'calls': calls}
+            for name, (seconds, calls) in sorted(self.phases.items(), key=lambda item: -item[1][0])
+        ]
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add ``seconds`` to ``name`` on the current request's profile, if any."""
+    profile = _active.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block as a named phase of the current request's profile."""
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+def _server_timing(profile: RequestProfile) -> str:
+    return ', '.join(
+        f"{re.sub(r'[^A-Za-z0-9_.-]', '_', name)};dur={seconds * 1000:.3f}"
+        for name, (seconds, _calls) in profile.phases.items()
+    )
+
+
+def _rotate(directory: str, keep: int) -> None:
+    dumps = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith('.json')),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in dumps[:max(0, len(dumps) - keep)]:
+        for path in (entry.path, entry.path[:-len('.json')] + '.prof'):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def dump_profile(directory: str, keep: int, profile: RequestProfile, summary: dict) -> str:
+    """Write a profile's breakdown and cProfile stats; returns the base path."""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S.%fZ')
+    endpoint = re.sub(r'[^A-Za-z0-9_.-]', '_', summary.get('endpoint') or 'unmatched')
+    base = os.path.join(directory, f"{stamp}-{endpoint}-{round(summary['duration_ms'])}ms")
+    profile.profiler.dump_stats(base + '.prof')
+    with open(base + '.json', 'w', encoding='utf-8') as fileobj:
+        json.dump(dict(summary, phases=profile.breakdown()), fileobj, indent=2)
+    _rotate(directory, keep)
+    return base
+
+
+def install_profiling(app) -> None:
+    """Register the profiling hooks on ``app``."""
+    from utils.auth_middleware import has_admin_token
+
+    config = app.config
+
+    @app.before_request
+    def _start_profile():
+        forced = request.headers.get('X-Profile') == '1' and has_admin_token()
+        rate = config.get('PROFILE_SAMPLE_RATE', 0.0)
+        if not forced and not (rate > 0 and random.random() < rate):
+            return
+        profile = RequestProfile()
+        try:
+            profile.profiler.enable()
+        except ValueError:  # another profiler is active on this thread
+            return
+        g.request_profile = (profile, forced, _active.set(profile))
+
+    @app.after_request
+    def _finish_profile(response):
+        state = g.pop('request_profile', None)
+        if state is None:
+            return response
+        profile, forced, token = state
+        profile.profiler.disable()
+        _active.reset(token)
+
+        duration_ms = (time.perf_counter() - profile.started) * 1000
+        if forced:
+            response.headers['Server-Timing'] = _server_timing(profile)
+        if forced or duration_ms >= config.get('PROFILE_SLOW_MS', 1000):
+            summary = {
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round(duration_ms, 3),
+                'sampled': not forced,
+            }
+            try:
+                base = dump_profile(config.get('PROFILE_DIR'), config.get('PROFILE_KEEP', 100),
+                                    profile, summary)
+                logger.warning('Profiled %s %s took %.0f ms; profile written to %s',
+                               request.method, request.path, duration_ms, base)
+            except OSError as exc:
+                logger.warning('Could not write request profile: %s', exc)
+        return response
+
+    @app.teardown_request
+    def _drop_profile(_exc):
+        # after_request is skipped when a response could not be built.
+        state = g.pop('request_profile', None)
+        if state is not None:
+            state[0].profiler.disable()
+            _active.reset(state[2])
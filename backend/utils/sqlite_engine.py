@@ -0,0 +1,146 @@
+"""Embedded SQLite storage engine (``DB_ENGINE=sqlite``).
+
+Single-node deployments, tests and benchmarks can run on a local SQLite
+file instead of a MySQL server. ``db_utils`` is shared by both engines:
+``SQLiteConnection`` provides the part of the PyMySQL connection API that it
+uses (dict rows, ``%s`` placeholders, ``begin``/``commit``/``rollback``,
+``ping``) and rewrites the few MySQL-only constructs in its queries.
+
+The database runs in WAL mode, so readers never block the writer or each
+other. ``begin()`` takes the write lock immediately (``BEGIN IMMEDIATE``).
+That stands in for ``SELECT ... FOR UPDATE`` on the chain tip: SQLite
+has a single writer, so holding the write lock serialises anchoring.
+"""
+
+import re
+import sqlite3
+from datetime import datetime
+from functools import lru_cache
+
+SYNCHRONOUS_MODES = ('FULL', 'NORMAL')
+
+
+def _adapt_datetime(value: datetime) -> str:
+    # Fixed-width text keeps lexical order equal to time order for range scans.
+    return value.isoformat(' ', timespec='microseconds')
+
+
+def _convert_datetime(value: bytes) -> datetime:
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter('DATETIME', _convert_datetime)
+
+_FOR_UPDATE = re.compile(r'\bFOR\s+UPDATE\b', re.IGNORECASE)
+_SUBSTRING = re.compile(r'\bSUBSTRING\(', re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def translate(sql: str) -> str:
+    """Rewrite a ``db_utils`` query for SQLite."""
+    sql = _FOR_UPDATE.sub('', sql)  # the write lock is taken by BEGIN IMMEDIATE
+    sql = _SUBSTRING.sub('substr(', sql)
+    return sql.replace('%s', '?')
+
+
+class SQLiteCursor:
+    """DB-API cursor returning dict rows (or tuples) like PyMySQL's cursors."""
+
+    dialect = 'sqlite'
+
+    def __init__(self, conn: sqlite3.Connection, dict_rows: bool = True):
+        self._cursor = conn.cursor()
+        self._dict_rows = dict_rows
+
+    def execute(self, sql: str, params=()) -> int:
+        self._cursor.execute(translate(sql), tuple(params or ()))
+        return self._cursor.rowcount
+
+    def executemany(self, sql: str, rows) -> int:
+        self._cursor.executemany(translate(sql), rows)
+        return self._cursor.rowcount
+
+    def _row(self, row):
+        if row is None or not self._dict_rows:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self) -> list:
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        # sqlite3 cursors step through results lazily, like a server-side cursor.
+        for row in self._cursor:
+            yield self._row(row)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def close(self) -> None:
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class SQLiteConnection:
+    """A SQLite connection in autocommit mode with explicit write transactions.
+
+    Args:
+        path: Database file; created if missing.
+        timeout: Seconds to wait for another writer's lock.
+        synchronous: ``FULL`` (fsync every commit) or ``NORMAL`` (fsync at
+            WAL checkpoints; a power loss can drop the latest commits).
+    """
+
+    def __init__(self, path: str, timeout: float = 10.0, synchronous: str = 'FULL'):
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f'SQLITE_SYNCHRONOUS must be one of {", ".join(SYNCHRONOUS_MODES)}')
+        self._conn = sqlite3.connect(
+            path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,  # the pool hands a connection to one thread at a time
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(f'PRAGMA synchronous={synchronous}')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+
+    def cursor(self, dict_rows: bool = True) -> SQLiteCursor:
+        return SQLiteCursor(self._conn, dict_rows)
+
+    def begin(self) -> None:
+        self._conn.execute('BEGIN IMMEDIATE')
+
+    def commit(self) -> None:
+        if self._conn.in_transaction:
+            self._conn.execute('COMMIT')
+
+    def rollback(self) -> None:
+        if self._conn.in_transaction:
+            self._conn.execute('ROLLBACK')
+
+    def ping(self, reconnect: bool = False) -> None:
+        self._conn.execute('SELECT 1')
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def is_missing_table_error(exc: Exception) -> bool:
+    return isinstance(exc, sqlite3.OperationalError) and 'no such table' in str(exc)
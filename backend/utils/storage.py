@@ -1,35 +1,230 @@
 """Submission storage backend.
 
-All records are persisted in MySQL.
+Submission metadata and anchors are persisted in MySQL. File contents live
+in a pluggable blob store (see ``utils.blob_store``) and MySQL keeps only a
+``blob_ref`` pointing at them. Rows written before the blob store existed
+keep their bytes in ``submissions.file_blob`` and are served read-only
+through the MySQL compatibility backend.
+
+Submission records never change once anchored, so single-record lookups
+go through a per-process read-through cache. IDs that do not exist are
+remembered briefly as well, so a flood of bogus IDs does not reach MySQL.
+Pending records (``ANCHOR_ASYNC``) are not cached until they are anchored.
 """
 
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
 from flask import current_app
 
+from utils.anchor_sequencer import AnchorSequencer, AnchorTimeoutError
+from utils.anchor_worker import AnchorWorker, wait_until_anchored
+from utils.blob_store import MySQLLegacyBlobStore, create_blob_store, split_blob_ref
+from utils.cache import MISSING, TTLCache
+from utils.db_routing import note_write, primary_reads
+from utils.extensions import get_extension
+from utils.hash_utils import tree_hash_algorithm, tree_hash_settings, tree_hash_stream
+from utils.metrics import ANCHOR_WAIT
+from utils.profiling import phase
+from utils.upload_sessions import UploadSessionStore, create_upload_session_store
 from utils.db_utils import (
-    get_all_submissions_mysql,
     get_submission_mysql,
+    get_submission_proof_mysql,
+    get_submissions_by_hash_mysql,
+    get_submissions_mysql,
+    insert_pending_submission_mysql,
+    iter_submissions_mysql,
+    list_submissions_mysql,
     save_submission_mysql,
 )
 
 
+def get_blob_store():
+    """Return the app's writable blob store, creating it on first use."""
+    return get_extension('hashvault_blob_store', create_blob_store)
+
+
+_NOT_FOUND = object()
+
+
+def _submission_cache() -> TTLCache:
+    """Return the app's submission record cache, creating it on first use."""
+    return get_extension('hashvault_submission_cache', lambda config: TTLCache(
+        config.get('SUBMISSION_CACHE_SIZE', 10000),
+        config.get('SUBMISSION_CACHE_TTL', 3600),
+        name='submissions',
+        max_bytes=config.get('SUBMISSION_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+    ))
+
+
+def _frozen(value):
+    """``value`` with lists (e.g. ``leaf_hashes``) turned into tuples, recursively."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_frozen(item) for item in value)
+    return value
+
+
+def _cache_submission(cache: TTLCache, submission_id: str, submission: dict | None) -> None:
+    """Cache a copy of ``submission`` whose nested values are immutable.
+
+    Readers get a shallow copy of the cached dict, so nothing they do to it
+    can change the cached record.
+    """
+    if submission is not None and submission.get('status') == 'pending':
+        return  # its anchor columns are about to change
+    if submission is None:
+        cache.set(submission_id, _NOT_FOUND,
+                  ttl=current_app.config.get('SUBMISSION_CACHE_NEGATIVE_TTL', 5))
+    else:
+        cache.set(submission_id, {key: _frozen(value) for key, value in submission.items()})
+
+
+def get_submission_cache_stats() -> dict:
+    return _submission_cache().stats()
+
+
+def get_upload_sessions() -> UploadSessionStore:
+    """Return the app's resumable upload session store, creating it on first use."""
+    return get_extension('hashvault_upload_sessions', create_upload_session_store)
+
+
+def get_anchor_sequencer() -> AnchorSequencer:
+    """Return the app's anchor sequencer, creating it on first use."""
+    return get_extension('hashvault_anchor_sequencer', lambda config: AnchorSequencer(
+        config,
+        max_batch=config.get('ANCHOR_BATCH_MAX', 100),
+        max_wait=config.get('ANCHOR_BATCH_WAIT_MS', 0) / 1000.0,
+        mode=config.get('ANCHOR_MODE', 'chain'),
+    ))
+
+
+def get_anchor_worker() -> AnchorWorker:
+    """Return the app's background anchor worker (``ANCHOR_ASYNC``), creating it on first use."""
+    return get_extension('hashvault_anchor_worker', lambda config: AnchorWorker(
+        config,
+        max_batch=config.get('ANCHOR_BATCH_MAX', 100),
+        poll_interval=config.get('ANCHOR_POLL_INTERVAL', 1.0),
+        mode=config.get('ANCHOR_MODE', 'chain'),
+    ))
+
+
+def resolve_submission_blob(submission: dict):
+    """Return ``(store, key)`` holding the bytes of ``submission``."""
+    blob_ref = submission.get('blob_ref')
+    if not blob_ref:
+        return MySQLLegacyBlobStore(current_app.config), submission['submission_id']
+
+    scheme, key = split_blob_ref(blob_ref)
+    store = get_blob_store()
+    if scheme == store.scheme:
+        return store, key
+    if scheme == MySQLLegacyBlobStore.scheme:
+        return MySQLLegacyBlobStore(current_app.config), key
+    raise RuntimeError(f"No blob backend configured for '{scheme}' references")
+
+
 def save_submission(
     submission_id: str,
     file_hash: str,
     timestamp: str,
     filename: str,
     content_type: str,
-    file_bytes: bytes,
+    file_size: int,
+    blob_ref: str,
+    hash_algorithm: str = 'sha256',
+    leaf_hashes: list[str] | None = None,
+    file_sha256: str | None = None,
 ) -> dict:
-    """Save a submission record."""
-    return save_submission_mysql(
-        current_app.config,
-        submission_id=submission_id,
-        file_hash=file_hash,
-        timestamp=timestamp,
-        filename=filename,
-        content_type=content_type,
-        file_bytes=file_bytes,
-    )
+    """Anchor and save a submission record for a file already in the blob store.
+
+    ``file_sha256`` is the flat SHA-256 of the file; it defaults to
+    ``file_hash`` for ``sha256`` fingerprints.
+
+    With ``ANCHOR_ASYNC`` the record is stored as ``pending`` and returned
+    at once; the background anchor worker anchors it shortly after. With
+    ``ANCHOR_SEQUENCER`` enabled (always the case in ``merkle`` mode)
+    the record is handed to the in-process sequencer, which group-commits
+    concurrent submissions; otherwise it is anchored in its own transaction.
+    """
+    submission = {
+        'submission_id': submission_id,
+        'file_hash': file_hash,
+        'timestamp': timestamp,
+        'filename': filename,
+        'content_type': content_type,
+        'file_size': file_size,
+        'blob_ref': blob_ref,
+        'hash_algorithm': hash_algorithm,
+        'leaf_hashes': leaf_hashes,
+        'file_sha256': file_sha256,
+    }
+    config = current_app.config
+    if config.get('ANCHOR_ASYNC'):
+        with phase('anchor'):
+            saved = insert_pending_submission_mysql(config, **submission)
+        get_anchor_worker().wake()
+        note_write()
+        _submission_cache().invalidate(submission_id)
+        return saved
+
+    mode = config.get('ANCHOR_MODE', 'chain')
+    with ANCHOR_WAIT.time(mode), phase('anchor'):
+        if mode == 'chain' and not config.get('ANCHOR_SEQUENCER', True):
+            saved = save_submission_mysql(config, **submission)
+        else:
+            future = get_anchor_sequencer().submit(submission)
+            try:
+                saved = future.result(timeout=config.get('ANCHOR_TIMEOUT', 30))
+            except FutureTimeoutError:
+                # Withdraw it so a retried submit cannot be anchored twice. Once
+                # its batch is committing it can no longer be withdrawn; wait
+                # once more, then tell the client to check its status.
+                if future.cancel():
+                    raise AnchorTimeoutError(
+                        f'Submission {submission_id} was not anchored in time'
+                    ) from None
+                try:
+                    saved = future.result(timeout=config.get('ANCHOR_TIMEOUT', 30))
+                except FutureTimeoutError:
+                    raise AnchorTimeoutError(
+                        f'Submission {submission_id} is still being anchored',
+                        submission_id=submission_id,
+                    ) from None
+    note_write()
+    # Forget a cached miss for this ID; the record itself is cached on first read.
+    _submission_cache().invalidate(submission_id)
+    return saved
+
+
+def fingerprint_blob(blob_ref: str, flat_hash: str,
+                     tree: tuple | None = None) -> tuple[str, str, list[str] | None]:
+    """Fingerprint a stored file with the configured ``HASH_ALGORITHM``.
+
+    ``sha256`` reuses the flat digest computed while the file was stored.
+    ``tree`` uses ``tree``, the ``(hash_algorithm, root, leaves)`` computed
+    while the file was received; only without one (or with a different
+    leaf size) is the blob read back and hashed again.
+
+    Returns:
+        Tuple of (hash_algorithm, file_hash, leaf hashes or None).
+    """
+    settings = tree_hash_settings(current_app.config)
+    if settings is None:
+        return 'sha256', flat_hash, None
+
+    leaf_size, workers = settings
+    hash_algorithm = tree_hash_algorithm(leaf_size)
+    if tree is not None and tree[0] == hash_algorithm:
+        return hash_algorithm, tree[1], list(tree[2])
+    store, key = resolve_submission_blob({'blob_ref': blob_ref})
+    with store.open(key) as fileobj:
+        root, leaves = tree_hash_stream(fileobj, leaf_size, workers)
+    return hash_algorithm, root, leaves
+
+
+def open_submission_file(submission: dict):
+    """Open the stored file of a submission for binary reading."""
+    store, key = resolve_submission_blob(submission)
+    return store.open(key)
 
 
 def get_submission(submission_id: str) -> dict | None:
@@ -41,13 +236,104 @@ def get_submission(submission_id: str) -> dict | None:
     Returns:
         Submission dict if found, None otherwise.
     """
-    return get_submission_mysql(current_app.config, submission_id)
+    cache = _submission_cache()
+    cached = cache.get(submission_id)
+    if cached is _NOT_FOUND:
+        return None
+    if cached is not MISSING:
+        return dict(cached)
+
+    submission = get_submission_mysql(current_app.config, submission_id)
+    _cache_submission(cache, submission_id, submission)
+    return dict(submission) if submission else None
+
+
+def get_submission_status(submission_id: str, wait: float = 0.0) -> dict | None:
+    """Return a submission read from the primary, waiting for a pending anchor.
+
+    Args:
+        wait: Seconds to wait (long-poll) while the submission is pending.
+
+    Returns:
+        Submission dict if found, None otherwise.
+    """
+    config = current_app.config
+    latest = {}
+
+    def is_pending() -> bool:
+        with primary_reads():
+            latest['submission'] = get_submission_mysql(config, submission_id)
+        return bool(latest['submission']) and latest['submission'].get('status') == 'pending'
+
+    if wait > 0 and config.get('ANCHOR_ASYNC'):
+        wait_until_anchored(get_anchor_worker(), is_pending, wait)
+    else:
+        is_pending()
+    submission = latest['submission']
+    if submission:
+        _cache_submission(_submission_cache(), submission_id, submission)
+    return submission
+
+
+def get_submissions(submission_ids: list[str]) -> dict[str, dict]:
+    """Retrieve many submissions in one round-trip.
+
+    Returns:
+        Mapping of submission_id to submission dict for the IDs that exist.
+    """
+    cache = _submission_cache()
+    found = {}
+    pending = []
+    for submission_id in dict.fromkeys(submission_ids):
+        cached = cache.get(submission_id)
+        if cached is MISSING:
+            pending.append(submission_id)
+        elif cached is not _NOT_FOUND:
+            found[submission_id] = dict(cached)
+
+    if pending:
+        fetched = get_submissions_mysql(current_app.config, pending)
+        for submission_id in pending:
+            submission = fetched.get(submission_id)
+            _cache_submission(cache, submission_id, submission)
+            if submission:
+                found[submission_id] = dict(submission)
+    return found
 
 
-def get_all_submissions() -> list[dict]:
-    """Retrieve all submissions.
+def get_submissions_by_hash(file_hash: str, limit: int = 100) -> list[dict]:
+    """Find the submissions whose file has the given flat SHA-256 hash.
 
     Returns:
-        List of all submission dicts.
+        Up to ``limit`` submission dicts, oldest first.
     """
-    return get_all_submissions_mysql(current_app.config)
+    return get_submissions_by_hash_mysql(current_app.config, file_hash, limit)
+
+
+def get_submission_proof(submission_id: str) -> dict | None:
+    """Retrieve a submission together with its anchor block and Merkle path.
+
+    Returns:
+        Proof row if the submission exists, None otherwise.
+    """
+    return get_submission_proof_mysql(current_app.config, submission_id)
+
+
+def get_submissions_page(limit: int, after: tuple | None = None,
+                         filters: dict | None = None) -> tuple[list[dict], tuple | None]:
+    """Retrieve one page of submissions, newest first.
+
+    Args:
+        limit: Maximum number of submissions to return.
+        after: Keyset position returned with the previous page.
+        filters: Optional column filters (see ``list_submissions_mysql``).
+
+    Returns:
+        Tuple of (submission dicts, position for the next page or None).
+    """
+    return list_submissions_mysql(current_app.config, limit, after=after, filters=filters)
+
+
+def iter_all_submissions(after: tuple | None = None, filters: dict | None = None):
+    """Stream every matching submission, newest first, without buffering."""
+    return iter_submissions_mysql(current_app.config, after=after, filters=filters)
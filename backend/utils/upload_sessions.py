@@ -0,0 +1,368 @@
+"""Resumable chunked uploads.
+
+An upload session is a partial file plus a small JSON metadata file in
+``<BLOB_STORAGE_DIR>/sessions``. Clients append byte ranges in order; the
+size of the partial file on disk is the authoritative offset, so a session
+survives dropped connections, worker restarts and requests landing on a
+different worker.
+
+Appends and finalization hold an exclusive ``flock`` on the session's
+metadata file, so two workers racing on the same offset cannot both write.
+(Without ``fcntl``, e.g. on Windows, the lock only covers one process.)
+
+Each worker keeps the running SHA-256 state (and, with
+``HASH_ALGORITHM=tree``, the tree-hash leaves) of the sessions it has been
+appending to, so finalizing does not re-read the file. The states live in a
+bounded LRU/TTL cache and are dropped once another worker has moved the
+session on, so workers that only saw part of an upload do not keep its
+state. If a chunk lands on a
+worker without matching state (another worker took the previous chunk, or
+the process restarted) the partial file is re-hashed once to rebuild it.
+Chunk hashing and re-hashing are reported under the ``upload_chunk`` and
+``upload_rehash`` hashing metrics.
+Sessions untouched for ``UPLOAD_SESSION_TTL`` seconds are garbage-collected.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from utils.cache import MISSING, TTLCache
+from utils.hash_utils import TreeHasher, tree_hash_algorithm, tree_hash_settings
+from utils.metrics import observe_hashing
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadSessionError(Exception):
+    """Base class for upload session errors."""
+
+
+class UploadNotFound(UploadSessionError):
+    pass
+
+
+class UploadOffsetMismatch(UploadSessionError):
+    """Raised when a chunk does not start at the current offset."""
+
+    def __init__(self, offset: int):
+        super().__init__(f'Upload is at offset {offset}')
+        self.offset = offset
+
+
+class UploadHashMismatch(UploadSessionError):
+    """Raised when the received bytes do not match the declared SHA-256."""
+
+    def __init__(self, file_hash: str):
+        super().__init__('Uploaded data does not match the declared SHA-256')
+        self.file_hash = file_hash
+
+
+class UploadSessionStore:
+    """Partial uploads on local disk with per-process hash state.
+
+    Args:
+        root: Directory holding the session files. It must be on the same
+            filesystem as the blob store so finished uploads can be renamed
+            into place.
+        ttl: Seconds of inactivity after which a session is collected.
+        tree: Optional ``(leaf size, workers)`` to also build a tree-hash
+            fingerprint of each upload.
+        max_hash_states: Sessions whose hash state this process keeps.
+            An evicted session is re-hashed from disk on its next chunk.
+    """
+
+    def __init__(self, root: str, ttl: float = 86400, tree: tuple[int, int] | None = None,
+                 max_hash_states: int = 256):
+        self.root = os.path.abspath(root)
+        self.ttl = float(ttl)
+        self.tree = tree
+        os.makedirs(self.root, exist_ok=True)
+        # upload_id -> (offset, sha256, TreeHasher or None)
+        self._hashers = TTLCache(max_hash_states, self.ttl, name='upload_hash_states')
+        self._locks = {}  # upload_id -> [lock, holders and waiters]; only while in use
+        self._lock = threading.Lock()
+        self._last_gc = 0.0
+
+    def _paths(self, upload_id: str) -> tuple[str, str]:
+        if not _UPLOAD_ID.match(upload_id or ''):
+            raise UploadNotFound(upload_id)
+        base = os.path.join(self.root, upload_id)
+        return base + '.part', base + '.json'
+
+    @contextmanager
+    def _session_lock(self, upload_id: str):
+        with self._lock:
+            entry = self._locks.setdefault(upload_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[upload_id]
+
+    @contextmanager
+    def _locked(self, upload_id: str):
+        """Hold the session's lock against other threads and worker processes."""
+        _part_path, meta_path = self._paths(upload_id)
+        with self._session_lock(upload_id):
+            if fcntl is None:
+                yield
+                return
+            while True:
+                try:
+                    fd = os.open(meta_path, os.O_RDONLY)
+                except FileNotFoundError as exc:
+                    raise UploadNotFound(upload_id) from exc
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    current = os.stat(meta_path).st_ino
+                except FileNotFoundError:
+                    current = None
+                if current == os.fstat(fd).st_ino:
+                    break
+                # Deleted or rewritten while we waited; the lock we hold is stale.
+                os.close(fd)
+                if current is None:
+                    raise UploadNotFound(upload_id)
+            try:
+                yield
+            finally:
+                os.close(fd)  # releases the flock
+
+    def _write_meta(self, meta: dict) -> None:
+        _part_path, meta_path = self._paths(meta['upload_id'])
+        tmp_path = f'{meta_path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fileobj:
+            json.dump({key: value for key, value in meta.items() if key != 'offset'}, fileobj)
+        os.replace(tmp_path, meta_path)
+
+    def _forget_hasher(self, upload_id: str) -> None:
+        self._hashers.invalidate(upload_id)
+
+    def create(self, filename: str, content_type: str, size: int,
+               expected_hash: str | None = None) -> dict:
+        """Start a new session and return its metadata."""
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path = self._paths(upload_id)
+        meta = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'content_type': content_type,
+            'size': int(size),
+            'sha256': expected_hash,
+            'created_at': time.time(),
+        }
+        open(part_path, 'xb').close()
+        with open(meta_path, 'x', encoding='utf-8') as fileobj:
+            json.dump(meta, fileobj)
+        self._hashers.set(upload_id, (0, hashlib.sha256(), self._new_tree_hasher()))
+        return dict(meta, offset=0)
+
+    def get(self, upload_id: str) -> dict:
+        """Return the session metadata including the current ``offset``."""
+        part_path, meta_path = self._paths(upload_id)
+        try:
+            with open(meta_path, encoding='utf-8') as fileobj:
+                meta = json.load(fileobj)
+            if meta.get('blob_ref'):
+                return dict(meta, offset=meta['size'])  # committed; the partial file is gone
+            offset = os.path.getsize(part_path)
+        except FileNotFoundError as exc:
+            raise UploadNotFound(upload_id) from exc
+        return dict(meta, offset=offset)
+
+    def _new_tree_hasher(self) -> TreeHasher | None:
+        return TreeHasher(*self.tree) if self.tree else None
+
+    def _hasher_at(self, upload_id: str, part_path: str, offset: int):
+        """Return ``(sha256, TreeHasher or None)`` for the first ``offset`` bytes.
+
+        The cached state is taken out of the cache; callers store the
+        advanced state again. A state left behind at another offset is stale
+        and dropped.
+        """
+        state = self._hashers.get(upload_id)
+        if state is not MISSING:
+            self._hashers.invalidate(upload_id)
+            if state[0] == offset:
+                return state[1], state[2]
+        # Another worker appended the previous chunk, or we restarted.
+        sha256 = hashlib.sha256()
+        tree = self._new_tree_hasher()
+        started = time.perf_counter()
+        size = 0
+        with open(part_path, 'rb') as fileobj:
+            for chunk in iter(lambda: fileobj.read(1024 * 1024), b''):
+                sha256.update(chunk)
+                if tree is not None:
+                    tree.update(chunk)
+                size += len(chunk)
+        observe_hashing('upload_rehash', size, time.perf_counter() - started)
+        return sha256, tree
+
+    def append(self, upload_id: str, start: int, stream, chunk_size: int = 1024 * 1024,
+               sync=None) -> int:
+        """Append the bytes of ``stream`` at ``start``.
+
+        Args:
+            start: Offset the client believes the upload is at.
+            stream: Readable binary stream with the chunk data.
+            sync: Optional callable ``(fileobj)`` run before returning, e.g.
+                the blob store's fsync policy.
+
+        Returns:
+            The new offset.
+
+        Raises:
+            UploadOffsetMismatch: If ``start`` is not the current offset.
+            UploadSessionError: If the chunk would exceed the declared size.
+                Nothing from it is kept.
+        """
+        part_path, _meta_path = self._paths(upload_id)
+        with self._locked(upload_id):
+            meta = self.get(upload_id)
+            offset = meta['offset']
+            if start != offset or meta.get('blob_ref'):
+                raise UploadOffsetMismatch(offset)
+            sha256, tree = self._hasher_at(upload_id, part_path, offset)
+
+            hash_seconds = 0.0
+            with open(part_path, 'ab') as fileobj:
+                for chunk in iter(lambda: stream.read(chunk_size), b''):
+                    if offset + len(chunk) > meta['size']:
+                        fileobj.truncate(start)
+                        raise UploadSessionError('Chunk exceeds the declared upload size')
+                    fileobj.write(chunk)
+                    started = time.perf_counter()
+                    sha256.update(chunk)
+                    if tree is not None:
+                        tree.update(chunk)
+                    hash_seconds += time.perf_counter() - started
+                    offset += len(chunk)
+                observe_hashing('upload_chunk', offset - start, hash_seconds)
+                if sync:
+                    sync(fileobj)
+                else:
+                    fileobj.flush()
+
+            self._hashers.set(upload_id, (offset, sha256, tree))
+        return offset
+
+    def finish(self, upload_id: str, commit, submit) -> tuple[dict, object]:
+        """Commit a fully received session, submit it, then remove it.
+
+        Both steps run under the session lock. The outcome of ``commit`` is
+        saved with the session, so if ``submit`` fails the client can call
+        ``finish`` again without re-uploading and the file is not committed
+        twice.
+
+        Args:
+            commit: Callable ``(path, file_hash, metadata)`` that moves the
+                complete file into permanent storage and returns a dict of
+                fields to record with the session (e.g. ``blob_ref``, which
+                marks the session as committed).
+            submit: Callable ``(metadata)`` run once the file is committed.
+                The metadata includes ``file_hash`` (the flat SHA-256),
+                ``tree`` (``[hash_algorithm, root, leaves]`` when the store
+                builds tree hashes) and the fields returned by ``commit``.
+
+        Returns:
+            Tuple of (metadata, result of ``submit``).
+
+        Raises:
+            UploadOffsetMismatch: If bytes are still missing.
+            UploadHashMismatch: If the data does not match the SHA-256 given
+                when the session was created. The session is discarded.
+        """
+        part_path, _meta_path = self._paths(upload_id)
+        with self._locked(upload_id):
+            meta = self.get(upload_id)
+            if not meta.get('blob_ref'):
+                offset = meta['offset']
+                if offset != meta['size']:
+                    raise UploadOffsetMismatch(offset)
+                sha256, tree = self._hasher_at(upload_id, part_path, offset)
+                file_hash = sha256.hexdigest()
+                if meta.get('sha256') and meta['sha256'].lower() != file_hash:
+                    self.delete(upload_id)
+                    raise UploadHashMismatch(file_hash)
+                meta['file_hash'] = file_hash
+                if tree is not None:
+                    meta['tree'] = [tree_hash_algorithm(tree.leaf_size), *tree.result()]
+                meta.update(commit(part_path, file_hash, meta))
+                self._write_meta(meta)
+            result = submit(meta)
+            self.delete(upload_id)
+        return meta, result
+
+    def delete(self, upload_id: str) -> None:
+        for path in self._paths(upload_id):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        self._forget_hasher(upload_id)
+
+    def collect_garbage(self, now: float | None = None) -> int:
+        """Delete sessions idle for longer than the TTL.
+
+        Returns:
+            Number of sessions removed.
+        """
+        now = time.time() if now is None else now
+        self._last_gc = time.monotonic()
+        removed = 0
+        for name in os.listdir(self.root):
+            upload_id, ext = os.path.splitext(name)
+            if ext != '.json' or not _UPLOAD_ID.match(upload_id):
+                continue
+            part_path, meta_path = self._paths(upload_id)
+            try:
+                last_activity = max(
+                    os.path.getmtime(meta_path),
+                    os.path.getmtime(part_path) if os.path.exists(part_path) else 0,
+                )
+            except FileNotFoundError:
+                continue
+            if now - last_activity > self.ttl:
+                self.delete(upload_id)
+                removed += 1
+        # Drop hash state of sessions finished or collected by other workers.
+        for upload_id in self._hashers.keys():
+            if not os.path.exists(self._paths(upload_id)[1]):
+                self._forget_hasher(upload_id)
+        return removed
+
+    def maybe_collect_garbage(self, interval: float = 600) -> None:
+        """Run ``collect_garbage`` at most once per ``interval`` seconds."""
+        if time.monotonic() - self._last_gc >= interval:
+            self.collect_garbage()
+
+    def stats(self) -> dict:
+        cached = len(self._hashers)
+        sessions = sum(1 for name in os.listdir(self.root) if name.endswith('.json'))
+        return {'sessions': sessions, 'hash_states_cached': cached}
+
+
+def create_upload_session_store(config) -> UploadSessionStore:
+    """Build the session store from ``UPLOAD_SESSION_DIR`` / ``UPLOAD_SESSION_TTL``
+    and the tree-hash settings."""
+    root = config.get('UPLOAD_SESSION_DIR') or os.path.join(
+        config.get('BLOB_STORAGE_DIR'), 'sessions'
+    )
+    return UploadSessionStore(root, ttl=config.get('UPLOAD_SESSION_TTL', 86400),
+                              tree=tree_hash_settings(config))
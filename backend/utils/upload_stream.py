@@ -0,0 +1,197 @@
+"""Single-pass spooling of multipart uploads.
+
+Werkzeug normally buffers every uploaded file in a temporary file and the
+route then reads it back to hash it and again to store it. ``HashVaultRequest``
+instead gives the multipart parser a ``HashingSpoolFile`` that writes each
+chunk straight into the blob store's temp directory and hashes it on the way,
+so storing a finished upload is just a rename. With ``HASH_ALGORITHM=tree``
+the tree-hash leaves are computed in the same pass.
+"""
+
+import hashlib
+import time
+
+from flask import Request, current_app
+
+from utils.hash_utils import (
+    TreeHasher,
+    generate_hash_from_stream,
+    hash_streams_concurrently,
+    tree_hash_algorithm,
+    tree_hash_settings,
+    tree_hash_stream,
+    tree_leaf_size,
+)
+from utils.metrics import observe_hashing
+from utils.storage import get_blob_store
+
+
+class HashingSpoolFile:
+    """Writable/readable temp file that hashes everything written to it.
+
+    Args:
+        tree: Optional ``(leaf size, workers)`` to also build a tree-hash
+            fingerprint while writing.
+
+    Time spent hashing is reported under the ``spool`` hashing metrics once
+    the digest is read or the file is closed.
+    """
+
+    def __init__(self, store, filename: str | None = None, tree: tuple[int, int] | None = None):
+        self._store = store
+        self.filename = filename
+        self._file, self.temp_path = store.new_temp_file()
+        self._sha256 = hashlib.sha256()
+        self._tree = TreeHasher(*tree) if tree else None
+        self.size = 0
+        self._committed = False
+        self._hash_seconds = 0.0
+        self._reported = (0, 0.0)  # (bytes, seconds) already passed to observe_hashing
+
+    def write(self, data) -> int:
+        started = time.perf_counter()
+        self._sha256.update(data)
+        if self._tree is not None:
+            self._tree.update(data)
+        self._hash_seconds += time.perf_counter() - started
+        self.size += len(data)
+        return self._file.write(data)
+
+    def _report_hashing(self) -> None:
+        size, seconds = self._reported
+        if self.size > size or self._hash_seconds > seconds:
+            observe_hashing('spool', self.size - size, self._hash_seconds - seconds)
+            self._reported = (self.size, self._hash_seconds)
+
+    def hexdigest(self) -> str:
+        self._report_hashing()
+        return self._sha256.hexdigest()
+
+    def tree_fingerprint(self) -> tuple[str, str, list[str]] | None:
+        """``(hash_algorithm, root, leaves)`` built while spooling, or None."""
+        if self._tree is None:
+            return None
+        started = time.perf_counter()
+        root, leaves = self._tree.result()
+        self._hash_seconds += time.perf_counter() - started
+        self._report_hashing()
+        return tree_hash_algorithm(self._tree.leaf_size), root, leaves
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._file.readline(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def commit(self) -> tuple[str, str, int]:
+        """Move the spooled file into the blob store.
+
+        Returns:
+            Tuple of (blob_ref, file_hash, file_size).
+        """
+        file_hash = self.hexdigest()
+        self._file.close()
+        # The store fsyncs (and possibly compresses) new blobs; duplicates are discarded.
+        blob_ref = self._store.commit_temp_file(self.temp_path, file_hash, self.filename)
+        self._committed = True
+        return blob_ref, file_hash, self.size
+
+    def close(self) -> None:
+        if self._committed:
+            return
+        self._report_hashing()
+        self._file.close()
+        self._store.discard_temp_file(self.temp_path)
+
+    @property
+    def closed(self) -> bool:
+        return self._committed or self._file.closed
+
+
+class HashVaultRequest(Request):
+    """Request class that spools file uploads through ``HashingSpoolFile``."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None,
+                         content_length=None):
+        store = get_blob_store()
+        if not hasattr(store, 'new_temp_file'):
+            return super()._get_file_stream(
+                total_content_length, content_type, filename, content_length
+            )
+        return HashingSpoolFile(store, filename, tree_hash_settings(current_app.config))
+
+
+def uploaded_file_hash(file) -> str:
+    """SHA-256 of an uploaded ``FileStorage``, reusing the spool-time digest."""
+    if isinstance(file.stream, HashingSpoolFile):
+        return file.stream.hexdigest()
+    return generate_hash_from_stream(file.stream)
+
+
+def uploaded_file_fingerprint(file, hash_algorithm: str | None,
+                              workers: int = 4) -> tuple[str, list[str] | None]:
+    """Fingerprint an uploaded ``FileStorage`` with a submission's algorithm.
+
+    Returns:
+        Tuple of (file_hash, leaf hashes or None for flat SHA-256).
+    """
+    leaf_size = tree_leaf_size(hash_algorithm)
+    if leaf_size is None:
+        return uploaded_file_hash(file), None
+    tree = spooled_tree_fingerprint(file)
+    if tree is not None and tree[0] == hash_algorithm:
+        return tree[1], tree[2]
+    return tree_hash_stream(file.stream, leaf_size, workers)
+
+
+def spooled_tree_fingerprint(file) -> tuple[str, str, list[str]] | None:
+    """Tree fingerprint of an uploaded ``FileStorage`` built while spooling, or None."""
+    if isinstance(file.stream, HashingSpoolFile):
+        return file.stream.tree_fingerprint()
+    return None
+
+
+def uploaded_file_hashes(files: list, workers: int = 4) -> list[str]:
+    """SHA-256 of many uploaded files.
+
+    Digests computed while spooling are reused; any remaining streams are
+    hashed concurrently on the shared hash thread pool.
+    """
+    digests = [None] * len(files)
+    pending = []
+    for index, file in enumerate(files):
+        if isinstance(file.stream, HashingSpoolFile):
+            digests[index] = file.stream.hexdigest()
+        else:
+            pending.append(index)
+    if pending:
+        hashed = hash_streams_concurrently([files[index].stream for index in pending], workers)
+        for index, digest in zip(pending, hashed):
+            digests[index] = digest
+    return digests
+
+
+def store_uploaded_file(file, chunk_size: int = 1024 * 1024) -> tuple[str, str, int]:
+    """Persist an uploaded ``FileStorage`` into the blob store.
+
+    Uploads spooled by ``HashVaultRequest`` are committed with a rename; any
+    other stream is copied in ``chunk_size`` pieces and hashed on the way.
+    The filename decides whether the blob store compresses the file.
+
+    Returns:
+        Tuple of (blob_ref, file_hash, file_size).
+    """
+    stream = file.stream
+    if isinstance(stream, HashingSpoolFile) and not stream.closed:
+        return stream.commit()
+    stream.seek(0)
+    return get_blob_store().put_stream(stream, chunk_size, filename=file.filename)
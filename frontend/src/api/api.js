@@ -3,6 +3,7 @@ const API_BASE = 'http://localhost:5000/api';
 export const submitFile = async (formData) => {
   const response = await fetch(`${API_BASE}/submit`, {
     method: 'POST',
+    credentials: 'include',
     body: formData,
   });
   return response.json();
@@ -11,6 +12,7 @@ export const submitFile = async (formData) => {
 export const verifyFile = async (formData) => {
   const response = await fetch(`${API_BASE}/verify`, {
     method: 'POST',
+    credentials: 'include',
     body: formData,
   });
   return response.json();
@@ -19,6 +21,7 @@ export const verifyFile = async (formData) => {
 export const login = async (credentials) => {
   const response = await fetch(`${API_BASE}/auth/login`, {
     method: 'POST',
+    credentials: 'include',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(credentials),
   });
@@ -28,6 +31,7 @@ export const login = async (credentials) => {
 export const signup = async (credentials) => {
   const response = await fetch(`${API_BASE}/auth/signup`, {
     method: 'POST',
+    credentials: 'include',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(credentials),
   });
@@ -21,6 +21,7 @@ const FileUpload = () => {
 
             const response = await fetch('http://localhost:5000/api/submit', {
                 method: 'POST',
+                credentials: 'include',
                 body: formData,
             });
             const data = await response.json();
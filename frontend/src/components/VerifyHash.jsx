@@ -26,6 +26,7 @@ const VerifyHash = () => {
 
             const response = await fetch('http://localhost:5000/api/verify', {
                 method: 'POST',
+                credentials: 'include',
                 body: formData,
             });
             const data = await response.json();
@@ -29,6 +29,7 @@ const VerifyUpload = () => {
 
     try {
       const response = await axios.post('http://localhost:5000/api/verify', formData, {
+        withCredentials: true,
         headers: {
           'Content-Type': 'multipart/form-data',
         },
@@ -43,7 +43,7 @@ const Home = () => {
     });
 
     useEffect(() => {
-        fetch('http://localhost:5000/api/stats')
+        fetch('http://localhost:5000/api/stats', { credentials: 'include' })
             .then(res => res.json())
             .then(data => setStats(data))
             .catch(() => console.error("Stats fetch failed"));
@@ -40,6 +40,7 @@ const Login = () => {
 
             const response = await fetch(url, {
                 method: 'POST',
+                credentials: 'include',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(body),
             });